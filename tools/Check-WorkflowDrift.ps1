@@ -169,13 +169,16 @@ function Process-Staging {
 }
 
 if ($AutoFix) {
-  $writeExitCode = Invoke-WorkflowEnclave -Arguments @('--default-scope', '--write')
+  $writeExitCode = Invoke-WorkflowEnclave -Arguments @('--default-scope', '--write', '--transaction', '--jobs', '0')
   if ($writeExitCode -ne 0) {
     exit $writeExitCode
   }
 }
 
-$exitCode = Invoke-WorkflowEnclave -Arguments @('--default-scope', '--check')
+# Without -AutoFix the working tree is left untouched, so ask the updater for
+# unified diffs in the same pass instead of only NEEDS UPDATE lines.
+$checkMode = if ($AutoFix) { '--check' } else { '--diff' }
+$exitCode = Invoke-WorkflowEnclave -Arguments @('--default-scope', $checkMode, '--jobs', '0')
 
 switch ($exitCode) {
   0 {
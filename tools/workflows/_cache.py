@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Content-addressed result cache for the workflow updater.
+
+Entries are keyed by (workflow content digest, updater engine digest, ruamel
+version) and hold the transform verdict plus the normalized text when it
+differs from the input. The cache lives under the enclave home, is bounded by
+size with least-recently-used eviction (entry mtime is the recency clock), and
+can be exported to / imported from a single JSON file so CI runners can
+restore it like any other cache artifact.
+
+This module must stay importable without ruamel so the enclave wrapper can
+manage the cache from the base interpreter.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+CACHE_SCHEMA = 'comparevi/workflow-updater-cache@v1'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+CACHE_DIR_ENV = 'COMPAREVI_WORKFLOW_CACHE_DIR'
+CACHE_MAX_BYTES_ENV = 'COMPAREVI_WORKFLOW_CACHE_MAX_BYTES'
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def cache_key(content_sha256: str, engine_digest: str, ruamel_version: str) -> str:
+    return hashlib.sha256(f'{content_sha256}\0{engine_digest}\0{ruamel_version}'.encode('utf-8')).hexdigest()
+
+
+def _is_cache_key(value: object) -> bool:
+    return isinstance(value, str) and len(value) == 64 and all(c in '0123456789abcdef' for c in value)
+
+
+def max_bytes_from_env() -> int:
+    raw = os.environ.get(CACHE_MAX_BYTES_ENV, '').strip()
+    if not raw:
+        return DEFAULT_MAX_BYTES
+    try:
+        value = int(raw)
+    except ValueError:
+        raise RuntimeError(f'{CACHE_MAX_BYTES_ENV} must be an integer byte count: {raw!r}')
+    return max(value, 0)
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix='.tmp-', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as fp:
+            fp.write(text)
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+
+class ResultCache:
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.entries_dir = self.root / 'entries'
+
+    def _entry_path(self, key: str) -> Path:
+        return self.entries_dir / key[:2] / f'{key}.json'
+
+    def get(self, key: str) -> tuple[bool, str | None] | None:
+        """Return (changed, normalized_text) or None on a miss.
+
+        normalized_text is None when the cached verdict is "unchanged".
+        """
+        entry_path = self._entry_path(key)
+        try:
+            payload = json.loads(entry_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(payload, dict) or not isinstance(payload.get('changed'), bool):
+            return None
+        text = payload.get('text')
+        if payload['changed'] and not isinstance(text, str):
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return payload['changed'], text if payload['changed'] else None
+
+    def put(self, key: str, changed: bool, text: str | None) -> None:
+        payload = {'changed': changed, 'text': text if changed else None}
+        _atomic_write_text(self._entry_path(key), json.dumps(payload))
+
+    def _iter_entries(self):
+        if not self.entries_dir.is_dir():
+            return
+        for bucket in self.entries_dir.iterdir():
+            if not bucket.is_dir():
+                continue
+            for entry_path in bucket.glob('*.json'):
+                yield entry_path
+
+    def prune(self) -> int:
+        """Evict least-recently-used entries until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        for entry_path in self._iter_entries():
+            try:
+                st = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, entry_path.name, entry_path, st.st_size))
+            total += st.st_size
+        removed = 0
+        entries.sort()
+        for _, _, entry_path, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                entry_path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def export_to(self, path: Path) -> int:
+        entries = []
+        for entry_path in sorted(self._iter_entries(), key=lambda p: p.name):
+            try:
+                payload = json.loads(entry_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            entries.append({'key': entry_path.stem, 'changed': payload.get('changed'), 'text': payload.get('text')})
+        _atomic_write_text(Path(path), json.dumps({'schema': CACHE_SCHEMA, 'entries': entries}))
+        return len(entries)
+
+    def import_from(self, path: Path) -> int:
+        payload = json.loads(Path(path).read_text(encoding='utf-8'))
+        if not isinstance(payload, dict) or payload.get('schema') != CACHE_SCHEMA:
+            raise RuntimeError(f'not a workflow updater cache export ({CACHE_SCHEMA}): {path}')
+        imported = 0
+        for entry in payload.get('entries') or []:
+            if not isinstance(entry, dict):
+                continue
+            key = entry.get('key')
+            changed = entry.get('changed')
+            text = entry.get('text')
+            if not _is_cache_key(key) or not isinstance(changed, bool):
+                continue
+            if changed and not isinstance(text, str):
+                continue
+            self.put(key, changed, text)
+            imported += 1
+        self.prune()
+        return imported
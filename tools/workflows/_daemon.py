@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Long-lived workflow updater daemon.
+
+The server half runs inside the enclave venv, keeps ruamel and the transform
+module loaded, and answers updater requests over a Unix domain socket inside
+the enclave home. The socket is created owner-only (0600): a request runs
+with the daemon owner's rights and can name any path to write. It exits with DAEMON_RESTART_EXIT_CODE when the updater
+sources or requirements change so the enclave supervisor can refresh the venv
+and start a fresh server.
+
+The client half is stdlib-only so `workflow_enclave.py` can forward requests
+from the base interpreter and fall back to a subprocess when no daemon answers.
+
+Protocol: one JSON request line per connection. A run streams its output as
+it is printed, one line per batch of complete lines, then ends with its exit
+code; other ops answer with one line.
+  {"op": "run", "argv": [...], "cwd": "/abs"} -> {"output": "..."}* {"exitCode": 0}
+  {"op": "ping"}                              -> {"ok": true, "pid": 123}
+  {"op": "shutdown"}                          -> {"ok": true}
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+SCRIPT_ROOT = Path(__file__).resolve().parent
+if str(SCRIPT_ROOT) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_ROOT))
+
+DAEMON_RESTART_EXIT_CODE = 75
+_MAX_SOCKET_PATH = 100
+_POLL_SECONDS = 1.0
+# A client that connects but never finishes its request line must not wedge the server.
+_REQUEST_READ_SECONDS = 10.0
+
+
+def daemon_supported() -> bool:
+    return hasattr(socket, 'AF_UNIX')
+
+
+def _private_runtime_dir() -> Path | None:
+    """$XDG_RUNTIME_DIR, else a 0700 per-user dir under the temp dir; None when neither is private to us."""
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime and Path(runtime).is_dir():
+        return Path(runtime)
+    if not hasattr(os, 'getuid'):
+        return None
+    path = Path(tempfile.gettempdir()) / f'comparevi-workflow-updater-{os.getuid()}'
+    try:
+        path.mkdir(mode=0o700, exist_ok=True)
+        info = path.lstat()
+    except OSError:
+        return None
+    # The name is guessable, so only a real directory we alone own and can enter will do.
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        return None
+    return path
+
+
+def socket_path_for(home: Path) -> Path | None:
+    """Socket path inside the enclave home, else a hashed one in a private runtime dir; None when there is none."""
+    candidate = Path(home) / 'updater.sock'
+    if len(str(candidate)) <= _MAX_SOCKET_PATH:
+        return candidate
+    runtime = _private_runtime_dir()
+    if runtime is None:
+        return None
+    digest = hashlib.sha256(str(Path(home)).encode('utf-8')).hexdigest()[:12]
+    return runtime / f'comparevi-workflow-updater-{digest}.sock'
+
+
+def _watched_sources() -> list[Path]:
+    return sorted([*SCRIPT_ROOT.glob('*.py'), SCRIPT_ROOT / 'requirements.txt'])
+
+
+def sources_fingerprint() -> str:
+    digest = hashlib.sha256()
+    for path in _watched_sources():
+        digest.update(path.name.encode('utf-8'))
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(b'<missing>')
+    return digest.hexdigest()
+
+
+def _recv_line(conn: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    return b''.join(chunks)
+
+
+def _send_json(conn: socket.socket, payload: dict) -> None:
+    conn.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+
+
+class _StreamedOutput(io.TextIOBase):
+    """stdout for a 'run' request: complete lines go to the client as they are printed."""
+
+    def __init__(self, conn: socket.socket) -> None:
+        self.conn = conn
+        self.pending = ''
+        self.client_gone = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        head, newline, self.pending = (self.pending + text).rpartition('\n')
+        if newline:
+            self._send(head + newline)
+        return len(text)
+
+    def finish(self) -> None:
+        if self.pending:
+            self._send(self.pending)
+            self.pending = ''
+
+    def _send(self, chunk: str) -> None:
+        if self.client_gone:
+            return
+        try:
+            _send_json(self.conn, {'output': chunk})
+        except OSError:
+            # A client that stopped waiting does not stop the run it started.
+            self.client_gone = True
+
+
+def _run_request(request: dict, output: _StreamedOutput) -> dict:
+    from _update_workflows_impl import main as updater_main
+    argv = request.get('argv')
+    if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+        return {'error': 'argv must be a list of strings'}
+    cwd = request.get('cwd') or os.getcwd()
+    if not isinstance(cwd, str) or not os.path.isabs(cwd):
+        return {'error': 'cwd must be an absolute path'}
+    previous_cwd = os.getcwd()
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(output):
+            exit_code = updater_main(argv)
+    except Exception as e:
+        return {'error': f'{type(e).__name__}: {e}'}
+    finally:
+        output.finish()
+        os.chdir(previous_cwd)
+    return {'exitCode': exit_code}
+
+
+def serve(sock_path: Path) -> int:
+    import _update_workflows_impl
+    _update_workflows_impl._warm_worker()
+    fingerprint = sources_fingerprint()
+    sock_path = Path(sock_path)
+    with contextlib.suppress(FileNotFoundError):
+        sock_path.unlink()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Owner-only from the moment it exists; the chmod covers umask-less filesystems.
+    previous_umask = os.umask(0o077)
+    try:
+        server.bind(str(sock_path))
+    finally:
+        os.umask(previous_umask)
+    os.chmod(sock_path, 0o600)
+    server.listen(8)
+    server.settimeout(_POLL_SECONDS)
+    print(f'workflow updater daemon listening on {sock_path} (pid {os.getpid()})', flush=True)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                if sources_fingerprint() != fingerprint:
+                    print('workflow updater sources changed; restarting daemon', flush=True)
+                    return DAEMON_RESTART_EXIT_CODE
+                continue
+            with conn:
+                conn.settimeout(_REQUEST_READ_SECONDS)
+                try:
+                    request = json.loads(_recv_line(conn) or b'{}')
+                except socket.timeout:
+                    continue
+                except ValueError:
+                    _send_json(conn, {'error': 'request must be a single JSON line'})
+                    continue
+                conn.settimeout(None)
+                op = request.get('op', 'run') if isinstance(request, dict) else None
+                if op == 'ping':
+                    _send_json(conn, {'ok': True, 'pid': os.getpid()})
+                    continue
+                if op == 'shutdown':
+                    _send_json(conn, {'ok': True})
+                    return 0
+                if op != 'run':
+                    _send_json(conn, {'error': f'unknown op: {op!r}'})
+                    continue
+                if sources_fingerprint() != fingerprint:
+                    _send_json(conn, {'error': 'restarting'})
+                    print('workflow updater sources changed; restarting daemon', flush=True)
+                    return DAEMON_RESTART_EXIT_CODE
+                output = _StreamedOutput(conn)
+                response = _run_request(request, output)
+                if not output.client_gone:
+                    with contextlib.suppress(OSError):
+                        _send_json(conn, response)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        server.close()
+        with contextlib.suppress(FileNotFoundError):
+            sock_path.unlink()
+
+
+def request(
+    sock_path: Path | None, payload: dict, timeout: float | None = None, on_output: Callable[[str], None] | None = None
+) -> dict | None:
+    """Send one request to a running daemon; None when no daemon takes it.
+
+    Streamed output goes to `on_output` as it arrives (or is joined into the
+    response's "output"). `timeout` bounds the connect and each wait for the
+    next line, so a daemon that keeps printing never times out. A daemon that
+    took the request and then went quiet answers {"error": ..., "timedOut": true}:
+    it may still be running the request.
+    """
+    if not daemon_supported() or sock_path is None or not Path(sock_path).exists():
+        return None
+    chunks: list[str] = []
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(str(sock_path))
+            _send_json(client, payload)
+            lines = client.makefile('rb')
+            while True:
+                try:
+                    raw = lines.readline()
+                except socket.timeout:
+                    return {'error': f'no answer within {timeout:g}s', 'timedOut': True}
+                try:
+                    response = json.loads(raw)
+                except ValueError:
+                    return None
+                if not isinstance(response, dict):
+                    return None
+                if set(response) != {'output'}:
+                    break
+                if on_output is None:
+                    chunks.append(str(response['output']))
+                else:
+                    on_output(str(response['output']))
+    except OSError:
+        return None
+    if chunks:
+        response['output'] = ''.join(chunks)
+    return response
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) != 2 or argv[0] != '--serve':
+        print('Usage: _daemon.py --serve <socket-path>')
+        return 2
+    if not daemon_supported():
+        print('::error::Unix domain sockets are not available on this platform')
+        return 2
+    return serve(Path(argv[1]))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,19 +1,31 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import hashlib
-import json
 import os
-import subprocess
 import sys
 from pathlib import Path, PurePosixPath
 
+# hashlib, json, subprocess, the cache, the daemon client (socket, tempfile)
+# and the scan state are imported by the functions that use them: usage
+# errors and most early exits never need them.
 WORKFLOWS_ROOT = Path(__file__).resolve().parent
+REPO_ROOT = WORKFLOWS_ROOT.parents[1]
 VENV_DIR = Path(os.environ.get('COMPAREVI_WORKFLOW_ENCLAVE_HOME', str(WORKFLOWS_ROOT / '.venv'))).resolve()
 STAMP_PATH = VENV_DIR / '.requirements.sha256'
 REQUIREMENTS_PATH = WORKFLOWS_ROOT / 'requirements.txt'
 UPDATE_WORKFLOWS_PATH = WORKFLOWS_ROOT / 'update_workflows.py'
 MANIFEST_PATH = WORKFLOWS_ROOT / 'workflow-manifest.json'
+CACHE_DIR = VENV_DIR / 'cache'
+DAEMON_PATH = WORKFLOWS_ROOT / '_daemon.py'
+SCAN_STATE_PATH = VENV_DIR / 'scan-state.json'
+# Updater options that change a file's verdict; part of the scan-state key.
+_VERDICT_OPTIONS = ('--splice',)
+# Updater resource limits; a tighter limit can fail a file that was clean before.
+_LIMIT_OPTIONS = ('--max-file-bytes', '--max-depth', '--max-alias-nodes', '--file-timeout', '--max-memory')
+# Seconds a daemon 'run' may go without output before the caller gives up on it.
+DAEMON_RUN_TIMEOUT = float(os.environ.get('COMPAREVI_WORKFLOW_DAEMON_TIMEOUT', '600'))
+# Non-module files under tools/workflows that feed every verdict (--changed-since).
+_ENGINE_INPUT_FILES = ('requirements.txt', 'workflow-manifest.json')
 
 
 def _venv_python_path() -> Path:
@@ -23,14 +35,28 @@ def _venv_python_path() -> Path:
 
 
 def _requirements_digest() -> str:
+    import hashlib
     return hashlib.sha256(REQUIREMENTS_PATH.read_bytes()).hexdigest()
 
 
+def _daemon_socket_path() -> Path | None:
+    from _daemon import socket_path_for
+    return socket_path_for(VENV_DIR)
+
+
+def __getattr__(name: str):
+    if name == 'DAEMON_SOCKET_PATH':
+        return _daemon_socket_path()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 def _run(command: list[str]) -> None:
+    import subprocess
     subprocess.run(command, check=True)
 
 
 def _ensure_pip(venv_python: Path) -> None:
+    import subprocess
     probe = subprocess.run(
         [str(venv_python), '-m', 'pip', '--version'],
         stdout=subprocess.DEVNULL,
@@ -73,6 +99,7 @@ def _normalize_managed_workflow_file(entry: object) -> str:
 
 
 def load_default_scope() -> list[str]:
+    import json
     payload = json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
     workflows = payload.get('managedWorkflowFiles')
     if not isinstance(workflows, list) or not workflows:
@@ -80,9 +107,235 @@ def load_default_scope() -> list[str]:
     return [_normalize_managed_workflow_file(item) for item in workflows]
 
 
-def run_updater(argv: list[str]) -> int:
-    venv_python = ensure_enclave()
+def discover_all_scope() -> list[str]:
+    """Every workflow under .github/workflows plus composite action manifests, repo-relative."""
+    github = REPO_ROOT / '.github'
+    found = {
+        *(github / 'workflows').rglob('*.yml'),
+        *(github / 'workflows').rglob('*.yaml'),
+        *github.glob('actions/*/action.yml'),
+        *github.glob('actions/*/action.yaml'),
+    }
+    return sorted(path.relative_to(REPO_ROOT).as_posix() for path in found if path.is_file())
+
+
+def open_result_cache():
+    from _cache import ResultCache, max_bytes_from_env
+    return ResultCache(CACHE_DIR, max_bytes_from_env())
+
+
+def _updater_env() -> dict[str, str]:
+    from _cache import CACHE_DIR_ENV
     env = os.environ.copy()
     env['COMPAREVI_WORKFLOW_ENCLAVE_ACTIVE'] = '1'
-    completed = subprocess.run([str(venv_python), str(UPDATE_WORKFLOWS_PATH), *argv], env=env)
+    env.setdefault(CACHE_DIR_ENV, str(CACHE_DIR))
+    return env
+
+
+def run_daemon() -> int:
+    """Serve updater requests until shutdown, restarting when the updater changes."""
+    import subprocess
+    from _daemon import DAEMON_RESTART_EXIT_CODE
+    sock_path = _daemon_socket_path()
+    if sock_path is None:
+        print(f'::error::no private directory for the daemon socket; set XDG_RUNTIME_DIR or shorten {VENV_DIR}')
+        return 2
+    while True:
+        venv_python = ensure_enclave()
+        completed = subprocess.run(
+            [str(venv_python), str(DAEMON_PATH), '--serve', str(sock_path)],
+            env=_updater_env()
+        )
+        if completed.returncode != DAEMON_RESTART_EXIT_CODE:
+            return completed.returncode
+
+
+def stop_daemon() -> bool:
+    from _daemon import request as daemon_request
+    response = daemon_request(_daemon_socket_path(), {'op': 'shutdown'}, timeout=5.0)
+    return response is not None and response.get('ok') is True
+
+
+def _run_via_daemon(argv: list[str]) -> int | None:
+    if os.environ.get('COMPAREVI_WORKFLOW_DAEMON', '').strip() == '0':
+        return None
+    from _daemon import request as daemon_request
+    streamed = False
+
+    def show(chunk: str) -> None:
+        nonlocal streamed
+        streamed = True
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+
+    # The timeout bounds silence, not the run: the daemon streams output per file.
+    response = daemon_request(_daemon_socket_path(), {'op': 'run', 'argv': argv, 'cwd': os.getcwd()},
+                              timeout=DAEMON_RUN_TIMEOUT, on_output=show)
+    if response is None:
+        return None
+    if isinstance(response.get('exitCode'), int):
+        return response['exitCode']
+    timed_out = bool(response.get('timedOut'))
+    if not streamed and not (timed_out and '--write' in argv):
+        if timed_out:
+            print(f"::warning::workflow updater daemon sent {response['error']}; running the updater directly")
+        return None
+    # Part of the output is already shown, or the daemon may still be writing
+    # these files: running the request again here would repeat or race it.
+    print(f"::error::workflow updater daemon failed mid-run ({response.get('error')}); not re-running it")
+    return 4
+
+
+def stream_updater(argv: list[str]) -> int:
+    """Run a long-lived `--watch`/`--stdio` updater on this process's stdio; never goes through the daemon."""
+    import subprocess
+    venv_python = ensure_enclave()
+    process = subprocess.Popen([str(venv_python), str(UPDATE_WORKFLOWS_PATH), *argv], env=_updater_env())
+    try:
+        return process.wait()
+    except KeyboardInterrupt:
+        # The child got the same SIGINT and exits 0 once it stops serving.
+        return process.wait()
+
+
+def run_updater(argv: list[str]) -> int:
+    exit_code = _run_via_daemon(argv)
+    if exit_code is not None:
+        return exit_code
+    import subprocess
+    venv_python = ensure_enclave()
+    completed = subprocess.run([str(venv_python), str(UPDATE_WORKFLOWS_PATH), *argv], env=_updater_env())
     return completed.returncode
+
+
+def _git_lines(args: list[str]) -> list[str]:
+    import subprocess
+    completed = subprocess.run(['git', '-C', str(REPO_ROOT), *args], capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip() or f"git {' '.join(args)} failed")
+    return [line for line in completed.stdout.split('\0' if '-z' in args else '\n') if line]
+
+
+def changed_paths_since(ref: str) -> list[str]:
+    """Repo-relative paths that differ from the merge base with `ref`: commits, worktree and untracked files."""
+    base = _git_lines(['merge-base', ref, 'HEAD'])[0]
+    changed = _git_lines(['diff', '--name-only', '--no-renames', '-z', base, '--'])
+    untracked = _git_lines(['ls-files', '--others', '--exclude-standard', '-z'])
+    return sorted({*changed, *untracked})
+
+
+def _is_engine_input(rel: str) -> bool:
+    path = PurePosixPath(rel)
+    if path.parent != PurePosixPath(WORKFLOWS_ROOT.relative_to(REPO_ROOT).as_posix()):
+        return False
+    return path.suffix == '.py' or path.name in _ENGINE_INPUT_FILES
+
+
+def changed_since_scope(ref: str) -> tuple[list[str], list[str]]:
+    """(managed workflows to process, engine inputs that changed); any engine input change means all of them."""
+    scope = load_default_scope()
+    changed = changed_paths_since(ref)
+    engine_inputs = [rel for rel in changed if _is_engine_input(rel)]
+    if engine_inputs:
+        return scope, engine_inputs
+    touched = set(changed)
+    return [rel for rel in scope if rel in touched and (REPO_ROOT / rel).is_file()], []
+
+
+def run_changed_since(ref: str, argv: list[str]) -> int:
+    """Run the updater over the managed workflows changed since `ref` (all of them when the updater changed)."""
+    try:
+        files, engine_inputs = changed_since_scope(ref)
+    except RuntimeError as exc:
+        print(f'--changed-since {ref}: {exc}')
+        return 2
+    if engine_inputs:
+        print(f"--changed-since {ref}: updater inputs changed ({', '.join(engine_inputs)}); checking all {len(files)} managed workflows")
+    else:
+        print(f'--changed-since {ref}: {len(files)} of {len(load_default_scope())} managed workflows changed')
+    if not files:
+        return 0
+    sys.stdout.flush()
+    return run_updater([*argv, *files])
+
+
+def take_option(argv: list[str], name: str) -> tuple[str | None, list[str]]:
+    """Remove `name VALUE` from argv; returns (VALUE or None, remaining argv)."""
+    if name not in argv[:-1]:
+        return None, argv
+    i = argv.index(name)
+    return argv[i + 1], [*argv[:i], *argv[i + 2:]]
+
+
+def run_all_scope(argv: list[str]) -> int:
+    """Run the updater over discover_all_scope(), skipping files unchanged since their last clean verdict.
+
+    `--shard i/n` slices the discovered scope before the scan state is
+    consulted, so every node agrees on its slice whatever its local state;
+    `--results FILE` then records the whole slice: skipped files as clean,
+    and pending files the updater left without a status as errors.
+    """
+    import json
+    from _daemon import sources_fingerprint
+    from _scan_state import ScanState
+    shard_spec, argv = take_option(argv, '--shard')
+    durations_path, argv = take_option(argv, '--shard-durations')
+    results_out, argv = take_option(argv, '--results')
+    limits = [f'{name}={argv[i + 1]}' for i, name in enumerate(argv[:-1]) if name in _LIMIT_OPTIONS]
+    engine_key = ':'.join([sources_fingerprint(), *sorted(arg for arg in argv if arg in _VERDICT_OPTIONS), *sorted(limits)])
+    state = ScanState(SCAN_STATE_PATH, engine_key)
+    discovered = discover_all_scope()
+    state.retain(discovered)
+    shard = None
+    if shard_spec is not None:
+        from _shard import select_shard
+        by_name = {os.path.relpath(REPO_ROOT / rel): rel for rel in discovered}
+        try:
+            kept, shard = select_shard(list(by_name), shard_spec, durations_path)
+        except ValueError as exc:
+            print(exc)
+            return 2
+        print(f"shard {shard['index']}/{shard['count']}: {len(kept)} of {len(discovered)} files")
+        discovered = [by_name[name] for name in kept]
+    pending = [rel for rel in discovered if not state.is_clean(REPO_ROOT / rel, rel)]
+    print(f'--all: {len(discovered)} files discovered, {len(discovered) - len(pending)} unchanged since their last clean check')
+    statuses: dict[str, str] = {}
+    if not pending:
+        state.save()
+        _write_all_results(results_out, discovered, statuses, shard, pending)
+        return 0
+
+    by_arg = {os.path.relpath(REPO_ROOT / rel): rel for rel in pending}
+    VENV_DIR.mkdir(parents=True, exist_ok=True)
+    results_path = VENV_DIR / f'scan-results-{os.getpid()}.json'
+    try:
+        exit_code = run_updater([*argv, '--results', str(results_path), *by_arg])
+        try:
+            statuses = json.loads(results_path.read_text(encoding='utf-8')).get('files') or {}
+        except (OSError, ValueError, AttributeError):
+            statuses = {}
+    finally:
+        results_path.unlink(missing_ok=True)
+    for arg, rel in by_arg.items():
+        if statuses.get(arg) in ('clean', 'updated'):
+            state.record(REPO_ROOT / rel, rel)
+        else:
+            state.forget(rel)
+    state.save()
+    _write_all_results(results_out, discovered, statuses, shard, pending)
+    return exit_code
+
+
+def _write_all_results(path: str | None, discovered: list[str], statuses: dict[str, str], shard: dict | None,
+                       pending: list[str]) -> None:
+    if path is None:
+        return
+    from _shard import write_results
+    pending_set = set(pending)
+    files = {}
+    for rel in discovered:
+        name = os.path.relpath(REPO_ROOT / rel)
+        # Only the scan state vouches for a file the updater was not asked about;
+        # a pending file with no status (updater crash, bad option) is an error.
+        files[name] = statuses.get(name, 'error' if rel in pending_set else 'clean')
+    write_results(Path(path), files, shard)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+libyaml-backed plain loader for the updater's fast check path.
+
+`load_plain` parses with ruamel's C safe loader (ruamel.yaml.clib) into plain
+dicts and lists -- no comment, position or round-trip bookkeeping -- but keeps
+scalar style the way the round-trip loader does (LiteralScalarString for `|`,
+SingleQuotedScalarString for `'...'`, and so on), so transforms that check
+style see the same thing on both paths.
+
+Mappings and sequences load as `PlainDict` / `PlainList`, whose `decoration`
+is True where the round-trip loader would see a decorated node: flow style,
+an anchor or tag, or a comment. The C parser drops comments, so they are
+found in the text: a `#` at the start of a line or after a blank, or an
+empty line (ruamel keeps those as comments too), that no scalar covers.
+Each one marks every collection the round-trip loader might hang it on:
+
+- the innermost collection around it (a mapping value's window starts right
+  after its key; block collections run until the next token, so trailing
+  comment lines count for the block they follow)
+- between a key and its block, the key's mapping as well
+- the innermost mapping that holds the next token (a comment above a key)
+
+so `decoration` may over-report but never misses a decorated node.
+
+The engine runs the routed transforms over this throwaway structure first and
+only pays for the round-trip load when one of them reports a change.
+"""
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+
+from ruamel.yaml import YAML, __with_libyaml__
+from ruamel.yaml.constructor import SafeConstructor
+from ruamel.yaml.nodes import MappingNode
+from ruamel.yaml.scalarstring import (
+    DoubleQuotedScalarString,
+    FoldedScalarString,
+    LiteralScalarString,
+    SingleQuotedScalarString,
+)
+
+LIBYAML_AVAILABLE = bool(__with_libyaml__)
+
+_STYLED = {
+    '|': LiteralScalarString,
+    '>': FoldedScalarString,
+    "'": SingleQuotedScalarString,
+    '"': DoubleQuotedScalarString,
+}
+
+
+_COMMENT = re.compile(r'(?:^|(?<=[ \t]))#|^[ \t]*$', re.MULTILINE)
+_CONTENT_LINE = re.compile(r'^[ \t]*(?=[^ \t\n#])', re.MULTILINE)
+
+
+class PlainDict(dict):
+    __slots__ = ('decoration',)
+
+
+class PlainList(list):
+    __slots__ = ('decoration',)
+
+
+class _StyledSafeConstructor(SafeConstructor):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.reset_layout()
+
+    def reset_layout(self) -> None:
+        # (node, constructed collection) pairs and the spans of scalars that could hide a comment or empty line
+        self.collections: list = []
+        self.text_spans: list[tuple[int, int, bool]] = []
+
+
+def _construct_styled_str(constructor: _StyledSafeConstructor, node):
+    value = constructor.construct_scalar(node)
+    styled = _STYLED.get(node.style)
+    if '\n' in value or (styled is not None and '#' in value):
+        constructor.text_spans.append((node.start_mark.index, node.end_mark.index, node.style in ('|', '>')))
+    return styled(value) if styled is not None else value
+
+
+def _construct_map(constructor: _StyledSafeConstructor, node):
+    data = PlainDict()
+    constructor.collections.append((node, data))
+    yield data
+    data.update(constructor.construct_mapping(node))
+
+
+def _construct_seq(constructor: _StyledSafeConstructor, node):
+    data = PlainList()
+    constructor.collections.append((node, data))
+    yield data
+    data.extend(constructor.construct_sequence(node))
+
+
+_StyledSafeConstructor.add_constructor('tag:yaml.org,2002:str', _construct_styled_str)
+_StyledSafeConstructor.add_constructor('tag:yaml.org,2002:map', _construct_map)
+_StyledSafeConstructor.add_constructor('tag:yaml.org,2002:seq', _construct_seq)
+
+
+def _comments(text: str, text_spans: list[tuple[int, int, bool]]) -> list[int]:
+    # A block scalar's span runs over the empty lines after it, which the
+    # round-trip loader keeps as comments; end it at its last content line.
+    spans = sorted((start, start + len(text[start:end].rstrip()) if block else end) for start, end, block in text_spans)
+    starts = [start for start, _ in spans]
+    found = []
+    for match in _COMMENT.finditer(text):
+        at = match.start()
+        i = bisect_right(starts, at) - 1
+        if i < 0 or spans[i][1] <= at:
+            found.append(at)
+    return found
+
+
+def _mark_decoration(text: str, collections: list, text_spans: list[tuple[int, int, bool]]) -> None:
+    key_ends = {}
+    for node, _ in collections:
+        if isinstance(node, MappingNode):
+            for key, value in node.value:
+                key_ends[id(value)] = key.end_mark.index
+    windows = []
+    for node, data in collections:
+        start = node.start_mark.index
+        if node.flow_style or text.startswith(('&', '!'), start):
+            data.decoration = True
+        windows.append((key_ends.get(id(node), start), node.end_mark.index, data, start))
+    comments = _comments(text, text_spans)
+    if not comments:
+        return
+    # Sweep comments and windows in text order; the stack holds the open windows, innermost last.
+    windows.sort(key=lambda window: (window[0], -window[1]))
+    stack: list = []
+    i = 0
+    for at in comments:
+        while i < len(windows) and windows[i][0] <= at:
+            while stack and stack[-1][1] <= windows[i][0]:
+                stack.pop()
+            stack.append(windows[i])
+            i += 1
+        while stack and stack[-1][1] <= at:
+            stack.pop()
+        if not stack:
+            continue
+        stack[-1][2].decoration = True
+        if at < stack[-1][3] and len(stack) > 1:
+            # Between a key and its block: the round-trip loader may hang it on the key's mapping.
+            stack[-2][2].decoration = True
+        following = _CONTENT_LINE.search(text, text.find('\n', at) + 1 or len(text))
+        next_token = following.end() if following else len(text)
+        for window in reversed(stack):
+            if window[1] > next_token:
+                if isinstance(window[2], dict):
+                    window[2].decoration = True
+                break
+
+
+@lru_cache(maxsize=None)
+def _plain_yaml() -> YAML:
+    # pure=False picks the C parser when ruamel.yaml.clib is installed and
+    # quietly uses the pure-Python safe parser otherwise.
+    plain = YAML(typ='safe', pure=False)
+    plain.Constructor = _StyledSafeConstructor
+    return plain
+
+
+def load_plain(text: str):
+    plain = _plain_yaml()
+    # load() would build a throwaway loader per call; compose with the C
+    # parser and construct on the shared constructor to see its layout notes.
+    node = plain.compose(text)
+    if node is None:
+        return None
+    constructor = plain.constructor
+    constructor.reset_layout()
+    try:
+        doc = constructor.construct_document(node)
+        _mark_decoration(text, constructor.collections, constructor.text_spans)
+    finally:
+        constructor.reset_layout()
+    return doc
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Per-job memo of transform outcomes for the workflow updater.
+
+A fused job walk (`_job_visitor.visit_jobs`) asks the memo before running its
+hooks on a job. The key is (job subtree digest, job name, hook set, engine
+version): the `_merkle` digest covers everything a hook can see in its own
+job, the job name picks its results dir, and the engine version covers the
+hook code. A hit means these hooks already ran on this exact job and none
+of them reported a change, so the job is skipped and counts as "no change".
+On a miss the hooks run, and the job is recorded when none of them reports
+a change and its digest is the same after them; a job a hook changes,
+reported or not, is never memoized.
+
+Hooks only ever touch their own job, so an edit to one job only re-runs the
+hooks on that job: the others hit.
+
+Only round-trip documents use the memo. A plain-loaded document (the fast
+check) digests without the comments the round-trip loader keeps, so two
+jobs a hook treats differently could share a key there.
+
+Entries are stored as "unchanged" verdicts in the `_cache.ResultCache`, so
+they share its size bound, eviction and export/import.
+"""
+from __future__ import annotations
+
+import hashlib
+
+from _cache import ResultCache
+
+
+class JobMemo:
+    def __init__(self, cache: ResultCache, version: str) -> None:
+        self.cache = cache
+        self.version = version
+
+    def key(self, hooks_key: str, job_name: object, digest: bytes) -> str:
+        return hashlib.sha256(f'job\0{self.version}\0{hooks_key}\0{job_name!r}\0{digest.hex()}'.encode('utf-8')).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return self.cache.get(key) is not None
+
+    def record(self, key: str) -> None:
+        try:
+            self.cache.put(key, False, None)
+        except OSError:
+            # A memo that cannot be written only costs the next run its hit.
+            pass
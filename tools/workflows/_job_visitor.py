@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Fused per-job traversal for the workflow transforms.
+
+Most wire rules only ever look at one job at a time: they pick a results dir
+from the job name, find their anchor steps through the step index and insert
+next to them. Such a rule is written as a job hook,
+`hook(jobs, job_name, job, *args) -> bool`, and registered on its
+TransformSpec (`job_hook`). Its doc-level transform is `for_each_job(doc,
+hook, *args)`, so calling it directly still walks every job as before.
+
+`run_plan` hands each contiguous run of job-hook specs to `visit_jobs`, which
+walks the jobs once and, per job, runs the hooks in plan order. Because a
+hook only touches its own job, job-major order yields exactly what rule-major
+(one full walk per rule) does.
+
+With a `_job_memo.JobMemo`, jobs the same hooks already passed unchanged
+are skipped. A job is recorded only when no hook reports a change and its
+digest after the hooks equals the one before: a hook that edits a job
+without saying so must not be skipped on the next run.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Sequence
+
+from _merkle import node_digest
+
+JobHook = Callable[..., bool]
+
+
+def _job_map(doc: Any) -> dict | None:
+    jobs = doc.get('jobs') or {}
+    return jobs if isinstance(jobs, dict) else None
+
+
+def visit_jobs(doc: Any, hooks: Sequence[tuple[JobHook, tuple]], memo: Any = None, hooks_key: str = '') -> list[bool]:
+    """Run every (hook, args) over every job in one walk; returns each hook's changed flag."""
+    changed = [False] * len(hooks)
+    jobs = _job_map(doc)
+    if jobs is None:
+        return changed
+    for job_name in list(jobs):
+        key = digest = None
+        if memo is not None and isinstance(jobs.get(job_name), dict):
+            digest = node_digest(jobs[job_name])
+            key = memo.key(hooks_key, job_name, digest)
+            if key in memo:
+                continue
+        reported = False
+        for i, (hook, args) in enumerate(hooks):
+            # Re-read per hook: a rule-major walk would see a job an earlier rule replaced.
+            job = jobs.get(job_name)
+            if isinstance(job, dict) and hook(jobs, job_name, job, *args):
+                changed[i] = reported = True
+        if key is not None and not reported and node_digest(jobs.get(job_name)) == digest:
+            memo.record(key)
+    if any(changed):
+        doc['jobs'] = jobs
+    return changed
+
+
+def for_each_job(doc: Any, hook: JobHook, *args) -> bool:
+    """A job hook applied as a doc-level transform: one walk for this rule alone."""
+    return visit_jobs(doc, [(hook, args)])[0]
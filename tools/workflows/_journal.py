@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Mutation journal for the workflow updater (`--journal`, `--fail-fast`).
+
+While a journal is active, `run_plan` snapshots the document around every
+transform and records what the transform actually changed, at the finest
+level the workflow shape allows:
+
+- top-level keys and job keys: set-key / delete-key
+- jobs: add-job / remove-job
+- steps: insert-step / delete-step / update-step, paired by name, id or uses
+
+Each record carries the transform name and before/after fingerprints of the
+touched node. Snapshots use the splice structure (`_splice._structure`), so
+scalar style and comments count and a transform that rebuilds an identical
+step list records nothing.
+
+With fail_fast=True the first transform that records anything raises
+FirstMutation; `--check --fail-fast` uses that to answer "needs update"
+without running the rest of the plan or dumping the document.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+from typing import Any, Iterator
+
+from _splice import _structure
+
+JOURNAL_SCHEMA = 'comparevi/workflow-updater-journal@v1'
+_STEP_KEYS = ('name', 'id', 'uses')
+
+
+class FirstMutation(Exception):
+    """Raised under fail_fast by the first transform that really changes the document."""
+
+
+def _fingerprint(structure: Any) -> str | None:
+    if structure is None:
+        return None
+    return hashlib.sha256(repr(structure).encode('utf-8')).hexdigest()[:16]
+
+
+def _step_identity(step: Any) -> str | None:
+    if isinstance(step, dict):
+        for key in _STEP_KEYS:
+            value = step.get(key)
+            if value is not None:
+                return str(value)
+    return None
+
+
+def _snapshot_job(job: Any) -> tuple[dict, tuple | None]:
+    if not isinstance(job, dict):
+        return {None: _structure(job)}, None
+    keys = {key: _structure(value) for key, value in job.items() if key != 'steps'}
+    steps = job.get('steps')
+    if not isinstance(steps, list):
+        if 'steps' in job:
+            keys['steps'] = _structure(steps)
+        return keys, None
+    return keys, tuple((_step_identity(step), _structure(step)) for step in steps)
+
+
+def _snapshot(doc: Any) -> tuple[dict, dict]:
+    if not isinstance(doc, dict):
+        return {None: _structure(doc)}, {}
+    top = {key: _structure(value) for key, value in doc.items() if key != 'jobs'}
+    jobs = doc.get('jobs')
+    if not isinstance(jobs, dict):
+        if 'jobs' in doc:
+            top['jobs'] = _structure(jobs)
+        return top, {}
+    return top, {name: _snapshot_job(job) for name, job in jobs.items()}
+
+
+class Journal:
+    def __init__(self, doc: Any, fail_fast: bool = False) -> None:
+        self.doc = doc
+        self.fail_fast = fail_fast
+        self.records: list[dict] = []
+
+    def _add(self, transform: str, op: str, job=None, key=None, step=None, before=None, after=None) -> None:
+        record = {'transform': transform, 'op': op, 'job': job}
+        if key is not None:
+            record['key'] = key
+        if step is not None:
+            record['step'] = step
+        record['before'] = _fingerprint(before)
+        record['after'] = _fingerprint(after)
+        self.records.append(record)
+
+    def _keys(self, transform: str, job, before: dict, after: dict) -> None:
+        for key, value in after.items():
+            if key not in before:
+                self._add(transform, 'set-key', job, key, after=value)
+            elif before[key] != value:
+                self._add(transform, 'set-key', job, key, before=before[key], after=value)
+        for key, value in before.items():
+            if key not in after:
+                self._add(transform, 'delete-key', job, key, before=value)
+
+    def _steps(self, transform: str, job, before: tuple, after: tuple) -> None:
+        import difflib
+        matcher = difflib.SequenceMatcher(None, before, after, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            removed = list(before[i1:i2])
+            for identity, structure in after[j1:j2]:
+                pair = next((old for old in removed if identity is not None and old[0] == identity), None)
+                if pair is not None:
+                    removed.remove(pair)
+                    self._add(transform, 'update-step', job, step=identity, before=pair[1], after=structure)
+                else:
+                    self._add(transform, 'insert-step', job, step=identity, after=structure)
+            for identity, structure in removed:
+                self._add(transform, 'delete-step', job, step=identity, before=structure)
+
+    @contextlib.contextmanager
+    def transform(self, name: str) -> Iterator[None]:
+        """Record what the wrapped transform changed; raises FirstMutation under fail_fast."""
+        top_before, jobs_before = _snapshot(self.doc)
+        yield
+        top_after, jobs_after = _snapshot(self.doc)
+        count = len(self.records)
+        self._keys(name, None, top_before, top_after)
+        for job, (keys, steps) in jobs_after.items():
+            if job not in jobs_before:
+                self._add(name, 'add-job', job, after=(keys, steps))
+                continue
+            old_keys, old_steps = jobs_before[job]
+            self._keys(name, job, old_keys, keys)
+            if steps is not None and old_steps is not None:
+                self._steps(name, job, old_steps, steps)
+            elif steps != old_steps:
+                self._keys(name, job, {'steps': old_steps} if old_steps is not None else {},
+                           {'steps': steps} if steps is not None else {})
+        for job, snapshot in jobs_before.items():
+            if job not in jobs_after:
+                self._add(name, 'remove-job', job, before=snapshot)
+        if self.fail_fast and len(self.records) > count:
+            raise FirstMutation(name)
+
+
+_ACTIVE: Journal | None = None
+
+
+@contextlib.contextmanager
+def journaling(doc: Any, fail_fast: bool = False) -> Iterator[Journal]:
+    """Make a Journal over `doc` the one `run_plan` records into."""
+    global _ACTIVE
+    previous = _ACTIVE
+    _ACTIVE = Journal(doc, fail_fast)
+    try:
+        yield _ACTIVE
+    finally:
+        _ACTIVE = previous
+
+
+def active() -> Journal | None:
+    return _ACTIVE
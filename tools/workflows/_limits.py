@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Resource limits for the workflow updater.
+
+Structural limits are checked in-process, before the expensive work they
+protect against: the file size before anything reads the text, nesting depth
+and alias expansion (one C-parser event pass) right before the round-trip
+load. Alias expansion counts the nodes that aliases would materialize, so a
+"billion laughs" document trips it even though its text is tiny.
+
+Memory limits need a process boundary: `_supervisor` runs files in workers
+whose address space it caps at `memory_bytes` (POSIX only), and kills a
+worker when its file overruns `seconds`. Inline runs get the same wall clock
+from a SIGALRM timer (`wall_clock`); where there is none, they are
+supervised instead. A run that sets no `seconds` gets DEFAULT_FILE_SECONDS.
+
+A limit of 0 is off.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, NamedTuple
+
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_MAX_DEPTH = 64
+DEFAULT_MAX_ALIAS_NODES = 10_000
+# Per-file wall clock for runs that did not ask for one.
+DEFAULT_FILE_SECONDS = 120.0
+
+
+class LimitExceeded(ValueError):
+    """A file is over one of the configured resource limits."""
+
+
+class Limits(NamedTuple):
+    max_bytes: int = DEFAULT_MAX_BYTES
+    max_depth: int = DEFAULT_MAX_DEPTH
+    max_alias_nodes: int = DEFAULT_MAX_ALIAS_NODES
+    seconds: float | None = None
+    memory_bytes: int | None = None
+
+    @property
+    def isolated(self) -> bool:
+        """True when the limits can only be enforced from outside the process."""
+        return bool(self.seconds) or bool(self.memory_bytes)
+
+    @property
+    def file_seconds(self) -> float | None:
+        """The per-file wall clock to enforce: `seconds`, DEFAULT_FILE_SECONDS when unset, None when off."""
+        return DEFAULT_FILE_SECONDS if self.seconds is None else self.seconds or None
+
+
+def can_time_inline() -> bool:
+    """True when `wall_clock` can interrupt this thread (SIGALRM, main thread)."""
+    import signal
+    import threading
+    return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def wall_clock(seconds: float) -> Iterator[None]:
+    """Raise LimitExceeded inside the block once it has run `seconds`; see can_time_inline()."""
+    import signal
+
+    def expire(signum, frame):
+        raise LimitExceeded(f'exceeded the {seconds:g}s per-file time limit')
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def check_size(text: str, limits: Limits) -> None:
+    # UTF-8 takes 1-4 bytes per character; only encode when the count is in doubt.
+    if not limits.max_bytes or len(text) * 4 <= limits.max_bytes:
+        return
+    size = len(text.encode('utf-8'))
+    if size > limits.max_bytes:
+        raise LimitExceeded(f'file is {size} bytes; --max-file-bytes is {limits.max_bytes}')
+
+
+@lru_cache(maxsize=None)
+def _event_yaml():
+    from ruamel.yaml import YAML
+    # Events only: the C parser when ruamel.yaml.clib is installed.
+    return YAML(typ='safe', pure=False)
+
+
+def check_well_formed(text: str) -> None:
+    """Raise the parser's error when `text` is not well-formed YAML (one C-parser event pass)."""
+    for _ in _event_yaml().parse(text):
+        pass
+
+
+def check_structure(text: str, limits: Limits) -> None:
+    """Raise LimitExceeded when `text` nests deeper or expands more alias nodes than allowed."""
+    if not limits.max_depth and not limits.max_alias_nodes:
+        return
+    from ruamel.yaml.events import AliasEvent, CollectionEndEvent, CollectionStartEvent, ScalarEvent
+    # One frame per open collection: [anchor, expanded node count]
+    stack: list[list] = []
+    expanded: dict[str, int] = {}
+    alias_nodes = 0
+    for event in _event_yaml().parse(text):
+        if isinstance(event, CollectionStartEvent):
+            stack.append([event.anchor, 1])
+            if limits.max_depth and len(stack) > limits.max_depth:
+                raise LimitExceeded(f'nesting deeper than --max-depth {limits.max_depth}')
+            continue
+        if isinstance(event, CollectionEndEvent):
+            anchor, size = stack.pop()
+        elif isinstance(event, ScalarEvent):
+            anchor, size = event.anchor, 1
+        elif isinstance(event, AliasEvent):
+            anchor, size = None, expanded.get(event.anchor, 1)
+            alias_nodes += size
+            if limits.max_alias_nodes and alias_nodes > limits.max_alias_nodes:
+                raise LimitExceeded(f'aliases expand to more than --max-alias-nodes {limits.max_alias_nodes} nodes')
+        else:
+            continue
+        if anchor:
+            expanded[anchor] = size
+        if stack:
+            stack[-1][1] += size
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Structural (Merkle) digests for loaded workflow documents.
+
+Every map, sequence and scalar gets a 16-byte digest built from its
+children's digests, so two nodes share a digest exactly when they would emit
+the same YAML: keys and their order, values, scalar types (plain, SQS, DQS,
+LIT, ...), flow style, anchors and comment text all count. A plain dict/list
+digests like a block-style Commented* node without comments, matching the
+`_splice` rule that rebuilding a list is not a change by itself.
+
+`digest_document` records the root digest plus one digest per top-level key
+and per job. The engine takes one before the transforms run and, only when a
+transform reports a change, one after: equal roots mean the document came
+back to its loaded shape and no dump is needed; otherwise `changed_jobs`
+names the job blocks that differ without serializing anything.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Any, NamedTuple
+
+_MAP, _SEQ, _SCALAR = b'm', b's', b'v'
+
+
+def _comment_values(comments: Any):
+    # ruamel keeps comments as (nested lists of) CommentToken-like objects.
+    if comments is None:
+        return
+    if isinstance(comments, (list, tuple)):
+        for item in comments:
+            yield from _comment_values(item)
+        return
+    value = getattr(comments, 'value', None)
+    if isinstance(value, str):
+        yield value
+
+
+def _decoration(node: Any) -> bytes:
+    parts = []
+    fa = getattr(node, 'fa', None)
+    if fa is not None and fa.flow_style():
+        parts.append('flow')
+    anchor = getattr(node, 'anchor', None)
+    if anchor is not None and getattr(anchor, 'value', None):
+        parts.append(f'&{anchor.value}')
+    ca = getattr(node, 'ca', None)
+    if ca is not None:
+        parts.extend(_comment_values(ca.comment))
+        for key, tokens in ca.items.items():
+            parts.append(f'#{key!r}')
+            parts.extend(_comment_values(tokens))
+    return '\0'.join(parts).encode('utf-8')
+
+
+def node_digest(node: Any, memo: dict[int, bytes] | None = None) -> bytes:
+    """Digest of `node` and everything below it; `memo` shares work across aliased nodes."""
+    if memo is None:
+        memo = {}
+    is_map = isinstance(node, dict)
+    if not is_map and not isinstance(node, list):
+        return hashlib.blake2b(_SCALAR + f'{type(node).__name__}\0{node!r}'.encode('utf-8'), digest_size=16).digest()
+    cached = memo.get(id(node))
+    if cached is not None:
+        return cached
+    h = hashlib.blake2b(_MAP if is_map else _SEQ, digest_size=16)
+    h.update(_decoration(node))
+    if is_map:
+        for key, value in node.items():
+            h.update(node_digest(key, memo))
+            h.update(node_digest(value, memo))
+    else:
+        for item in node:
+            h.update(node_digest(item, memo))
+    digest = h.digest()
+    memo[id(node)] = digest
+    return digest
+
+
+class DocumentDigest(NamedTuple):
+    root: bytes
+    # (key, digest) per top-level key, in document order; a `jobs` map digests as None
+    top_level: tuple
+    # (job name, digest) per job, in document order; empty when `jobs` is not a map
+    jobs: tuple
+
+
+def digest_document(doc: Any) -> DocumentDigest:
+    """Root, top-level and per-job digests of a loaded workflow."""
+    memo: dict[int, bytes] = {}
+    root = node_digest(doc, memo)
+    if not isinstance(doc, dict):
+        return DocumentDigest(root, (), ())
+    jobs = doc.get('jobs')
+    top_level = tuple(
+        (key, None if key == 'jobs' and isinstance(jobs, dict) else node_digest(value, memo)) for key, value in doc.items()
+    )
+    if not isinstance(jobs, dict):
+        return DocumentDigest(root, top_level, ())
+    return DocumentDigest(root, top_level, tuple((name, node_digest(job, memo)) for name, job in jobs.items()))
+
+
+def changed_jobs(before: DocumentDigest, after: DocumentDigest) -> list[str]:
+    """Jobs added or whose digest moved between two digests of the same document."""
+    old = dict(before.jobs)
+    return [name for name, digest in after.jobs if old.get(name) != digest]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Per-file, per-phase profiling for the workflow updater (`--profile <path>`).
+
+Each file gets a FileProfile whose `phase(name)` context records wall time
+and the tracemalloc peak above the phase's starting allocation. The engine
+records read, prefilter, parse, one `transform:<name>` phase per routed
+transform (with whether it reported a change), dump, compare and write.
+
+tracemalloc slows allocation-heavy code down, so absolute times in a profile
+are inflated; compare phases against each other, not against un-profiled runs.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Iterator
+
+PROFILE_SCHEMA = 'comparevi/workflow-updater-profile@v1'
+
+
+class FileProfile:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.phases: list[dict] = []
+        self.changed: bool | None = None
+        self.error: str | None = None
+        # Text as read, kept for the optional cProfile re-run; not reported.
+        self.source: str | None = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[dict]:
+        record: dict = {'phase': name}
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - started
+            if tracing:
+                record['peakBytes'] = max(0, tracemalloc.get_traced_memory()[1] - base)
+            self.phases.append(record)
+
+    @property
+    def seconds(self) -> float:
+        return sum(record['seconds'] for record in self.phases)
+
+    def to_json(self) -> dict:
+        return {
+            'path': self.path,
+            'changed': self.changed,
+            'error': self.error,
+            'seconds': self.seconds,
+            'phases': self.phases,
+        }
+
+
+@contextlib.contextmanager
+def tracing_allocations() -> Iterator[None]:
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def write_report(path: Path, profiles: list[FileProfile], engine: dict, cprofile: dict | None = None) -> None:
+    report = {
+        'schema': PROFILE_SCHEMA,
+        'python': sys.version.split()[0],
+        'engine': engine,
+        'files': [profile.to_json() for profile in profiles],
+    }
+    if cprofile is not None:
+        report['cprofile'] = cprofile
+    path = Path(path)
+    if path.parent and not path.parent.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Stat/digest state for `workflow_enclave.py --all`.
+
+Records (mtime, size, sha256) for every file the last run found clean. A file
+whose stat matches is skipped without being read; one whose stat moved but
+whose digest still matches is skipped and its stat refreshed. The state is
+tied to an engine key (updater sources + verdict-affecting options), so any
+updater change rescans everything.
+
+Files modified within RACY_WINDOW_NS of being recorded get no trusted mtime,
+the same "racily clean" rule git uses: a later edit inside the same mtime
+tick with the same size would otherwise look unchanged.
+
+Stdlib only: the enclave wrapper uses it from the base interpreter.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from _cache import _atomic_write_text
+
+SCAN_STATE_SCHEMA = 'comparevi/workflow-scan-state@v1'
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+
+def _digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class ScanState:
+    def __init__(self, path: Path, engine_key: str) -> None:
+        self.path = Path(path)
+        self.engine_key = engine_key
+        self.entries: dict[str, dict] = {}
+        try:
+            payload = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if isinstance(payload, dict) and payload.get('schema') == SCAN_STATE_SCHEMA and payload.get('engine') == engine_key:
+            entries = payload.get('entries')
+            if isinstance(entries, dict):
+                self.entries = {key: value for key, value in entries.items() if isinstance(value, dict)}
+
+    def is_clean(self, path: Path, key: str) -> bool:
+        """True when `path` is unchanged since it was last recorded clean."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        if st.st_size != entry.get('size'):
+            return False
+        if entry.get('mtimeNs') is not None and st.st_mtime_ns == entry['mtimeNs']:
+            return True
+        try:
+            if _digest(path) != entry.get('sha256'):
+                return False
+        except OSError:
+            return False
+        entry['mtimeNs'] = self._trusted_mtime(st.st_mtime_ns)
+        return True
+
+    @staticmethod
+    def _trusted_mtime(mtime_ns: int) -> int | None:
+        return None if time.time_ns() - mtime_ns < RACY_WINDOW_NS else mtime_ns
+
+    def record(self, path: Path, key: str) -> None:
+        try:
+            st = path.stat()
+            digest = _digest(path)
+        except OSError:
+            self.forget(key)
+            return
+        self.entries[key] = {'mtimeNs': self._trusted_mtime(st.st_mtime_ns), 'size': st.st_size, 'sha256': digest}
+
+    def forget(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def retain(self, keys) -> None:
+        keep = set(keys)
+        self.entries = {key: value for key, value in self.entries.items() if key in keep}
+
+    def save(self) -> None:
+        payload = {'schema': SCAN_STATE_SCHEMA, 'engine': self.engine_key, 'entries': self.entries}
+        _atomic_write_text(self.path, json.dumps(payload, indent=1, sort_keys=True))
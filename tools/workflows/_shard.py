@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Deterministic sharding of the updater's file scope (`--shard i/n`).
+
+Every CI node resolves the same scope and keeps slice i of n (1-based). The
+split depends only on the file list and its weights, never on input order:
+files are dealt largest-first to the lightest shard (ties go to the lower
+shard, then by path). Weights are file sizes, or the per-file seconds of a
+`--profile` report passed as `--shard-durations`; files the report does not
+cover are weighted by size at the report's seconds-per-byte.
+
+Each shard's `--results` file records its slice and a digest of the whole
+scope; `--merge-results` checks that every slice of one scope is present and
+folds them into one verdict with the exit codes of `main()`.
+
+Stdlib only: the enclave wrapper merges from the base interpreter.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path, PurePath
+
+RESULTS_SCHEMA = 'comparevi/workflow-updater-results@v1'
+
+
+def parse_shard(spec: str) -> tuple[int, int] | None:
+    """(index, count) from 'i/n' with 1 <= i <= n; None when malformed."""
+    index, sep, count = spec.partition('/')
+    if not sep or not index.isdigit() or not count.isdigit():
+        return None
+    i, n = int(index), int(count)
+    return (i, n) if 1 <= i <= n else None
+
+
+def _key(path: str) -> str:
+    return PurePath(path).as_posix()
+
+
+def scope_digest(files: list[str]) -> str:
+    return hashlib.sha256('\n'.join(sorted(_key(f) for f in files)).encode('utf-8')).hexdigest()[:16]
+
+
+def load_durations(path: Path) -> dict[str, float]:
+    """Per-file seconds from a `--profile` report."""
+    report = json.loads(Path(path).read_text(encoding='utf-8'))
+    durations = {}
+    for entry in report.get('files') or ():
+        if isinstance(entry, dict) and isinstance(entry.get('path'), str) and isinstance(entry.get('seconds'), (int, float)):
+            durations[_key(entry['path'])] = float(entry['seconds'])
+    return durations
+
+
+def _size(path: str) -> int:
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return 0
+
+
+def file_weights(files: list[str], durations: dict[str, float] | None = None) -> dict[str, float]:
+    sizes = {f: _size(f) for f in files}
+    if not durations:
+        return {f: float(size) for f, size in sizes.items()}
+    known = [f for f in files if _key(f) in durations]
+    known_bytes = sum(sizes[f] for f in known)
+    per_byte = sum(durations[_key(f)] for f in known) / known_bytes if known_bytes else 0.0
+    return {f: durations[_key(f)] if _key(f) in durations else sizes[f] * per_byte for f in files}
+
+
+def shard_files(files: list[str], index: int, count: int, weights: dict[str, float]) -> list[str]:
+    """Slice `index` of `count` (1-based), in the order `files` were given."""
+    loads = [0.0] * count
+    assigned: dict[str, int] = {}
+    for f in sorted(files, key=lambda f: (-weights.get(f, 0.0), _key(f))):
+        shard = min(range(count), key=lambda s: (loads[s], s))
+        assigned[f] = shard
+        loads[shard] += weights.get(f, 0.0)
+    return [f for f in files if assigned[f] == index - 1]
+
+
+def select_shard(files: list[str], spec: str, durations_path: str | None = None) -> tuple[list[str], dict]:
+    """This node's slice of `files` for `--shard spec` plus its results record; ValueError on bad input."""
+    shard = parse_shard(spec)
+    if shard is None:
+        raise ValueError(f'Invalid --shard value: {spec!r} (expected i/n with 1 <= i <= n)')
+    durations = None
+    if durations_path:
+        try:
+            durations = load_durations(Path(durations_path))
+        except (OSError, ValueError, AttributeError) as exc:
+            raise ValueError(f'Unreadable --shard-durations report: {exc}') from None
+    kept = shard_files(files, shard[0], shard[1], file_weights(files, durations))
+    return kept, {'index': shard[0], 'count': shard[1], 'scope': scope_digest(files)}
+
+
+def write_results(path: Path, statuses: dict[str, str], shard: dict | None = None) -> None:
+    payload = {'schema': RESULTS_SCHEMA, 'files': statuses}
+    if shard is not None:
+        payload['shard'] = shard
+    Path(path).write_text(json.dumps(payload, indent=1, sort_keys=True) + '\n', encoding='utf-8')
+
+
+def merge_results(paths: list[Path]) -> tuple[dict[str, str], list[str]]:
+    """Fold per-shard `--results` files into (statuses, problems)."""
+    statuses: dict[str, str] = {}
+    problems: list[str] = []
+    seen: dict[int, Path] = {}
+    counts, scopes = set(), set()
+    for path in paths:
+        try:
+            payload = json.loads(Path(path).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as exc:
+            problems.append(f'{path}: unreadable results ({exc})')
+            continue
+        if not isinstance(payload, dict) or payload.get('schema') != RESULTS_SCHEMA:
+            problems.append(f'{path}: not a {RESULTS_SCHEMA} file')
+            continue
+        shard = payload.get('shard')
+        if isinstance(shard, dict):
+            if shard.get('index') in seen:
+                problems.append(f"{path}: shard {shard.get('index')} already merged from {seen[shard['index']]}")
+                continue
+            seen[shard.get('index')] = path
+            counts.add(shard.get('count'))
+            scopes.add(shard.get('scope'))
+        statuses.update(payload.get('files') or {})
+    if seen:
+        if len(counts) > 1 or len(scopes) > 1:
+            problems.append('shards come from different scopes or shard counts')
+        else:
+            (count,) = counts
+            missing = [str(i) for i in range(1, (count if isinstance(count, int) else 0) + 1) if i not in seen]
+            if missing:
+                problems.append(f"missing shard(s) {', '.join(missing)} of {count}")
+    return statuses, problems
+
+
+def run_merge(paths: list[Path], out: Path | None = None) -> int:
+    """Print the merged verdict, optionally write it as one results file; exit code as in `main()`."""
+    statuses, problems = merge_results(paths)
+    for f, status in sorted(statuses.items()):
+        if status == 'error':
+            print(f'::error::Failed to process {f}')
+        elif status == 'needs-update':
+            print(f'NEEDS UPDATE: {f}')
+    for problem in problems:
+        print(f'::error::{problem}')
+    tally = {status: sum(1 for s in statuses.values() if s == status) for status in sorted(set(statuses.values()))}
+    print(f"merged {len(paths)} result file(s): {len(statuses)} files ({', '.join(f'{n} {s}' for s, n in tally.items()) or 'none'})")
+    if out is not None:
+        write_results(out, statuses)
+    if problems or 'error' in tally:
+        return 4
+    if 'needs-update' in tally:
+        return 3
+    return 0
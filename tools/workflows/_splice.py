@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Job-scoped partial round-trip for the workflow updater (`--splice`).
+
+Before the transforms run, `snapshot_jobs` records the `_merkle` digest of
+every top-level key and every job. Afterwards `splice_changed_jobs` compares
+against it and, when only existing jobs changed, re-emits just those job
+blocks and splices them into the original text over the job's line range
+(job key line up to the next job key, the next top-level key, or EOF).
+Untouched regions are kept byte for byte. The re-emitted blocks use the
+indentation read off the original job blocks, and the spliced text must load
+back to the transformed document before it is returned.
+
+Anything else -- a changed top-level key, jobs added/removed/reordered, a
+flow-style jobs map, missing line info, an indentation that cannot be read
+or reproduced -- returns None and the caller falls back to a full dump.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable
+
+from _merkle import DocumentDigest, changed_jobs, digest_document
+
+
+def _container_style(node: Any) -> tuple[bool, bool]:
+    # A plain dict/list emits like a block-style Commented* node without
+    # comments, so transforms that rebuild a steps list are not changes by
+    # themselves; dropping comments or flow style is.
+    fa = getattr(node, 'fa', None)
+    ca = getattr(node, 'ca', None)
+    flow = bool(fa.flow_style()) if fa is not None else False
+    commented = bool(ca.items or ca.comment) if ca is not None else False
+    return flow, commented
+
+
+def _structure(node: Any) -> tuple:
+    # Scalar types are part of the snapshot: swapping a plain string for a
+    # quoted one changes the emitted text just like a new value.
+    if isinstance(node, dict):
+        return ('map', _container_style(node), tuple((key, _structure(value)) for key, value in node.items()))
+    if isinstance(node, list):
+        return ('seq', _container_style(node), tuple(_structure(item) for item in node))
+    return (type(node).__name__, node)
+
+
+def _block_style_map(node: Any) -> bool:
+    # Only round-trip maps carry the line info splicing needs.
+    return hasattr(node, 'lc') and hasattr(node, 'fa') and isinstance(node, dict) and not node.fa.flow_style()
+
+
+def snapshot_jobs(doc: Any) -> DocumentDigest | None:
+    """Digests of `doc` for splice_changed_jobs; None when splicing cannot apply."""
+    if not _block_style_map(doc) or not _block_style_map(doc.get('jobs')):
+        return None
+    return digest_document(doc)
+
+
+# ruamel's emitter defaults: (mapping, sequence, offset)
+_DEFAULT_INDENT = (2, 2, 0)
+_BLOCK_KEY = re.compile(r'^( *)[^\s#-][^#]*:[ \t]*(?:#.*)?$')
+_SEQUENCE_ITEM = re.compile(r'^( *)(-[ \t]+)\S')
+
+
+def _detect_indent(lines: list[str], bounds: list[tuple[int, int]]) -> tuple[int, int, int] | None:
+    """(mapping, sequence, offset) the job blocks in `bounds` are written with; None when they disagree."""
+    mappings = {len(lines[start]) - len(lines[start].lstrip(' ')) for start, _ in bounds}
+    if len(mappings) != 1 or 0 in mappings:
+        return None
+    mapping = mappings.pop()
+    sequences = set()
+    for start, stop in bounds:
+        parent = None
+        for line in lines[start:stop]:
+            item = _SEQUENCE_ITEM.match(line)
+            if item is not None and parent is not None:
+                sequences.add((len(item.group(1)) + len(item.group(2)) - parent, len(item.group(1)) - parent))
+            key = _BLOCK_KEY.match(line.rstrip('\r\n'))
+            parent = len(key.group(1)) if key is not None else None
+    if len(sequences) > 1:
+        return None
+    # Without a block sequence to go by, indent items under their key like the maps.
+    sequence, offset = sequences.pop() if sequences else (mapping, max(0, mapping - 2))
+    if offset < 0 or sequence < offset + 2:
+        return None
+    return mapping, sequence, offset
+
+
+def _emit_job(jobs: Any, name: str, dump: Callable[..., str], indent: tuple[int, int, int]) -> str:
+    from ruamel.yaml.comments import CommentedMap
+    holder = CommentedMap()
+    inner = CommentedMap()
+    inner[name] = jobs[name]
+    if name in jobs.ca.items:
+        inner.ca.items[name] = jobs.ca.items[name]
+    holder['jobs'] = inner
+    emitted = dump(holder) if indent == _DEFAULT_INDENT else dump(holder, indent)
+    # Drop the synthetic 'jobs:' line; what remains is the job block at its
+    # original indentation with the same emitter settings as a full dump.
+    return emitted.split('\n', 1)[1]
+
+
+def splice_changed_jobs(
+    doc: Any, orig: str, before: DocumentDigest, dump: Callable[..., str], after: DocumentDigest | None = None
+) -> str | None:
+    """Re-emit only the changed job blocks into `orig`; None when a full dump is required.
+
+    `dump(node, indent=None)` emits with the given (mapping, sequence,
+    offset). `after` is the post-transform digest when the caller already
+    has one.
+    """
+    if not _block_style_map(doc) or not _block_style_map(doc.get('jobs')):
+        return None
+    if after is None:
+        after = digest_document(doc)
+    if after.top_level != before.top_level:
+        return None
+    if [name for name, _ in after.jobs] != [name for name, _ in before.jobs]:
+        return None
+    changed_names = set(changed_jobs(before, after))
+    if not changed_names:
+        return orig
+    jobs = doc['jobs']
+    lines = orig.splitlines(keepends=True)
+    try:
+        starts = [jobs.lc.key(name)[0] for name in jobs]
+        top_keys = list(doc)
+        jobs_pos = top_keys.index('jobs')
+        end = doc.lc.key(top_keys[jobs_pos + 1])[0] if jobs_pos + 1 < len(top_keys) else len(lines)
+    except (AttributeError, KeyError, TypeError):
+        return None
+    bounds = list(zip(starts, [*starts[1:], end]))
+    if any(not (0 <= start < stop <= len(lines)) for start, stop in bounds):
+        return None
+    indent = _detect_indent(lines, bounds)
+    if indent is None:
+        return None
+    ranges = dict(zip(jobs, bounds))
+    pieces: list[str] = []
+    cursor = 0
+    for name in jobs:
+        if name not in changed_names:
+            continue
+        start, stop = ranges[name]
+        pieces.extend(lines[cursor:start])
+        pieces.append(_emit_job(jobs, name, dump, indent))
+        cursor = stop
+    pieces.extend(lines[cursor:])
+    spliced = ''.join(pieces)
+    from _fast_check import load_plain
+    try:
+        same = load_plain(spliced) == doc
+    except Exception:
+        same = False
+    # A block that does not nest where the original did would silently move keys.
+    return spliced if same else None
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+JSON-lines batch protocol for `update_workflows.py --stdio`.
+
+One process, one warm ruamel engine, any number of requests: each stdin line
+is a JSON object and produces exactly one stdout line, in order, flushed as
+soon as it is ready. The first stdout line is a header naming the schema and
+engine so a client can tell which updater answered.
+
+  {"path": "...", "text": "...", "mode": "check"}
+      -> {"path": "...", "changed": false, "text": "...", "error": null, "durationMs": 1.2}
+
+- `path` routes the transforms (by file name) and labels diffs; it is only
+  read when `text` is omitted and only written in `write` mode.
+- `mode` is `check` (default), `diff` (adds `diff`) or `write` (adds
+  `written`, false when the file already held the result).
+- `id`, when present, is echoed back unchanged.
+
+A malformed or failing request gets an `error` and the stream continues;
+EOF ends the session with exit code 0.
+"""
+from __future__ import annotations
+
+import json
+import time
+from typing import Callable, IO
+
+STDIO_SCHEMA = 'comparevi/workflow-updater-stdio@v1'
+STDIO_MODES = ('check', 'diff', 'write')
+
+
+def _decode(line: str) -> dict:
+    try:
+        request = json.loads(line)
+    except ValueError as exc:
+        raise ValueError(f'invalid JSON request: {exc}') from None
+    if not isinstance(request, dict):
+        raise ValueError('request must be a JSON object')
+    return request
+
+
+def _validate(request: dict) -> dict:
+    if not isinstance(request.get('path'), str) or not request['path']:
+        raise ValueError('request needs a non-empty string "path"')
+    if 'text' in request and not isinstance(request['text'], str):
+        raise ValueError('"text" must be a string when given')
+    if request.setdefault('mode', 'check') not in STDIO_MODES:
+        raise ValueError(f"unknown mode {request['mode']!r} (expected one of {', '.join(STDIO_MODES)})")
+    return request
+
+
+def serve(stdin: IO[str], stdout: IO[str], header: dict, handle: Callable[[dict], dict]) -> int:
+    """Answer each request line on `stdin` with `handle(request)` until EOF."""
+    stdout.write(json.dumps({'schema': STDIO_SCHEMA, **header}) + '\n')
+    stdout.flush()
+    for line in stdin:
+        if not line.strip():
+            continue
+        started = time.perf_counter()
+        response: dict = {'path': None, 'changed': False, 'text': None, 'error': None}
+        try:
+            request = _decode(line)
+            if 'id' in request:
+                response['id'] = request['id']
+            if isinstance(request.get('path'), str):
+                response['path'] = request['path']
+            response.update(handle(_validate(request)))
+        except Exception as exc:
+            response['error'] = str(exc)
+        response['durationMs'] = round((time.perf_counter() - started) * 1000, 3)
+        stdout.write(json.dumps(response) + '\n')
+        stdout.flush()
+    return 0
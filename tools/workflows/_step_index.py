@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Per-document step index for the workflow transforms.
+
+Transforms look steps up by name, id or `uses` reference. Instead of scanning
+every job's steps once per transform, the engine indexes each steps list once
+per document and the helpers in `_update_workflows_impl` query the index.
+Mutations made through the helpers (insert/delete/replace/refresh) update the
+index in place, so positions stay correct without a rebuild.
+
+Outside an `indexed(doc)` block (e.g. unit tests calling a transform directly)
+`index_for` builds a throwaway index per query, which costs more than the old
+early-exit linear scans; `benchmarks/bench_step_index.py` compares all three.
+"""
+from __future__ import annotations
+
+import contextlib
+from typing import Callable, Iterator
+
+_FIELDS = ('name', 'id', 'uses')
+
+
+def _step_keys(step: object) -> tuple[str | None, str | None, str | None]:
+    if not isinstance(step, dict):
+        return None, None, None
+    keys = []
+    for field in _FIELDS:
+        value = step.get(field)
+        keys.append(None if value is None else str(value))
+    return keys[0], keys[1], keys[2]
+
+
+class StepIndex:
+    """Positions of the steps in one steps list, keyed by name, id and uses."""
+
+    def __init__(self, steps: list) -> None:
+        self.steps = steps
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._keys = [_step_keys(step) for step in self.steps]
+        self._maps: tuple[dict[str, list[int]], ...] = ({}, {}, {})
+        for pos, keys in enumerate(self._keys):
+            self._add(pos, keys)
+
+    def _add(self, pos: int, keys: tuple) -> None:
+        for field_map, key in zip(self._maps, keys):
+            if key is None:
+                continue
+            positions = field_map.setdefault(key, [])
+            positions.append(pos)
+            positions.sort()
+
+    def _remove(self, pos: int, keys: tuple) -> None:
+        for field_map, key in zip(self._maps, keys):
+            if key is None:
+                continue
+            positions = field_map.get(key)
+            if positions is None:
+                continue
+            positions.remove(pos)
+            if not positions:
+                del field_map[key]
+
+    def _shift(self, start: int, delta: int) -> None:
+        for field_map in self._maps:
+            for positions in field_map.values():
+                for i, pos in enumerate(positions):
+                    if pos >= start:
+                        positions[i] = pos + delta
+
+    def _check(self) -> None:
+        # Direct list edits that bypass the index show up as a length change.
+        if len(self._keys) != len(self.steps):
+            self._rebuild()
+
+    def positions(self, field: str, value: str) -> list[int]:
+        self._check()
+        return list(self._maps[_FIELDS.index(field)].get(value, ()))
+
+    def first(self, field: str, value: str) -> int | None:
+        self._check()
+        positions = self._maps[_FIELDS.index(field)].get(value)
+        return positions[0] if positions else None
+
+    def first_matching(self, field: str, predicate: Callable[[str], bool]) -> int | None:
+        """First position whose field value satisfies predicate (scans distinct values only)."""
+        self._check()
+        best = None
+        for value, positions in self._maps[_FIELDS.index(field)].items():
+            if (best is None or positions[0] < best) and predicate(value):
+                best = positions[0]
+        return best
+
+    def has(self, field: str, value: str) -> bool:
+        return self.first(field, value) is not None
+
+    def insert(self, pos: int, step: object) -> None:
+        self._check()
+        pos = max(0, min(pos, len(self.steps)))
+        self.steps.insert(pos, step)
+        self._shift(pos, 1)
+        keys = _step_keys(step)
+        self._keys.insert(pos, keys)
+        self._add(pos, keys)
+
+    def delete(self, pos: int) -> None:
+        self._check()
+        del self.steps[pos]
+        self._remove(pos, self._keys.pop(pos))
+        self._shift(pos + 1, -1)
+
+    def replace(self, pos: int, step: object) -> None:
+        self._check()
+        self.steps[pos] = step
+        self.refresh(pos)
+
+    def refresh(self, pos: int) -> None:
+        """Re-read name/id/uses of the step at pos after an in-place field edit."""
+        self._check()
+        self._remove(pos, self._keys[pos])
+        keys = _step_keys(self.steps[pos])
+        self._keys[pos] = keys
+        self._add(pos, keys)
+
+
+class DocIndex:
+    """StepIndex per steps list of one document, built once up front."""
+
+    def __init__(self, doc: object) -> None:
+        self._by_list: dict[int, StepIndex] = {}
+        jobs = doc.get('jobs') if isinstance(doc, dict) else None
+        if isinstance(jobs, dict):
+            for job in jobs.values():
+                steps = job.get('steps') if isinstance(job, dict) else None
+                if isinstance(steps, list):
+                    self.get(steps)
+
+    def get(self, steps: list) -> StepIndex:
+        # Keyed by identity; the StepIndex holds a reference to the list, so
+        # the id cannot be recycled while the entry exists.
+        index = self._by_list.get(id(steps))
+        if index is None or index.steps is not steps:
+            index = StepIndex(steps)
+            self._by_list[id(steps)] = index
+        return index
+
+
+_ACTIVE: DocIndex | None = None
+
+
+@contextlib.contextmanager
+def indexed(doc: object) -> Iterator[DocIndex]:
+    """Make `doc`'s step index the one `index_for` answers from."""
+    global _ACTIVE
+    previous = _ACTIVE
+    _ACTIVE = DocIndex(doc)
+    try:
+        yield _ACTIVE
+    finally:
+        _ACTIVE = previous
+
+
+def index_for(steps: list) -> StepIndex:
+    if _ACTIVE is not None:
+        return _ACTIVE.get(steps)
+    return StepIndex(steps)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Interned canonical step templates for the workflow transforms.
+
+A StepTemplate freezes a canonical step once per process. Transforms compare
+existing steps against it field by field (`field_matches`, backed by a
+precomputed per-field fingerprint) and only materialize fresh nodes -- `build()`
+for a whole step, `node()` for one field -- when a step is actually inserted or
+a field rewritten. `emits_same` is the strict, style-aware check for
+transforms that would otherwise replace a step wholesale.
+
+Scalar styles (LiteralScalarString, SingleQuotedScalarString, ...) are kept
+by class, so this module does not import ruamel itself.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, TypeVar
+
+_MISSING = object()
+
+
+def _spec(value: Any) -> tuple:
+    """Order- and style-preserving frozen form used to rebuild nodes."""
+    if isinstance(value, dict):
+        return ('map', tuple((key, _spec(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return ('seq', tuple(_spec(item) for item in value))
+    if isinstance(value, str) and type(value) is not str:
+        return ('styled', type(value), str(value))
+    return ('scalar', value)
+
+
+def _build(spec: tuple) -> Any:
+    kind = spec[0]
+    if kind == 'map':
+        return {key: _build(item) for key, item in spec[1]}
+    if kind == 'seq':
+        return [_build(item) for item in spec[1]]
+    if kind == 'styled':
+        return spec[1](spec[2])
+    return spec[1]
+
+
+def _plain(value: Any) -> Any:
+    """Hashable comparison form: style-blind, and mapping order is ignored like dict ==."""
+    if isinstance(value, dict):
+        return ('map', frozenset((key, _plain(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return ('seq', tuple(_plain(item) for item in value))
+    if isinstance(value, str):
+        return str(value)
+    return value
+
+
+def decorated(node: Any) -> bool:
+    """True when a loaded node carries comments, flow style or an anchor (duck-typed ruamel attributes).
+
+    Plain-loaded nodes (`_fast_check`) answer through their `decoration` flag.
+    """
+    if getattr(node, 'decoration', False):
+        return True
+    ca = getattr(node, 'ca', None)
+    if ca is not None and (ca.items or ca.comment):
+        return True
+    fa = getattr(node, 'fa', None)
+    if fa is not None and fa.flow_style():
+        return True
+    return getattr(getattr(node, 'anchor', None), 'value', None) is not None
+
+
+def _same_emission(value: Any, spec: tuple) -> bool:
+    if decorated(value):
+        return False
+    kind = spec[0]
+    if kind == 'map':
+        return (isinstance(value, dict) and list(value) == [key for key, _ in spec[1]]
+                and all(_same_emission(value[key], item) for key, item in spec[1]))
+    if kind == 'seq':
+        return isinstance(value, list) and len(value) == len(spec[1]) and all(map(_same_emission, value, spec[1]))
+    if kind == 'styled':
+        return type(value) is spec[1] and value == spec[2]
+    return type(value) is type(spec[1]) and value == spec[1]
+
+
+class StepTemplate:
+    """Immutable canonical step; compare with field_matches, materialize with build()/node()."""
+
+    __slots__ = ('name', '_specs', '_plain', '_fingerprints', 'fingerprint')
+
+    def __init__(self, step: dict) -> None:
+        self.name = step.get('name')
+        self._specs = {key: _spec(value) for key, value in step.items()}
+        self._plain = {key: _plain(value) for key, value in step.items()}
+        self._fingerprints = {key: hash(value) for key, value in self._plain.items()}
+        self.fingerprint = hash(frozenset(self._plain.items()))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._specs
+
+    def keys(self):
+        return self._specs.keys()
+
+    def field_matches(self, step: dict, key: str) -> bool:
+        """True when step[key] equals the canonical value (same semantics as ==)."""
+        want = self._plain[key]
+        value = step.get(key, _MISSING) if isinstance(step, dict) else _MISSING
+        if value is _MISSING:
+            return False
+        if isinstance(value, str):
+            # str caches its hash, so repeated checks of the same document
+            # scalar across transforms reject mismatches without a full compare.
+            return isinstance(want, str) and len(value) == len(want) and hash(value) == self._fingerprints[key] and value == want
+        return hash(_plain(value)) == self._fingerprints[key] and _plain(value) == want
+
+    def emits_same(self, step: Any) -> bool:
+        """True when `step` would emit exactly like build(): same key order, scalar styles, no comments."""
+        return (not decorated(step) and isinstance(step, dict) and list(step) == list(self._specs)
+                and all(_same_emission(step[key], spec) for key, spec in self._specs.items()))
+
+    def node(self, key: str) -> Any:
+        """Fresh node for one field, safe to attach to a document."""
+        return _build(self._specs[key])
+
+    def build(self) -> dict:
+        """Fresh step dict, safe to insert into a document."""
+        return {key: _build(spec) for key, spec in self._specs.items()}
+
+
+_F = TypeVar('_F', bound=Callable[..., dict])
+
+
+def interned(factory: _F) -> Callable[..., StepTemplate]:
+    """Turn a step factory into a per-process cache of StepTemplates keyed by its arguments."""
+    @lru_cache(maxsize=None)
+    def template(*args: Any) -> StepTemplate:
+        return StepTemplate(factory(*args))
+    template.__name__ = factory.__name__
+    template.__doc__ = factory.__doc__
+    template.__wrapped__ = factory
+    return template
+
+
+def materialize(step: dict | StepTemplate) -> dict:
+    return step.build() if isinstance(step, StepTemplate) else step
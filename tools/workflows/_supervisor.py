@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Supervised worker pool for the updater's pooled runs.
+
+Unlike ProcessPoolExecutor, the supervisor owns its workers: each one runs a
+single task at a time over a pipe, so a task that overruns its wall-clock
+budget is ended by killing exactly that worker, and a worker that dies
+(killed by the OS, over its memory cap) fails only the task it was running.
+Either way the task's result comes from `on_failure` and a fresh worker
+takes the slot. A worker that is not ready within `start_seconds` (a hung
+interpreter start or initializer) is killed like one that died starting.
+Workers are also recycled after `max_tasks` tasks to cap resident memory.
+
+Results are yielded in input order, like `Executor.map`.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator
+
+# Spawning a worker and running its initializer; generous for a loaded CI host.
+DEFAULT_START_SECONDS = 60.0
+
+
+def _limit_memory(memory_bytes: int) -> None:
+    try:
+        import resource
+    except ImportError:
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def _worker_main(conn, func: Callable, initializer: Callable | None, memory_bytes: int | None) -> None:
+    if memory_bytes:
+        _limit_memory(memory_bytes)
+    if initializer is not None:
+        initializer()
+    conn.send(('ready', None))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        conn.send(('done', func(*task)))
+
+
+class _Worker:
+    def __init__(self, context, func: Callable, initializer: Callable | None, memory_bytes: int | None,
+                 start_seconds: float | None) -> None:
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, func, initializer, memory_bytes), daemon=True)
+        self.process.start()
+        child.close()
+        self.ready = False
+        self.task: int | None = None
+        # Until 'ready' arrives, the deadline is the startup one.
+        self.deadline: float | None = time.monotonic() + start_seconds if start_seconds else None
+        self.completed = 0
+
+    def submit(self, index: int, args: tuple, seconds: float | None) -> None:
+        self.task = index
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.conn.send(args)
+
+    def stop(self, kill: bool = False) -> None:
+        if not kill:
+            try:
+                self.conn.send(None)
+            except OSError:
+                kill = True
+            else:
+                self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def supervised_map(
+    func: Callable,
+    tasks: Iterable[tuple],
+    workers: int,
+    on_failure: Callable[[tuple, str], Any],
+    initializer: Callable | None = None,
+    seconds: float | None = None,
+    memory_bytes: int | None = None,
+    max_tasks: int | None = None,
+    start_seconds: float | None = DEFAULT_START_SECONDS,
+) -> Iterator[Any]:
+    """Yield func(*task) per task, in order; overruns and worker deaths yield on_failure(task, reason)."""
+    tasks = list(tasks)
+    context = multiprocessing.get_context('spawn')
+    pending = deque(range(len(tasks)))
+    results: dict[int, Any] = {}
+    pool: list[_Worker] = []
+    emitted = 0
+
+    def fail_pending(reason: str) -> None:
+        # A worker that cannot start will not start on retry either.
+        while pending:
+            index = pending.popleft()
+            results[index] = on_failure(tasks[index], reason)
+
+    try:
+        while emitted < len(tasks):
+            if emitted in results:
+                yield results.pop(emitted)
+                emitted += 1
+                continue
+            while pending and len(pool) < max(1, workers):
+                pool.append(_Worker(context, func, initializer, memory_bytes, start_seconds))
+            for worker in pool:
+                if worker.ready and worker.task is None and pending:
+                    index = pending.popleft()
+                    worker.submit(index, tasks[index], seconds)
+            deadlines = [worker.deadline for worker in pool if worker.deadline is not None]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait([worker.conn for worker in pool], timeout)
+            for worker in list(pool):
+                if worker.conn in ready:
+                    try:
+                        kind, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        pool.remove(worker)
+                        worker.stop(kill=True)
+                        reason = f'worker exited with code {worker.process.exitcode}'
+                        if worker.task is not None:
+                            results[worker.task] = on_failure(tasks[worker.task], reason)
+                        elif not worker.ready:
+                            fail_pending(f'{reason} while starting')
+                        continue
+                    if kind == 'ready':
+                        worker.ready = True
+                        worker.deadline = None
+                        continue
+                    results[worker.task] = value
+                    worker.task = worker.deadline = None
+                    worker.completed += 1
+                    if max_tasks and worker.completed >= max_tasks:
+                        pool.remove(worker)
+                        worker.stop()
+                elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                    pool.remove(worker)
+                    worker.stop(kill=True)
+                    if not worker.ready:
+                        fail_pending(f'worker did not start within {start_seconds:g}s')
+                    else:
+                        results[worker.task] = on_failure(tasks[worker.task], f'exceeded the {seconds:g}s per-file time limit')
+    finally:
+        for worker in pool:
+            worker.stop(kill=worker.task is not None)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+fixture-drift.yml long-wire transforms for the validate-windows job.
+
+Loaded lazily by the transform registry in `_update_workflows_impl`.
+"""
+from __future__ import annotations
+
+from _step_index import index_for
+from _step_templates import interned
+from _update_workflows_impl import (
+    DQS,
+    LIT,
+    SQS,
+    _find_step_uses_index,
+    _has_step_named,
+    _insert_after,
+    _insert_before,
+    _insert_step,
+)
+
+
+def _ensure_job_concurrency(doc, job_key: str, group: str, cancel_in_progress: bool) -> bool:
+    changed = False
+    jobs = doc.get('jobs') or {}
+    job = jobs.get(job_key)
+    if not isinstance(job, dict):
+        return changed
+    want = {
+        'group': group,
+        'cancel-in-progress': cancel_in_progress,
+    }
+    cur = job.get('concurrency')
+    if cur != want:
+        job['concurrency'] = want
+        changed = True
+    return changed
+
+
+@interned
+def _mk_wire_probe_step(phase: str, results_dir: str = 'results/fixture-drift') -> dict:
+    return {
+        'name': f'Wire Probe ({phase})',
+        'uses': './.github/actions/wire-probe',
+        'with': {
+            'phase': phase,
+            'results-dir': results_dir,
+        },
+    }
+
+
+@interned
+def _mk_lv_guard_pre_step() -> dict:
+    return {
+        'name': 'LV Guard (pre)',
+        'uses': './.github/actions/runner-unblock-guard',
+        'with': {
+            'snapshot-path': 'results/fixture-drift/lv-guard-pre.json',
+            'cleanup': DQS("${{ env.CLEAN_LV_BEFORE == 'true' }}"),
+            'process-names': 'LVCompare,LabVIEW',
+        },
+    }
+
+
+@interned
+def _mk_wire_guard_pre_step() -> dict:
+    return {
+        'name': 'Wire Guard (pre)',
+        'uses': './.github/actions/wire-guard-pre',
+        'with': {
+            'results-dir': 'results/fixture-drift',
+        },
+    }
+
+
+@interned
+def _mk_wire_guard_post_step() -> dict:
+    return {
+        'name': 'Wire Guard (post)',
+        'uses': './.github/actions/wire-guard-post',
+        'with': {
+            'results-dir': 'results/fixture-drift',
+        },
+    }
+
+
+@interned
+def _mk_warmup_step() -> dict:
+    return {
+        'name': 'LabVIEW warmup (best-effort)',
+        'shell': 'pwsh',
+        'run': LIT('pwsh -File tools/Warmup-LabVIEWRuntime.ps1\n'),
+    }
+
+
+@interned
+def _mk_wire_invoker_start_step() -> dict:
+    return {
+        'name': 'Wire Invoker (start)',
+        'uses': './.github/actions/wire-invoker-start',
+        'with': {
+            'results-dir': 'results/fixture-drift',
+        },
+    }
+
+
+@interned
+def _mk_wire_invoker_stop_step() -> dict:
+    return {
+        'name': 'Wire Invoker (stop)',
+        'uses': './.github/actions/wire-invoker-stop',
+        'with': {
+            'results-dir': 'results/fixture-drift',
+        },
+    }
+
+
+@interned
+def _mk_wire_session_index_step() -> dict:
+    return {
+        'name': 'Wire Session Index (S1)',
+        'if': SQS('${{ always() }}'),
+        'uses': './.github/actions/wire-session-index',
+        'with': {
+            'results-dir': 'results/fixture-drift',
+        },
+    }
+
+
+def _insert_step_relative(steps: list, anchor_name: str, new_step: dict, where: str = 'after') -> bool:
+    """Insert new_step relative to the first step with name==anchor_name.
+    where: 'before' or 'after'
+    """
+    if where == 'before':
+        return _insert_before(steps, anchor_name, new_step)
+    return _insert_after(steps, anchor_name, new_step)
+
+
+def ensure_long_wire_fixture_drift_windows(doc) -> bool:
+    changed = False
+    jobs = doc.get('jobs') or {}
+    job = jobs.get('validate-windows')
+    if not isinstance(job, dict):
+        return changed
+    # job-level serialization
+    c0 = _ensure_job_concurrency(doc, 'validate-windows', 'lv-fixture-win', False)
+    changed = changed or c0
+    steps = job.setdefault('steps', [])
+
+    # Ensure J1 before checkout and J2 after checkout
+    checkout_idx = _find_step_uses_index(steps, 'actions/checkout@')
+    if checkout_idx is not None:
+        # J1
+        if not _has_step_named(steps, 'Wire Probe (J1)'):
+            _insert_step(steps, checkout_idx, _mk_wire_probe_step('J1'))
+            changed = True
+            checkout_idx += 1  # shift due to insertion
+        # J2
+        if not _has_step_named(steps, 'Wire Probe (J2)'):
+            _insert_step(steps, checkout_idx + 1, _mk_wire_probe_step('J2'))
+            changed = True
+
+    # After docs-only detection: LV Guard (pre), Wire Guard (pre), Warmup, Wire Invoker (start)
+    anchor = 'Detect docs-only change'
+    if not _has_step_named(steps, 'LV Guard (pre)'):
+        if _insert_step_relative(steps, anchor, _mk_lv_guard_pre_step(), 'after'):
+            changed = True
+    if not _has_step_named(steps, 'Wire Guard (pre)'):
+        if _insert_step_relative(steps, anchor, _mk_wire_guard_pre_step(), 'after'):
+            changed = True
+    if not _has_step_named(steps, 'LabVIEW warmup (best-effort)'):
+        if _insert_step_relative(steps, anchor, _mk_warmup_step(), 'after'):
+            changed = True
+    if not _has_step_named(steps, 'Wire Invoker (start)'):
+        if _insert_step_relative(steps, anchor, _mk_wire_invoker_start_step(), 'after'):
+            changed = True
+
+    # C1 before orchestrator, C2 after orchestrator
+    if not _has_step_named(steps, 'Wire Probe (C1)'):
+        if _insert_step_relative(steps, 'Fixture Drift Orchestrator', _mk_wire_probe_step('C1'), 'before'):
+            changed = True
+    if not _has_step_named(steps, 'Wire Probe (C2)'):
+        if _insert_step_relative(steps, 'Fixture Drift Orchestrator', _mk_wire_probe_step('C2'), 'after'):
+            changed = True
+
+    # After Verify fixture step: C3 and V1
+    ver_name = 'Verify fixture vs LVCompare (notice-only)'
+    if not _has_step_named(steps, 'Wire Probe (C3)'):
+        if _insert_step_relative(steps, ver_name, _mk_wire_probe_step('C3'), 'after'):
+            changed = True
+    if not _has_step_named(steps, 'Wire Probe (V1)'):
+        if _insert_step_relative(steps, ver_name, _mk_wire_probe_step('V1'), 'after'):
+            changed = True
+
+    # Ensure wire session index S1 before session-index-post
+    if not index_for(steps).has('uses', './.github/actions/wire-session-index'):
+        # Insert before Session index post (best-effort)
+        if _insert_step_relative(steps, 'Session index post (best-effort)', _mk_wire_session_index_step(), 'before'):
+            changed = True
+
+    # After Runner Unblock Guard, add Wire Invoker (stop)
+    if not _has_step_named(steps, 'Wire Invoker (stop)'):
+        if _insert_step_relative(steps, 'Runner Unblock Guard', _mk_wire_invoker_stop_step(), 'after'):
+            changed = True
+
+    # After Ensure Invoker (stop), add P1
+    if not _has_step_named(steps, 'Wire Probe (P1)'):
+        if _insert_step_relative(steps, 'Ensure Invoker (stop)', _mk_wire_probe_step('P1'), 'after'):
+            changed = True
+
+    # After LV Guard (post), add wire-guard-post
+    if not index_for(steps).has('uses', './.github/actions/wire-guard-post'):
+        if _insert_step_relative(steps, 'LV Guard (post)', _mk_wire_guard_post_step(), 'after'):
+            changed = True
+
+    job['steps'] = steps
+    jobs['validate-windows'] = job
+    doc['jobs'] = jobs
+    return changed
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+ci-orchestrated.yml transform suite: hosted preflight, session index posts,
+rerun hints, interactivity probe routing, lint/drift gates and wire probes.
+
+Loaded lazily by the transform registry in `_update_workflows_impl`.
+"""
+from __future__ import annotations
+
+from typing import List
+
+from ruamel.yaml.scalarstring import LiteralScalarString
+
+from _update_workflows_impl import (
+    LIT,
+    SQS,
+    _find_step_index,
+    _find_step_uses_index,
+    _find_step_uses_suffix_index,
+    _has_step_named,
+    _insert_after,
+    _insert_before,
+    _insert_step,
+    _mk_hosted_preflight_step,
+    _refresh_step,
+)
+from _job_visitor import for_each_job
+from _step_index import index_for
+from _step_templates import interned
+from _transforms_wire import _mk_wire_action_step, _mk_wire_step
+
+
+COMPARE_CAPABILITY_INGRESS_RUNS_ON = [
+    'self-hosted',
+    'Windows',
+    'X64',
+    'comparevi',
+    'capability-ingress',
+]
+
+
+def ensure_hosted_preflight(doc, job_key: str) -> bool:
+    changed = False
+    # Ensure jobs map exists
+    jobs = doc.get('jobs')
+    if not isinstance(jobs, dict):
+        doc['jobs'] = jobs = {}
+        changed = True
+    job = jobs.get(job_key)
+    if not isinstance(job, dict):
+        # Create a minimal hosted preflight job
+        job = {
+            'runs-on': 'windows-latest',
+            'timeout-minutes': 3,
+            'steps': [
+                {'uses': 'actions/checkout@v5'},
+            ],
+        }
+        jobs[job_key] = job
+        changed = True
+    # Ensure runs-on windows-latest
+    if job.get('runs-on') != 'windows-latest':
+        job['runs-on'] = 'windows-latest'
+        changed = True
+    steps = job.setdefault('steps', [])
+    # Ensure checkout exists
+    has_checkout = _find_step_uses_index(steps, 'actions/checkout@') is not None
+    if not has_checkout:
+        _insert_step(steps, 0, {'uses': 'actions/checkout@v5'})
+        changed = True
+    # Ensure verify step exists/updated
+    idx_verify = index_for(steps).first_matching('name', lambda name: 'Verify Windows runner' in name)
+    new_step = _mk_hosted_preflight_step()
+    if idx_verify is None:
+        # Insert after checkout if present
+        insert_at = 1 if has_checkout else 0
+        _insert_step(steps, insert_at, new_step)
+        changed = True
+    else:
+        # Update run body to canonical hosted content
+        if not new_step.field_matches(steps[idx_verify], 'run'):
+            steps[idx_verify]['run'] = new_step.node('run')
+            steps[idx_verify]['shell'] = 'pwsh'
+            changed = True
+    return changed
+
+
+def ensure_session_index_post_in_pester_matrix(doc, job_key: str) -> bool:
+    changed = False
+    jobs = doc.get('jobs') or {}
+    job = jobs.get(job_key)
+    if not isinstance(job, dict):
+        return changed
+    steps = job.get('steps') or []
+    # Find if session-index-post exists
+    exists = _find_step_uses_suffix_index(steps, 'session-index-post') is not None
+    if not exists:
+        step = {
+            'name': 'Session index post',
+            'if': SQS('${{ always() }}'),
+            'uses': './.github/actions/session-index-post',
+            'with': {
+                'results-dir': SQS('tests/results/${{ matrix.category }}'),
+                'validate-schema': True,
+                'upload': True,
+                'artifact-name': SQS('session-index-${{ matrix.category }}'),
+            },
+        }
+        _insert_step(steps, len(steps), step)
+        job['steps'] = steps
+        changed = True
+    return changed
+
+
+@interned
+def _mk_rerun_hint_step(default_strategy: str) -> dict:
+    """Create the 'Re-run With Same Inputs' step body for job summaries.
+
+    default_strategy: 'matrix' for publish, 'single' for windows-single
+    """
+    lines = [
+        f"$strategy = if ($env:GH_STRATEGY) {{ $env:GH_STRATEGY }} else {{ '{default_strategy}' }}",
+        "$include = if ($env:GH_INCLUDE) { $env:GH_INCLUDE } else { 'true' }",
+        "$sid = if ($env:GH_SAMPLE_ID) { $env:GH_SAMPLE_ID } else { '<id>' }",
+        "$cmd = \"/run orchestrated strategy={0} include_integration={1} sample_id={2}\" -f $strategy,$include,$sid",
+        "$lines = @('### Re-run With Same Inputs','',\"$ $cmd\")",
+        "if ($env:GITHUB_STEP_SUMMARY) { $lines -join \"`n\" | Out-File -FilePath $env:GITHUB_STEP_SUMMARY -Append -Encoding utf8 }",
+    ]
+    step = {
+        'if': SQS("${{ always() }}"),
+        'name': 'Re-run with same inputs' if default_strategy == 'matrix' else 'Re-run with same inputs (single)',
+        'shell': 'pwsh',
+        'env': {
+            'GH_STRATEGY': SQS("${{ inputs.strategy }}"),
+            'GH_INCLUDE': SQS("${{ inputs.include_integration }}"),
+            'GH_SAMPLE_ID': SQS("${{ inputs.sample_id }}"),
+        },
+        'run': LIT("\n".join(lines)),
+    }
+    return step
+
+
+def ensure_rerun_hint_in_job(doc, job_name: str, default_strategy: str) -> bool:
+    """Ensure the rerun hint step exists (and is normalized) in the given job."""
+    jobs = doc.get('jobs') or {}
+    job = jobs.get(job_name)
+    if not isinstance(job, dict):
+        return False
+    steps = job.setdefault('steps', [])
+    want = _mk_rerun_hint_step(default_strategy)
+    label = want.name
+    changed = False
+    # try to find by exact name
+    i = _find_step_index(steps, label)
+    if i is not None:
+        st = steps[i]
+        # normalize fields
+        for k in ('if', 'shell', 'env', 'run'):
+            if not want.field_matches(st, k):
+                st[k] = want.node(k)
+                changed = True
+    else:
+        # Not found; append at the end
+        _insert_step(steps, len(steps), want)
+        job['steps'] = steps
+        changed = True
+    return changed
+
+
+def ensure_rerun_hint_after_summary(doc, default_strategy: str) -> bool:
+    """Inject rerun hint into the job that aggregates summaries (heuristic: contains 'Summarize Pester categories')."""
+    jobs = doc.get('jobs') or {}
+    changed = False
+    for job_name, job in jobs.items():
+        if not isinstance(job, dict):
+            continue
+        steps = job.get('steps') or []
+        idx = index_for(steps).first_matching('name', lambda name: name.strip().startswith('Summarize Pester categories'))
+        if idx is None:
+            continue
+        want = _mk_rerun_hint_step(default_strategy)
+        label = want.name
+        # If it already exists anywhere in the job, normalize it; otherwise insert right after summary
+        existing = _find_step_index(steps, label)
+        if existing is not None:
+            for k in ('if', 'shell', 'env', 'run'):
+                if not want.field_matches(steps[existing], k):
+                    steps[existing][k] = want.node(k)
+                    changed = True
+        else:
+            _insert_step(steps, idx + 1, want)
+            job['steps'] = steps
+            changed = True
+    return changed
+
+
+def ensure_interactivity_probe_job(doc) -> bool:
+    """Add a lightweight 'probe' job to check interactivity on self-hosted Windows.
+    Wires outputs.ok from steps.out.outputs.ok and depends on normalize+preflight.
+    """
+    jobs = doc.get('jobs') or {}
+    if not isinstance(jobs, dict):
+        return False
+    changed = False
+    desired_if = SQS("${{ inputs.strategy == 'single' || vars.ORCH_STRATEGY == 'single' }}")
+    desired_outputs = {
+        'ok': SQS("${{ steps.out.outputs.ok }}"),
+    }
+    desired_run = LIT(
+        "pwsh -File tools/Write-InteractivityProbe.ps1\n"
+        "$ui = [System.Environment]::UserInteractive\n"
+        "$in = $false; try { $in  = [Console]::IsInputRedirected } catch {}\n"
+        "$ok = ($ui -and -not $in)\n"
+        '$okString = if ($ok) { "true" } else { "false" }\n'
+        '"ok=$okString" | Out-File -FilePath $env:GITHUB_OUTPUT -Append -Encoding utf8\n'
+    )
+    job = {
+        'if': desired_if,
+        'runs-on': list(COMPARE_CAPABILITY_INGRESS_RUNS_ON),
+        'timeout-minutes': 2,
+        'needs': ['normalize', 'preflight'],
+        'outputs': desired_outputs,
+        'steps': [
+            {'uses': 'actions/checkout@v5'},
+            {
+                'name': 'Run interactivity probe',
+                'id': 'out',
+                'shell': 'pwsh',
+                'run': desired_run,
+            },
+        ],
+    }
+    existing = jobs.get('probe')
+    if not isinstance(existing, dict):
+        jobs['probe'] = job
+        doc['jobs'] = jobs
+        return True
+
+    if existing.get('if') != desired_if:
+        existing['if'] = desired_if
+        changed = True
+    if existing.get('runs-on') != job['runs-on']:
+        existing['runs-on'] = list(job['runs-on'])
+        changed = True
+    if existing.get('timeout-minutes') != job['timeout-minutes']:
+        existing['timeout-minutes'] = job['timeout-minutes']
+        changed = True
+    if existing.get('outputs') != desired_outputs:
+        existing['outputs'] = dict(desired_outputs)
+        changed = True
+
+    needs = existing.get('needs')
+    desired_needs = ['normalize', 'preflight']
+    if needs is None:
+        existing['needs'] = list(desired_needs)
+        changed = True
+    elif isinstance(needs, list):
+        for need in desired_needs:
+            if need not in needs:
+                needs.append(need)
+                changed = True
+    else:
+        existing['needs'] = list(desired_needs)
+        changed = True
+
+    steps = existing.setdefault('steps', [])
+    if not isinstance(steps, list):
+        existing['steps'] = list(job['steps'])
+        changed = True
+    else:
+        checkout_idx = _find_step_uses_index(steps, 'actions/checkout@')
+        if checkout_idx is None:
+            _insert_step(steps, 0, {'uses': 'actions/checkout@v5'})
+            changed = True
+
+        out_idx = index_for(steps).first('id', 'out')
+        desired_out = job['steps'][1]
+        if out_idx is None:
+            checkout_idx = _find_step_uses_index(steps, 'actions/checkout@')
+            insert_at = len(steps) if checkout_idx is None else checkout_idx + 1
+            _insert_step(steps, insert_at, dict(desired_out))
+            changed = True
+        else:
+            out_step = steps[out_idx]
+            if out_step.get('name') != desired_out['name']:
+                out_step['name'] = desired_out['name']
+                _refresh_step(steps, out_idx)
+                changed = True
+            if out_step.get('shell') != desired_out['shell']:
+                out_step['shell'] = desired_out['shell']
+                changed = True
+            if out_step.get('run') != desired_run:
+                out_step['run'] = desired_run
+                changed = True
+
+    doc['jobs'] = jobs
+    return changed
+
+
+def _ensure_job_needs(doc, job_name: str, need: str) -> bool:
+    jobs = doc.get('jobs') or {}
+    job = jobs.get(job_name)
+    if not isinstance(job, dict):
+        return False
+    needs = job.get('needs')
+    changed = False
+    if needs is None:
+        job['needs'] = [need]
+        changed = True
+    elif isinstance(needs, list) and need not in needs:
+        needs.append(need)
+        job['needs'] = needs
+        changed = True
+    return changed
+
+
+def _set_job_if(doc, job_name: str, new_if: str) -> bool:
+    jobs = doc.get('jobs') or {}
+    job = jobs.get(job_name)
+    if not isinstance(job, dict):
+        return False
+    want = SQS(new_if)
+    if job.get('if') != want:
+        job['if'] = want
+        return True
+    return False
+
+
+def ensure_orchestrated_strategy_gates(doc) -> bool:
+    """Gate windows-single and pester-category on the interactivity probe outcome."""
+    # windows-single needs probe and requires ok==true
+    w_if = "${{ (inputs.strategy == 'single' || vars.ORCH_STRATEGY == 'single') && needs.probe.outputs.ok == 'true' }}"
+    w1 = _set_job_if(doc, 'windows-single', w_if)
+    w2 = _ensure_job_needs(doc, 'windows-single', 'probe')
+    # pester-category runs matrix or fallback when single is requested but probe is false
+    pc_if = "${{ inputs.strategy == 'matrix' || vars.ORCH_STRATEGY == 'matrix' || (inputs.strategy == '' && vars.ORCH_STRATEGY == '') || (inputs.strategy == 'single' && needs.probe.outputs.ok == 'false') }}"
+    pc1 = _set_job_if(doc, 'pester-category', pc_if)
+    pc2 = _ensure_job_needs(doc, 'pester-category', 'probe')
+    return w1 or w2 or pc1 or pc2
+
+
+def ensure_orchestrated_drift_gate_defaults(doc) -> bool:
+    """Ensure the orchestrated lint job gates drift checks on the repository default branch."""
+    jobs = doc.get('jobs') or {}
+    lint = jobs.get('lint')
+    if not isinstance(lint, dict):
+        return False
+    steps: List[dict] = lint.get('steps') or []
+    target = None
+    for st in steps:
+        if isinstance(st, dict) and st.get('name') == 'Non-LabVIEW checks (Docker)':
+            target = st
+            break
+    if target is None:
+        return False
+    default_branch_expr = (
+        "${{ github.event.repository.default_branch || github.event.pull_request.base.repo.default_branch || "
+        "github.event.workflow_run.repository.default_branch || '' }}"
+    )
+    expected_env = {
+        'DEFAULT_BRANCH': default_branch_expr,
+    }
+    expected_body = (
+        "$params = @()\n"
+        "$defaultBranch = $env:DEFAULT_BRANCH\n"
+        "if ('${{ github.ref_name }}' -eq $defaultBranch -or '${{ github.base_ref }}' -eq $defaultBranch) {\n"
+        "  $params += '-FailOnWorkflowDrift'\n"
+        "}\n"
+        "$params += '-SkipDotnetCliBuild'\n"
+        "# Skip linting this workflow while it is executing to avoid orchestration deadlocks.\n"
+        "$params += '-ExcludeWorkflowPaths'\n"
+        "$params += '.github/workflows/ci-orchestrated.yml'\n"
+        "pwsh -File ./tools/Run-NonLVChecksInDocker.ps1 @params\n"
+    )
+    changed = False
+    if target.get('shell') != 'pwsh':
+        target['shell'] = 'pwsh'
+        changed = True
+    cur_env = target.get('env') or {}
+    if dict(cur_env) != expected_env:
+        target['env'] = expected_env
+        changed = True
+    current_run = target.get('run')
+    if not isinstance(current_run, LiteralScalarString) or str(current_run) != expected_body:
+        target['run'] = LIT(expected_body)
+        changed = True
+    return changed
+
+
+def _wire_T1_job(jobs: dict, jn: str, job: dict) -> bool:
+    steps = job.get('steps') or []
+    # anchors to check
+    anchors = ['Run Pester tests via local dispatcher (category)', 'Pester categories (serial, deterministic)']
+    found = [i for i in (_find_step_index(steps, a) for a in anchors) if i is not None]
+    insert_idx = min(found) if found else None
+    if insert_idx is None or _has_step_named(steps, 'Wire Probe (T1)'):
+        return False
+    # results-dir selection
+    rd = 'tests/results'
+    if jn == 'pester-category':
+        rd = 'tests/results/${{ matrix.category }}'
+    _insert_step(steps, insert_idx, {
+        'name': 'Wire Probe (T1)',
+        'uses': './.github/actions/wire-probe',
+        'with': { 'phase': 'T1', 'results-dir': rd },
+    })
+    job['steps'] = steps
+    jobs[jn] = job
+    return True
+
+
+def ensure_wire_T1_for_tests(doc) -> bool:
+    """Insert Wire Probe (T1) before major test execution steps in orchestrated workflows."""
+    return for_each_job(doc, _wire_T1_job)
+
+
+def _wire_C1C2_job(jobs: dict, jn: str, job: dict) -> bool:
+    if jn != 'drift':
+        return False
+    changed = False
+    steps = job.get('steps') or []
+    idx = _find_step_uses_suffix_index(steps, '/fixture-drift')
+    if idx is None:
+        return changed
+    has_c1 = _has_step_named(steps, 'Wire Probe (C1)')
+    has_c2 = _has_step_named(steps, 'Wire Probe (C2)')
+    if not has_c1:
+        _insert_step(steps, idx, _mk_wire_step('Wire Probe (C1)', 'C1', 'results/fixture-drift'))
+        changed = True
+        idx += 1
+    if not has_c2:
+        _insert_step(steps, idx + 1, _mk_wire_step('Wire Probe (C2)', 'C2', 'results/fixture-drift'))
+        changed = True
+    job['steps'] = steps
+    jobs[jn] = job
+    return changed
+
+
+def ensure_wire_C1C2_around_drift(doc) -> bool:
+    return for_each_job(doc, _wire_C1C2_job)
+
+
+def _wire_I1I2_job(jobs: dict, jn: str, job: dict) -> bool:
+    changed = False
+    steps = job.get('steps') or []
+    if not _has_step_named(steps, 'Wire Invoker (start)'):
+        if _insert_before(steps, 'Ensure Invoker (start)', _mk_wire_action_step('Wire Invoker (start)', './.github/actions/wire-invoker-start', 'tests/results')):
+            changed = True
+    if not _has_step_named(steps, 'Wire Invoker (stop)'):
+        if _insert_after(steps, 'Ensure Invoker (stop)', _mk_wire_action_step('Wire Invoker (stop)', './.github/actions/wire-invoker-stop', 'tests/results')):
+            changed = True
+    # Only write back what was wired: a `uses:` job must not grow `steps: []`.
+    if changed:
+        job['steps'] = steps
+        jobs[jn] = job
+    return changed
+
+
+def ensure_wire_I1I2_invoker(doc) -> bool:
+    return for_each_job(doc, _wire_I1I2_job)
+
+
+def _wire_G0G1_job(jobs: dict, jn: str, job: dict) -> bool:
+    changed = False
+    steps = job.get('steps') or []
+    if _find_step_index(steps, 'Runner Unblock Guard') is None:
+        return changed
+    if not _has_step_named(steps, 'Wire Guard (pre)'):
+        _insert_before(steps, 'Runner Unblock Guard', _mk_wire_action_step('Wire Guard (pre)', './.github/actions/wire-guard-pre', 'tests/results'))
+        changed = True
+    if not _has_step_named(steps, 'Wire Guard (post)'):
+        _insert_after(steps, 'Runner Unblock Guard', _mk_wire_action_step('Wire Guard (post)', './.github/actions/wire-guard-post', 'tests/results'))
+        changed = True
+    job['steps'] = steps
+    jobs[jn] = job
+    return changed
+
+
+def ensure_wire_G0G1_guard(doc) -> bool:
+    return for_each_job(doc, _wire_G0G1_job)
+
+
+def _wire_P1_job(jobs: dict, jn: str, job: dict) -> bool:
+    steps = job.get('steps') or []
+    if _has_step_named(steps, 'Wire Probe (P1)'):
+        return False
+    anchors = ['Append final summary (single)', 'Summarize orchestrated run']
+    for a in anchors:
+        if _insert_after(steps, a, _mk_wire_step('Wire Probe (P1)', 'P1', 'tests/results')):
+            job['steps'] = steps
+            jobs[jn] = job
+            return True
+    return False
+
+
+def ensure_wire_P1_after_final(doc) -> bool:
+    return for_each_job(doc, _wire_P1_job)
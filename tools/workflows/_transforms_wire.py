@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Wire-probe transforms shared by ci-orchestrated.yml and validate.yml.
+
+Loaded lazily by the transform registry in `_update_workflows_impl`.
+"""
+from __future__ import annotations
+
+from _job_visitor import for_each_job
+from _step_index import index_for
+from _step_templates import decorated, interned
+from _update_workflows_impl import SQS, _find_step_uses_index, _insert_before, _insert_step
+
+
+_WIRE_PROBE_PHASES = (('Wire Probe (J1)', 'J1'), ('Wire Probe (J2)', 'J2'))
+
+
+def _wire_j1_j2_in_place(job: dict, results_dir: str) -> bool:
+    """True when a remove-and-reinsert of J1/J2 would emit the job unchanged."""
+    steps = job.get('steps')
+    # The rebuild below swaps in a plain list, dropping sequence-level comments
+    # and flow style; only an undecorated list can be left as is. Plain-loaded
+    # lists (the fast check) report decoration through `_fast_check`.
+    if not isinstance(steps, list) or decorated(steps):
+        return False
+    index = index_for(steps)
+    checkout_idx = _find_step_uses_index(steps, 'actions/checkout@')
+    if checkout_idx is None:
+        return not any(index.has('name', name) for name, _ in _WIRE_PROBE_PHASES)
+    for offset, (name, phase) in enumerate(_WIRE_PROBE_PHASES, start=1):
+        pos = checkout_idx + offset
+        if index.positions('name', name) != [pos] or not _mk_wire_step(name, phase, results_dir).emits_same(steps[pos]):
+            return False
+    return True
+
+
+def _insert_wire_j1_j2_in_job(job: dict, results_dir: str = 'tests/results') -> bool:
+    changed = False
+    if not isinstance(job, dict):
+        return changed
+    if _wire_j1_j2_in_place(job, results_dir):
+        return changed
+    steps = job.get('steps') or []
+    # Remove existing J1/J2 so we can reinsert after checkout
+    kept = []
+    removed = False
+    for st in steps:
+        if isinstance(st, dict) and st.get('name') in ('Wire Probe (J1)', 'Wire Probe (J2)'):
+            removed = True
+            changed = True
+            continue
+        kept.append(st)
+    steps = kept
+    checkout_idx = _find_step_uses_index(steps, 'actions/checkout@')
+    if checkout_idx is None:
+        # Write back only a removal: a job without steps (`uses:`) must not grow `steps: []`.
+        if removed:
+            job['steps'] = steps
+        return changed
+    insert_after = checkout_idx + 1
+    _insert_step(steps, insert_after, _mk_wire_step('Wire Probe (J1)', 'J1', results_dir))
+    insert_after += 1
+    _insert_step(steps, insert_after, _mk_wire_step('Wire Probe (J2)', 'J2', results_dir))
+    job['steps'] = steps
+    return True
+
+
+def _wire_probes_job(jobs: dict, jn: str, job: dict, default_results_dir: str = 'tests/results') -> bool:
+    # Choose results-dir per job when known
+    rd = default_results_dir
+    if jn == 'pester-category':
+        rd = 'tests/results/${{ matrix.category }}'
+    elif jn == 'drift':
+        rd = 'results/fixture-drift'
+    elif jn == 'publish':
+        rd = 'tests/results'
+    elif jn == 'lint':
+        rd = 'tests/results'
+    elif jn == 'normalize':
+        rd = 'tests/results'
+    if _insert_wire_j1_j2_in_job(job, rd):
+        jobs[jn] = job
+        return True
+    return False
+
+
+def ensure_wire_probes_all_jobs(doc, default_results_dir: str = 'tests/results') -> bool:
+    return for_each_job(doc, _wire_probes_job, default_results_dir)
+
+
+@interned
+def _mk_wire_step(name: str, phase: str, results_dir: str) -> dict:
+    return {
+        'name': name,
+        'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
+        'uses': './.github/actions/wire-probe',
+        'with': { 'phase': phase, 'results-dir': results_dir },
+    }
+
+
+@interned
+def _mk_wire_action_step(name: str, uses: str, results_dir: str) -> dict:
+    return {
+        'name': name,
+        'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
+        'uses': uses,
+        'with': { 'results-dir': results_dir },
+    }
+
+
+def _wire_S1_job(jobs: dict, jn: str, job: dict) -> bool:
+    steps = job.get('steps') or []
+    # target anchors
+    target_names = [
+        'Session index post',
+        'Session index post (best-effort)',
+        'Session index post (single)'
+    ]
+    # decide results-dir
+    rd = 'tests/results'
+    if jn == 'pester-category':
+        rd = 'tests/results/${{ matrix.category }}'
+    elif jn == 'drift':
+        rd = 'results/fixture-drift'
+    exists = index_for(steps).has('uses', './.github/actions/wire-session-index')
+    if exists:
+        return False
+    s1 = _mk_wire_action_step('Wire Session Index (S1)', './.github/actions/wire-session-index', rd)
+    inserted = False
+    for tn in target_names:
+        if _insert_before(steps, tn, s1):
+            inserted = True
+            break
+    if inserted:
+        job['steps'] = steps
+        jobs[jn] = job
+    return inserted
+
+
+def ensure_wire_S1_before_session_index(doc) -> bool:
+    return for_each_job(doc, _wire_S1_job)
@@ -15,38 +15,87 @@ than the original pester-selfhosted transform:
 Usage:
   python tools/workflows/update_workflows.py --check .github/workflows/validate.yml
   python tools/workflows/update_workflows.py --write .github/workflows/ci-orchestrated.yml
+  python tools/workflows/update_workflows.py --write --transaction .github/workflows/*.yml
+  python tools/workflows/update_workflows.py --check --jobs 0 .github/workflows/*.yml
+  python tools/workflows/update_workflows.py --write --splice .github/workflows/validate.yml
+  python tools/workflows/update_workflows.py --diff .github/workflows/ci-orchestrated.yml
+  python tools/workflows/update_workflows.py --check --profile profile.json .github/workflows/*.yml
+  python tools/workflows/update_workflows.py --check --watch .github/workflows/ci-orchestrated.yml
+  python tools/workflows/update_workflows.py --check --fail-fast --journal drift.jsonl .github/workflows/*.yml
+  python tools/workflows/update_workflows.py --check --shard 2/4 --results shard-2.json .github/workflows/*.yml
+  python tools/workflows/update_workflows.py --check --jobs 0 --file-timeout 30 --max-memory 512 .github/workflows/*.yml
+  python tools/workflows/update_workflows.py --merge-results shard-1.json shard-2.json shard-3.json shard-4.json
 """
 from __future__ import annotations
+import contextlib
+import hashlib
+import json
+import os
+import re
 import sys
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from fnmatch import fnmatchcase
+from importlib import import_module
+from typing import Callable, List, NamedTuple
 
-from ruamel.yaml import YAML
-from ruamel.yaml.scalarstring import SingleQuotedScalarString as SQS, LiteralScalarString as LIT, DoubleQuotedScalarString as DQS
+from _journal import FirstMutation, active as active_journal, journaling
+from _limits import Limits, check_size, check_structure, check_well_formed
+from _merkle import digest_document
+from _splice import snapshot_jobs, splice_changed_jobs
+from _step_index import index_for, indexed
+from _step_templates import interned, materialize
 
 
-yaml = YAML(typ='rt')
-yaml.preserve_quotes = True
-yaml.width = 4096  # avoid folding
+# ruamel.yaml is most of this module's import cost, and usage errors and the
+# enclave's bookkeeping never need it (prefiltered files only need its event
+# parser): the engine and the scalar styles are only loaded on first use.
+@lru_cache(maxsize=None)
+def _yaml(indent: tuple[int, int, int] | None = None):
+    """The round-trip engine; `indent` is an emitter (mapping, sequence, offset) other than ruamel's default."""
+    from ruamel.yaml import YAML
+    engine = YAML(typ='rt')
+    engine.preserve_quotes = True
+    engine.width = 4096  # avoid folding
+    if indent is not None:
+        mapping, sequence, offset = indent
+        engine.indent(mapping=mapping, sequence=sequence, offset=offset)
+    return engine
 
-COMPARE_CAPABILITY_INGRESS_RUNS_ON = [
-    'self-hosted',
-    'Windows',
-    'X64',
-    'comparevi',
-    'capability-ingress',
-]
 
+def SQS(value: str):
+    from ruamel.yaml.scalarstring import SingleQuotedScalarString
+    return SingleQuotedScalarString(value)
+
+
+def LIT(value: str):
+    from ruamel.yaml.scalarstring import LiteralScalarString
+    return LiteralScalarString(value)
+
+
+def DQS(value: str):
+    from ruamel.yaml.scalarstring import DoubleQuotedScalarString
+    return DoubleQuotedScalarString(value)
+
+
+HOSTED_PREFLIGHT_STEP_NAME = 'Verify Windows runner and idle LabVIEW (surface LVCompare notice)'
+HOSTED_NOTICE_STEP_NAME = 'Verify LVCompare and idle LabVIEW state (notice-only on hosted)'
 
 def load_yaml(path: Path):
     with path.open('r', encoding='utf-8') as fp:
-        return yaml.load(fp)
+        return _yaml().load(fp)
 
 
 def dump_yaml(doc) -> str:
+    return dump_yaml_indented(doc)
+
+
+def dump_yaml_indented(doc, indent: tuple[int, int, int] | None = None) -> str:
+    """dump_yaml with an emitter (mapping, sequence, offset) other than ruamel's default."""
     from io import StringIO
     sio = StringIO()
-    yaml.dump(doc, sio)
+    _yaml(indent).dump(doc, sio)
     return sio.getvalue()
 
 
@@ -90,17 +139,13 @@ def ensure_preinit_force_run_outputs(doc) -> bool:
     # steps: add `if` on id=g and add out step if missing
     steps: List[dict] = pre.setdefault('steps', [])
     # find index of id: g pre-init gate step
-    idx_g = None
-    for i, st in enumerate(steps):
-        if isinstance(st, dict) and st.get('id') == 'g' and st.get('uses', '').endswith('pre-init-gate'):
-            idx_g = i
-            break
+    idx_g = next((i for i in index_for(steps).positions('id', 'g') if steps[i].get('uses', '').endswith('pre-init-gate')), None)
     if idx_g is not None:
         if steps[idx_g].get('if') != SQS("${{ inputs.force_run != 'true' }}"):
             steps[idx_g]['if'] = SQS("${{ inputs.force_run != 'true' }}")
             changed = True
         # ensure out step exists after g
-        has_out = any(isinstance(st, dict) and st.get('id') == 'out' for st in steps)
+        has_out = index_for(steps).has('id', 'out')
         if not has_out:
             run_body = (
                 "$force = '${{ inputs.force_run }}'\n"
@@ -113,11 +158,12 @@ def ensure_preinit_force_run_outputs(doc) -> bool:
                 'shell': 'pwsh',
                 'run': LIT(run_body),
             }
-            steps.insert(idx_g + 1, out_step)
+            _insert_step(steps, idx_g + 1, out_step)
             changed = True
     return changed
 
 
+@interned
 def _mk_hosted_preflight_step() -> dict:
     lines = [
         'Write-Host "Runner: $([System.Environment]::OSVersion.VersionString)"',
@@ -136,12 +182,13 @@ def _mk_hosted_preflight_step() -> dict:
     ]
     body = "\n".join(lines)
     return {
-        'name': 'Verify Windows runner and idle LabVIEW (surface LVCompare notice)',
+        'name': HOSTED_PREFLIGHT_STEP_NAME,
         'shell': 'pwsh',
         'run': LIT(body),
     }
 
 
+@interned
 def _mk_hosted_notice_step() -> dict:
     # Normalize the hosted Windows notice-only step to avoid -join folding
     lines = [
@@ -157,7 +204,7 @@ def _mk_hosted_notice_step() -> dict:
     ]
     body = "\n".join(lines)
     return {
-        'name': 'Verify LVCompare and idle LabVIEW state (notice-only on hosted)',
+        'name': HOSTED_NOTICE_STEP_NAME,
         'shell': 'pwsh',
         'run': LIT(body),
     }
@@ -170,19 +217,15 @@ def ensure_hosted_notice(doc, job_key: str) -> bool:
     if not isinstance(job, dict):
         return changed
     steps = job.setdefault('steps', [])
-    idx_notice = None
-    for i, st in enumerate(steps):
-        if isinstance(st, dict) and 'Verify LVCompare and idle LabVIEW state' in str(st.get('name', '')):
-            idx_notice = i
-            break
+    idx_notice = index_for(steps).first_matching('name', lambda name: 'Verify LVCompare and idle LabVIEW state' in name)
     new_step = _mk_hosted_notice_step()
     if idx_notice is None:
-        steps.append(new_step)
+        _insert_step(steps, len(steps), new_step)
         job['steps'] = steps
         return True
     # Update run body to canonical hosted content
-    if steps[idx_notice].get('run') != new_step['run']:
-        steps[idx_notice]['run'] = new_step['run']
+    if not new_step.field_matches(steps[idx_notice], 'run'):
+        steps[idx_notice]['run'] = new_step.node('run')
         steps[idx_notice]['shell'] = 'pwsh'
         changed = True
     return changed
@@ -202,562 +245,65 @@ def normalize_hosted_preflight_steps(doc) -> bool:
         if not isinstance(job, dict):
             continue
         steps = job.get('steps') or []
-        for i, st in enumerate(steps):
-            if not isinstance(st, dict):
-                continue
-            nm = str(st.get('name', ''))
-            if nm == preflight_tmpl['name']:
-                if st.get('run') != preflight_tmpl['run'] or st.get('shell') != 'pwsh':
-                    st['run'] = preflight_tmpl['run']
-                    st['shell'] = 'pwsh'
-                    changed = True
-            elif nm == notice_tmpl['name']:
-                if st.get('run') != notice_tmpl['run'] or st.get('shell') != 'pwsh':
-                    st['run'] = notice_tmpl['run']
+        index = index_for(steps)
+        for tmpl in (preflight_tmpl, notice_tmpl):
+            for i in index.positions('name', tmpl.name):
+                st = steps[i]
+                if not tmpl.field_matches(st, 'run') or st.get('shell') != 'pwsh':
+                    st['run'] = tmpl.node('run')
                     st['shell'] = 'pwsh'
                     changed = True
     return changed
 
 
-def _insert_wire_j1_j2_in_job(job: dict, results_dir: str = 'tests/results') -> bool:
-    changed = False
-    if not isinstance(job, dict):
-        return changed
-    steps = job.setdefault('steps', [])
-    # Remove existing J1/J2 so we can reinsert after checkout
-    kept = []
-    removed = False
-    for st in steps:
-        if isinstance(st, dict) and st.get('name') in ('Wire Probe (J1)', 'Wire Probe (J2)'):
-            removed = True
-            changed = True
-            continue
-        kept.append(st)
-    steps = kept
-    job['steps'] = steps
-    checkout_idx = next((i for i, s in enumerate(steps) if isinstance(s, dict) and str(s.get('uses', '')).startswith('actions/checkout@')), None)
-    if checkout_idx is None:
-        return changed
-    insert_after = checkout_idx + 1
-    steps.insert(insert_after, {
-        'name': 'Wire Probe (J1)',
-        'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
-        'uses': './.github/actions/wire-probe',
-        'with': {
-            'phase': 'J1',
-            'results-dir': results_dir,
-        },
-    })
-    insert_after += 1
-    steps.insert(insert_after, {
-        'name': 'Wire Probe (J2)',
-        'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
-        'uses': './.github/actions/wire-probe',
-        'with': {
-            'phase': 'J2',
-            'results-dir': results_dir,
-        },
-    })
-    job['steps'] = steps
-    return True
-
-
-def ensure_wire_probes_all_jobs(doc, default_results_dir: str = 'tests/results') -> bool:
-    changed = False
-    jobs = doc.get('jobs') or {}
-    if not isinstance(jobs, dict):
-        return changed
-    for jn, job in jobs.items():
-        if not isinstance(job, dict):
-            continue
-        # Choose results-dir per job when known
-        rd = default_results_dir
-        if jn == 'pester-category':
-            rd = 'tests/results/${{ matrix.category }}'
-        elif jn == 'drift':
-            rd = 'results/fixture-drift'
-        elif jn == 'publish':
-            rd = 'tests/results'
-        elif jn == 'lint':
-            rd = 'tests/results'
-        elif jn == 'normalize':
-            rd = 'tests/results'
-        if _insert_wire_j1_j2_in_job(job, rd):
-            jobs[jn] = job
-            changed = True
-    if changed:
-        doc['jobs'] = jobs
-    return changed
-
-
-def ensure_wire_T1_for_tests(doc) -> bool:
-    """Insert Wire Probe (T1) before major test execution steps in orchestrated workflows."""
-    changed = False
-    jobs = doc.get('jobs') or {}
-    if not isinstance(jobs, dict):
-        return changed
-    for jn, job in jobs.items():
-        if not isinstance(job, dict):
-            continue
-        steps = job.get('steps') or []
-        def has_t1():
-            return any(isinstance(s, dict) and s.get('name') == 'Wire Probe (T1)' for s in steps)
-        # anchors to check
-        anchors = ['Run Pester tests via local dispatcher (category)', 'Pester categories (serial, deterministic)']
-        insert_idx = None
-        for i, st in enumerate(steps):
-            if not isinstance(st, dict):
-                continue
-            nm = st.get('name', '')
-            if nm in anchors:
-                insert_idx = i
-                break
-        if insert_idx is not None and not has_t1():
-            # results-dir selection
-            rd = 'tests/results'
-            if jn == 'pester-category':
-                rd = 'tests/results/${{ matrix.category }}'
-            steps.insert(insert_idx, {
-                'name': 'Wire Probe (T1)',
-                'uses': './.github/actions/wire-probe',
-                'with': { 'phase': 'T1', 'results-dir': rd },
-            })
-            job['steps'] = steps
-            jobs[jn] = job
-            changed = True
-    if changed:
-        doc['jobs'] = jobs
-    return changed
-
-
-def _mk_wire_step(name: str, phase: str, results_dir: str) -> dict:
-    return {
-        'name': name,
-        'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
-        'uses': './.github/actions/wire-probe',
-        'with': { 'phase': phase, 'results-dir': results_dir },
-    }
-
-
-def _insert_before(steps: list, anchor_name: str, step: dict) -> bool:
-    for i, st in enumerate(steps):
-        if isinstance(st, dict) and st.get('name') == anchor_name:
-            steps.insert(i, step)
-            return True
-    return False
-
-
-def _insert_after(steps: list, anchor_name: str, step: dict) -> bool:
-    for i, st in enumerate(steps):
-        if isinstance(st, dict) and st.get('name') == anchor_name:
-            steps.insert(i + 1, step)
-            return True
-    return False
-
-
-def ensure_wire_S1_before_session_index(doc) -> bool:
-    changed = False
-    jobs = doc.get('jobs') or {}
-    if not isinstance(jobs, dict):
-        return changed
-    for jn, job in jobs.items():
-        if not isinstance(job, dict):
-            continue
-        steps = job.get('steps') or []
-        # target anchors
-        target_names = [
-            'Session index post',
-            'Session index post (best-effort)',
-            'Session index post (single)'
-        ]
-        # decide results-dir
-        rd = 'tests/results'
-        if jn == 'pester-category':
-            rd = 'tests/results/${{ matrix.category }}'
-        elif jn == 'drift':
-            rd = 'results/fixture-drift'
-        exists = any(isinstance(s, dict) and str(s.get('uses','')) == './.github/actions/wire-session-index' for s in steps)
-        if exists:
-            continue
-        s1 = {
-            'name': 'Wire Session Index (S1)',
-            'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
-            'uses': './.github/actions/wire-session-index',
-            'with': { 'results-dir': rd },
-        }
-        inserted = False
-        for tn in target_names:
-            if _insert_before(steps, tn, s1):
-                inserted = True
-                break
-        if inserted:
-            job['steps'] = steps
-            jobs[jn] = job
-            changed = True
-    if changed:
-        doc['jobs'] = jobs
-    return changed
-
-
-def ensure_wire_C1C2_around_drift(doc) -> bool:
-    changed = False
-    jobs = doc.get('jobs') or {}
-    if not isinstance(jobs, dict):
-        return changed
-    drift = jobs.get('drift')
-    if not isinstance(drift, dict):
-        return changed
-    steps = drift.get('steps') or []
-    idx = None
-    for i, st in enumerate(steps):
-        if isinstance(st, dict) and str(st.get('uses','')).endswith('/fixture-drift'):
-            idx = i
-            break
-    if idx is None:
-        return changed
-    has_c1 = any(isinstance(s, dict) and s.get('name') == 'Wire Probe (C1)' for s in steps)
-    has_c2 = any(isinstance(s, dict) and s.get('name') == 'Wire Probe (C2)' for s in steps)
-    if not has_c1:
-        steps.insert(idx, _mk_wire_step('Wire Probe (C1)', 'C1', 'results/fixture-drift'))
-        changed = True
-        idx += 1
-    if not has_c2:
-        steps.insert(idx + 1, _mk_wire_step('Wire Probe (C2)', 'C2', 'results/fixture-drift'))
-        changed = True
-    drift['steps'] = steps
-    jobs['drift'] = drift
-    doc['jobs'] = jobs
-    return changed
+def _insert_step(steps: list, pos: int, step) -> None:
+    """Insert a step dict, or a fresh copy of a StepTemplate, keeping the index current."""
+    index_for(steps).insert(pos, materialize(step))
 
 
-def ensure_wire_I1I2_invoker(doc) -> bool:
-    changed = False
-    jobs = doc.get('jobs') or {}
-    if not isinstance(jobs, dict):
-        return changed
-    for jn, job in jobs.items():
-        if not isinstance(job, dict):
-            continue
-        steps = job.get('steps') or []
-        if not any(isinstance(s, dict) and s.get('name') == 'Wire Invoker (start)' for s in steps):
-            if _insert_before(steps, 'Ensure Invoker (start)', {
-                'name': 'Wire Invoker (start)',
-                'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
-                'uses': './.github/actions/wire-invoker-start',
-                'with': { 'results-dir': 'tests/results' },
-            }):
-                changed = True
-        if not any(isinstance(s, dict) and s.get('name') == 'Wire Invoker (stop)' for s in steps):
-            if _insert_after(steps, 'Ensure Invoker (stop)', {
-                'name': 'Wire Invoker (stop)',
-                'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
-                'uses': './.github/actions/wire-invoker-stop',
-                'with': { 'results-dir': 'tests/results' },
-            }):
-                changed = True
-        job['steps'] = steps
-        jobs[jn] = job
-    if changed:
-        doc['jobs'] = jobs
-    return changed
-
-
-def ensure_wire_G0G1_guard(doc) -> bool:
-    changed = False
-    jobs = doc.get('jobs') or {}
-    if not isinstance(jobs, dict):
-        return changed
-    for jn, job in jobs.items():
-        if not isinstance(job, dict):
-            continue
-        steps = job.get('steps') or []
-        if _find_step_index(steps, 'Runner Unblock Guard') is None:
-            continue
-        if not any(isinstance(s, dict) and s.get('name') == 'Wire Guard (pre)' for s in steps):
-            _insert_before(steps, 'Runner Unblock Guard', {
-                'name': 'Wire Guard (pre)',
-                'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
-                'uses': './.github/actions/wire-guard-pre',
-                'with': { 'results-dir': 'tests/results' },
-            })
-            changed = True
-        if not any(isinstance(s, dict) and s.get('name') == 'Wire Guard (post)' for s in steps):
-            _insert_after(steps, 'Runner Unblock Guard', {
-                'name': 'Wire Guard (post)',
-                'if': SQS("${{ vars.WIRE_PROBES != '0' }}"),
-                'uses': './.github/actions/wire-guard-post',
-                'with': { 'results-dir': 'tests/results' },
-            })
-            changed = True
-        job['steps'] = steps
-        jobs[jn] = job
-    if changed:
-        doc['jobs'] = jobs
-    return changed
+def _delete_step(steps: list, pos: int) -> None:
+    index_for(steps).delete(pos)
 
 
-def ensure_wire_P1_after_final(doc) -> bool:
-    changed = False
-    jobs = doc.get('jobs') or {}
-    if not isinstance(jobs, dict):
-        return changed
-    anchors = ['Append final summary (single)', 'Summarize orchestrated run']
-    for jn, job in jobs.items():
-        if not isinstance(job, dict):
-            continue
-        steps = job.get('steps') or []
-        if any(isinstance(s, dict) and s.get('name') == 'Wire Probe (P1)' for s in steps):
-            continue
-        inserted = False
-        for a in anchors:
-            if _insert_after(steps, a, _mk_wire_step('Wire Probe (P1)', 'P1', 'tests/results')):
-                inserted = True
-                break
-        if inserted:
-            job['steps'] = steps
-            jobs[jn] = job
-            changed = True
-    if changed:
-        doc['jobs'] = jobs
-    return changed
+def _replace_step(steps: list, pos: int, step: dict) -> None:
+    index_for(steps).replace(pos, step)
 
-def _mk_rerun_hint_step(default_strategy: str) -> dict:
-    """Create the 'Re-run With Same Inputs' step body for job summaries.
 
-    default_strategy: 'matrix' for publish, 'single' for windows-single
-    """
-    lines = [
-        f"$strategy = if ($env:GH_STRATEGY) {{ $env:GH_STRATEGY }} else {{ '{default_strategy}' }}",
-        "$include = if ($env:GH_INCLUDE) { $env:GH_INCLUDE } else { 'true' }",
-        "$sid = if ($env:GH_SAMPLE_ID) { $env:GH_SAMPLE_ID } else { '<id>' }",
-        "$cmd = \"/run orchestrated strategy={0} include_integration={1} sample_id={2}\" -f $strategy,$include,$sid",
-        "$lines = @('### Re-run With Same Inputs','',\"$ $cmd\")",
-        "if ($env:GITHUB_STEP_SUMMARY) { $lines -join \"`n\" | Out-File -FilePath $env:GITHUB_STEP_SUMMARY -Append -Encoding utf8 }",
-    ]
-    step = {
-        'if': SQS("${{ always() }}"),
-        'name': 'Re-run with same inputs' if default_strategy == 'matrix' else 'Re-run with same inputs (single)',
-        'shell': 'pwsh',
-        'env': {
-            'GH_STRATEGY': SQS("${{ inputs.strategy }}"),
-            'GH_INCLUDE': SQS("${{ inputs.include_integration }}"),
-            'GH_SAMPLE_ID': SQS("${{ inputs.sample_id }}"),
-        },
-        'run': LIT("\n".join(lines)),
-    }
-    return step
+def _refresh_step(steps: list, pos: int) -> None:
+    """Re-index a step after its name/id/uses was edited in place."""
+    index_for(steps).refresh(pos)
 
 
-def ensure_rerun_hint_in_job(doc, job_name: str, default_strategy: str) -> bool:
-    """Ensure the rerun hint step exists (and is normalized) in the given job."""
-    jobs = doc.get('jobs') or {}
-    job = jobs.get(job_name)
-    if not isinstance(job, dict):
+def _insert_before(steps: list, anchor_name: str, step) -> bool:
+    i = _find_step_index(steps, anchor_name)
+    if i is None:
         return False
-    steps = job.setdefault('steps', [])
-    want = _mk_rerun_hint_step(default_strategy)
-    label = want['name']
-    changed = False
-    # try to find by exact name
-    for i, st in enumerate(steps):
-        if isinstance(st, dict) and st.get('name') == label:
-            # normalize fields
-            for k in ('if', 'shell', 'env', 'run'):
-                if st.get(k) != want[k]:
-                    st[k] = want[k]
-                    changed = True
-            break
-    else:
-        # Not found; append at the end
-        steps.append(want)
-        job['steps'] = steps
-        changed = True
-    return changed
-
-
-def ensure_rerun_hint_after_summary(doc, default_strategy: str) -> bool:
-    """Inject rerun hint into the job that aggregates summaries (heuristic: contains 'Summarize Pester categories')."""
-    jobs = doc.get('jobs') or {}
-    changed = False
-    for job_name, job in jobs.items():
-        if not isinstance(job, dict):
-            continue
-        steps = job.get('steps') or []
-        idx = None
-        for i, st in enumerate(steps):
-            if isinstance(st, dict) and st.get('name', '').strip().startswith('Summarize Pester categories'):
-                idx = i
-                break
-        if idx is None:
-            continue
-        want = _mk_rerun_hint_step(default_strategy)
-        label = want['name']
-        # If it already exists anywhere in the job, normalize it; otherwise insert right after summary
-        existing = None
-        for i, st in enumerate(steps):
-            if isinstance(st, dict) and st.get('name') == label:
-                existing = i
-                break
-        if existing is not None:
-            for k in ('if', 'shell', 'env', 'run'):
-                if steps[existing].get(k) != want[k]:
-                    steps[existing][k] = want[k]
-                    changed = True
-        else:
-            steps.insert(idx + 1, want)
-            job['steps'] = steps
-            changed = True
-    return changed
+    _insert_step(steps, i, step)
+    return True
 
 
-def ensure_interactivity_probe_job(doc) -> bool:
-    """Add a lightweight 'probe' job to check interactivity on self-hosted Windows.
-    Wires outputs.ok from steps.out.outputs.ok and depends on normalize+preflight.
-    """
-    jobs = doc.get('jobs') or {}
-    if not isinstance(jobs, dict):
+def _insert_after(steps: list, anchor_name: str, step) -> bool:
+    i = _find_step_index(steps, anchor_name)
+    if i is None:
         return False
-    changed = False
-    desired_if = SQS("${{ inputs.strategy == 'single' || vars.ORCH_STRATEGY == 'single' }}")
-    desired_outputs = {
-        'ok': SQS("${{ steps.out.outputs.ok }}"),
-    }
-    desired_run = LIT(
-        "pwsh -File tools/Write-InteractivityProbe.ps1\n"
-        "$ui = [System.Environment]::UserInteractive\n"
-        "$in = $false; try { $in  = [Console]::IsInputRedirected } catch {}\n"
-        "$ok = ($ui -and -not $in)\n"
-        '$okString = if ($ok) { "true" } else { "false" }\n'
-        '"ok=$okString" | Out-File -FilePath $env:GITHUB_OUTPUT -Append -Encoding utf8\n'
-    )
-    job = {
-        'if': desired_if,
-        'runs-on': list(COMPARE_CAPABILITY_INGRESS_RUNS_ON),
-        'timeout-minutes': 2,
-        'needs': ['normalize', 'preflight'],
-        'outputs': desired_outputs,
-        'steps': [
-            {'uses': 'actions/checkout@v5'},
-            {
-                'name': 'Run interactivity probe',
-                'id': 'out',
-                'shell': 'pwsh',
-                'run': desired_run,
-            },
-        ],
-    }
-    existing = jobs.get('probe')
-    if not isinstance(existing, dict):
-        jobs['probe'] = job
-        doc['jobs'] = jobs
-        return True
-
-    if existing.get('if') != desired_if:
-        existing['if'] = desired_if
-        changed = True
-    if existing.get('runs-on') != job['runs-on']:
-        existing['runs-on'] = list(job['runs-on'])
-        changed = True
-    if existing.get('timeout-minutes') != job['timeout-minutes']:
-        existing['timeout-minutes'] = job['timeout-minutes']
-        changed = True
-    if existing.get('outputs') != desired_outputs:
-        existing['outputs'] = dict(desired_outputs)
-        changed = True
-
-    needs = existing.get('needs')
-    desired_needs = ['normalize', 'preflight']
-    if needs is None:
-        existing['needs'] = list(desired_needs)
-        changed = True
-    elif isinstance(needs, list):
-        for need in desired_needs:
-            if need not in needs:
-                needs.append(need)
-                changed = True
-    else:
-        existing['needs'] = list(desired_needs)
-        changed = True
-
-    steps = existing.setdefault('steps', [])
-    if not isinstance(steps, list):
-        existing['steps'] = list(job['steps'])
-        changed = True
-    else:
-        checkout_idx = next(
-            (i for i, st in enumerate(steps) if isinstance(st, dict) and str(st.get('uses', '')).startswith('actions/checkout@')),
-            None,
-        )
-        if checkout_idx is None:
-            steps.insert(0, {'uses': 'actions/checkout@v5'})
-            changed = True
-
-        out_idx = next((i for i, st in enumerate(steps) if isinstance(st, dict) and st.get('id') == 'out'), None)
-        desired_out = job['steps'][1]
-        if out_idx is None:
-            insert_at = next(
-                (i + 1 for i, st in enumerate(steps) if isinstance(st, dict) and str(st.get('uses', '')).startswith('actions/checkout@')),
-                len(steps),
-            )
-            steps.insert(insert_at, dict(desired_out))
-            changed = True
-        else:
-            out_step = steps[out_idx]
-            if out_step.get('name') != desired_out['name']:
-                out_step['name'] = desired_out['name']
-                changed = True
-            if out_step.get('shell') != desired_out['shell']:
-                out_step['shell'] = desired_out['shell']
-                changed = True
-            if out_step.get('run') != desired_run:
-                out_step['run'] = desired_run
-                changed = True
-
-    doc['jobs'] = jobs
-    return changed
+    _insert_step(steps, i + 1, step)
+    return True
 
 
-def _ensure_job_needs(doc, job_name: str, need: str) -> bool:
-    jobs = doc.get('jobs') or {}
-    job = jobs.get(job_name)
-    if not isinstance(job, dict):
-        return False
-    needs = job.get('needs')
-    changed = False
-    if needs is None:
-        job['needs'] = [need]
-        changed = True
-    elif isinstance(needs, list) and need not in needs:
-        needs.append(need)
-        job['needs'] = needs
-        changed = True
-    return changed
+def _find_step_index(steps: list, name: str) -> int | None:
+    return index_for(steps).first('name', name)
 
 
-def _set_job_if(doc, job_name: str, new_if: str) -> bool:
-    jobs = doc.get('jobs') or {}
-    job = jobs.get(job_name)
-    if not isinstance(job, dict):
-        return False
-    want = SQS(new_if)
-    if job.get('if') != want:
-        job['if'] = want
-        return True
-    return False
+def _has_step_named(steps: list, name: str) -> bool:
+    return index_for(steps).has('name', name)
 
 
-def _find_step_index(steps: list, name: str) -> int | None:
-    for idx, st in enumerate(steps):
-        if isinstance(st, dict) and st.get('name') == name:
-            return idx
-    return None
+def _find_step_uses_index(steps: list, prefix: str) -> int | None:
+    return index_for(steps).first_matching('uses', lambda uses: uses.startswith(prefix))
 
 
-def _find_step_uses_index(steps: list, prefix: str) -> int | None:
-    for idx, st in enumerate(steps):
-        if isinstance(st, dict) and str(st.get('uses', '')).startswith(prefix):
-            return idx
-    return None
+def _find_step_uses_suffix_index(steps: list, suffix: str) -> int | None:
+    return index_for(steps).first_matching('uses', lambda uses: uses.endswith(suffix))
 
 
 def ensure_lint_resiliency(doc, job_name: str, include_node: bool = True, markdown_non_blocking: bool = False) -> bool:
@@ -782,7 +328,7 @@ def ensure_lint_resiliency(doc, job_name: str, include_node: bool = True, markdo
     def insert_after_checkout(step_dict):
         nonlocal changed
         idx = checkout_idx + 1 if checkout_idx is not None else 0
-        steps.insert(idx, step_dict)
+        _insert_step(steps, idx, step_dict)
         changed = True
 
     # Install actionlint step
@@ -809,7 +355,7 @@ def ensure_lint_resiliency(doc, job_name: str, include_node: bool = True, markdo
     else:
         cur = steps[idx_install]
         if cur.get('shell') != 'bash' or cur.get('run') != install_step['run']:
-            steps[idx_install] = install_step
+            _replace_step(steps, idx_install, install_step)
             changed = True
 
     # Run actionlint step
@@ -822,7 +368,7 @@ def ensure_lint_resiliency(doc, job_name: str, include_node: bool = True, markdo
         # place directly after install step if possible
         idx_install = _find_step_index(steps, 'Install actionlint (retry)')
         insert_at = idx_install + 1 if idx_install is not None else (checkout_idx + 1 if checkout_idx is not None else len(steps))
-        steps.insert(insert_at, run_step)
+        _insert_step(steps, insert_at, run_step)
         changed = True
     else:
         cur = steps[idx_run]
@@ -849,12 +395,13 @@ def ensure_lint_resiliency(doc, job_name: str, include_node: bool = True, markdo
                 insert_at = _find_step_index(steps, 'Run markdownlint (scoped changed files)')
             if insert_at is None:
                 insert_at = len(steps)
-            steps.insert(insert_at, node_step)
+            _insert_step(steps, insert_at, node_step)
             changed = True
         else:
             # Ensure with block is normalized
             if steps[idx_node].get('uses') != node_step['uses']:
                 steps[idx_node]['uses'] = node_step['uses']
+                _refresh_step(steps, idx_node)
                 changed = True
             cur_with = steps[idx_node].setdefault('with', {})
             if cur_with.get('node-version') != DQS('20') or cur_with.get('cache') != DQS('npm'):
@@ -863,7 +410,7 @@ def ensure_lint_resiliency(doc, job_name: str, include_node: bool = True, markdo
 
     idx_md_install = _find_step_index(steps, 'Install markdownlint-cli (retry)')
     if idx_md_install is not None:
-        del steps[idx_md_install]
+        _delete_step(steps, idx_md_install)
         changed = True
 
     # Run markdownlint step
@@ -882,7 +429,7 @@ def ensure_lint_resiliency(doc, job_name: str, include_node: bool = True, markdo
     if idx_target is None:
         idx_target = _find_step_index(steps, scoped_name_md)
     if idx_target is None:
-        steps.append(md_run_step)
+        _insert_step(steps, len(steps), md_run_step)
         changed = True
     else:
         cur = steps[idx_target]
@@ -890,6 +437,7 @@ def ensure_lint_resiliency(doc, job_name: str, include_node: bool = True, markdo
         desired_name = scoped_name_md if preserve_scoped_name else name_md
         if cur.get('name') != desired_name:
             cur['name'] = desired_name
+            _refresh_step(steps, idx_target)
             changed = True
         if preserve_scoped_name:
             if cur.get('run') != md_run_step['run']:
@@ -913,138 +461,13 @@ def ensure_lint_resiliency(doc, job_name: str, include_node: bool = True, markdo
                     del cur['continue-on-error']
                     changed = True
             if need_update:
-                steps[idx_target] = md_run_step
+                _replace_step(steps, idx_target, md_run_step)
                 changed = True
 
     job['steps'] = steps
     return changed
 
 
-def ensure_orchestrated_drift_gate_defaults(doc) -> bool:
-    """Ensure the orchestrated lint job gates drift checks on the repository default branch."""
-    jobs = doc.get('jobs') or {}
-    lint = jobs.get('lint')
-    if not isinstance(lint, dict):
-        return False
-    steps: List[dict] = lint.get('steps') or []
-    target = None
-    for st in steps:
-        if isinstance(st, dict) and st.get('name') == 'Non-LabVIEW checks (Docker)':
-            target = st
-            break
-    if target is None:
-        return False
-    default_branch_expr = (
-        "${{ github.event.repository.default_branch || github.event.pull_request.base.repo.default_branch || "
-        "github.event.workflow_run.repository.default_branch || '' }}"
-    )
-    expected_env = {
-        'DEFAULT_BRANCH': default_branch_expr,
-    }
-    expected_body = (
-        "$params = @()\n"
-        "$defaultBranch = $env:DEFAULT_BRANCH\n"
-        "if ('${{ github.ref_name }}' -eq $defaultBranch -or '${{ github.base_ref }}' -eq $defaultBranch) {\n"
-        "  $params += '-FailOnWorkflowDrift'\n"
-        "}\n"
-        "$params += '-SkipDotnetCliBuild'\n"
-        "# Skip linting this workflow while it is executing to avoid orchestration deadlocks.\n"
-        "$params += '-ExcludeWorkflowPaths'\n"
-        "$params += '.github/workflows/ci-orchestrated.yml'\n"
-        "pwsh -File ./tools/Run-NonLVChecksInDocker.ps1 @params\n"
-    )
-    changed = False
-    if target.get('shell') != 'pwsh':
-        target['shell'] = 'pwsh'
-        changed = True
-    cur_env = target.get('env') or {}
-    if dict(cur_env) != expected_env:
-        target['env'] = expected_env
-        changed = True
-    current_run = target.get('run')
-    if not isinstance(current_run, LIT) or str(current_run) != expected_body:
-        target['run'] = LIT(expected_body)
-        changed = True
-    return changed
-
-
-def ensure_hosted_preflight(doc, job_key: str) -> bool:
-    changed = False
-    # Ensure jobs map exists
-    jobs = doc.get('jobs')
-    if not isinstance(jobs, dict):
-        doc['jobs'] = jobs = {}
-        changed = True
-    job = jobs.get(job_key)
-    if not isinstance(job, dict):
-        # Create a minimal hosted preflight job
-        job = {
-            'runs-on': 'windows-latest',
-            'timeout-minutes': 3,
-            'steps': [
-                {'uses': 'actions/checkout@v5'},
-            ],
-        }
-        jobs[job_key] = job
-        changed = True
-    # Ensure runs-on windows-latest
-    if job.get('runs-on') != 'windows-latest':
-        job['runs-on'] = 'windows-latest'
-        changed = True
-    steps = job.setdefault('steps', [])
-    # Ensure checkout exists
-    has_checkout = any(isinstance(s, dict) and str(s.get('uses', '')).startswith('actions/checkout@') for s in steps)
-    if not has_checkout:
-        steps.insert(0, {'uses': 'actions/checkout@v5'})
-        changed = True
-    # Ensure verify step exists/updated
-    idx_verify = None
-    for i, st in enumerate(steps):
-        if isinstance(st, dict) and 'Verify Windows runner' in str(st.get('name', '')):
-            idx_verify = i
-            break
-    new_step = _mk_hosted_preflight_step()
-    if idx_verify is None:
-        # Insert after checkout if present
-        insert_at = 1 if has_checkout else 0
-        steps.insert(insert_at, new_step)
-        changed = True
-    else:
-        # Update run body to canonical hosted content
-        if steps[idx_verify].get('run') != new_step['run']:
-            steps[idx_verify]['run'] = new_step['run']
-            steps[idx_verify]['shell'] = 'pwsh'
-            changed = True
-    return changed
-
-
-def ensure_session_index_post_in_pester_matrix(doc, job_key: str) -> bool:
-    changed = False
-    jobs = doc.get('jobs') or {}
-    job = jobs.get(job_key)
-    if not isinstance(job, dict):
-        return changed
-    steps = job.get('steps') or []
-    # Find if session-index-post exists
-    exists = any(isinstance(s, dict) and str(s.get('uses', '')).endswith('session-index-post') for s in steps)
-    if not exists:
-        step = {
-            'name': 'Session index post',
-            'if': SQS('${{ always() }}'),
-            'uses': './.github/actions/session-index-post',
-            'with': {
-                'results-dir': SQS('tests/results/${{ matrix.category }}'),
-                'validate-schema': True,
-                'upload': True,
-                'artifact-name': SQS('session-index-${{ matrix.category }}'),
-            },
-        }
-        steps.append(step)
-        job['steps'] = steps
-        changed = True
-    return changed
-
-
 def ensure_session_index_post_in_job(doc, job_key: str, results_dir: str, artifact_name: str) -> bool:
     changed = False
     jobs = doc.get('jobs') or {}
@@ -1052,7 +475,7 @@ def ensure_session_index_post_in_job(doc, job_key: str, results_dir: str, artifa
     if not isinstance(job, dict):
         return changed
     steps = job.get('steps') or []
-    exists = any(isinstance(s, dict) and str(s.get('uses', '')).endswith('session-index-post') for s in steps)
+    exists = _find_step_uses_suffix_index(steps, 'session-index-post') is not None
     if not exists:
         step = {
             'name': 'Session index post (best-effort)',
@@ -1065,7 +488,7 @@ def ensure_session_index_post_in_job(doc, job_key: str, results_dir: str, artifa
                 'artifact-name': artifact_name,
             },
         }
-        steps.append(step)
+        _insert_step(steps, len(steps), step)
         job['steps'] = steps
         changed = True
     return changed
@@ -1078,7 +501,7 @@ def ensure_runner_unblock_guard(doc, job_key: str, snapshot_path: str) -> bool:
         return changed
     steps = job.get('steps') or []
     # Check if guard exists
-    exists = any(isinstance(s, dict) and str(s.get('uses', '')).endswith('runner-unblock-guard') for s in steps)
+    exists = _find_step_uses_suffix_index(steps, 'runner-unblock-guard') is not None
     if not exists:
         step = {
             'name': 'Runner Unblock Guard',
@@ -1090,364 +513,1033 @@ def ensure_runner_unblock_guard(doc, job_key: str, snapshot_path: str) -> bool:
                 'process-names': 'conhost,pwsh,LabVIEW,LVCompare',
             },
         }
-        steps.append(step)
+        _insert_step(steps, len(steps), step)
         job['steps'] = steps
         changed = True
     return changed
 
 
-def _ensure_job_concurrency(doc, job_key: str, group: str, cancel_in_progress: bool) -> bool:
-    changed = False
-    jobs = doc.get('jobs') or {}
-    job = jobs.get(job_key)
-    if not isinstance(job, dict):
-        return changed
-    want = {
-        'group': group,
-        'cancel-in-progress': cancel_in_progress,
-    }
-    cur = job.get('concurrency')
-    if cur != want:
-        job['concurrency'] = want
-        changed = True
-    return changed
+def _is_reusable_workflow_job(doc, job_key: str) -> bool:
+    try:
+        jobs = doc.get('jobs') or {}
+        j = jobs.get(job_key)
+        return isinstance(j, dict) and 'uses' in j and isinstance(j.get('uses'), str)
+    except Exception:
+        return False
 
 
-def _mk_wire_probe_step(phase: str, results_dir: str = 'results/fixture-drift') -> dict:
-    return {
-        'name': f'Wire Probe ({phase})',
-        'uses': './.github/actions/wire-probe',
-        'with': {
-            'phase': phase,
-            'results-dir': results_dir,
-        },
-    }
+def ensure_pester_integration_wiring(doc) -> bool:
+    """Session index post + unblock guard for the integration job, unless it calls a reusable workflow."""
+    # Do not inject steps into a reusable workflow job (uses: ...)
+    if _is_reusable_workflow_job(doc, 'pester-integration'):
+        return False
+    c10 = ensure_session_index_post_in_job(doc, 'pester-integration', 'tests/results', 'pester-integration-session-index')
+    g5 = ensure_runner_unblock_guard(doc, 'pester-integration', 'tests/results/runner-unblock-snapshot.json')
+    return c10 or g5
 
 
-def _mk_lv_guard_pre_step() -> dict:
-    return {
-        'name': 'LV Guard (pre)',
-        'uses': './.github/actions/runner-unblock-guard',
-        'with': {
-            'snapshot-path': 'results/fixture-drift/lv-guard-pre.json',
-            'cleanup': DQS("${{ env.CLEAN_LV_BEFORE == 'true' }}"),
-            'process-names': 'LVCompare,LabVIEW',
-        },
-    }
+def ensure_reusable_preflight_guard(doc) -> bool:
+    """Add a Runner Unblock Guard to the reusable preflight job with cleanup gating."""
+    try:
+        jobs = doc.get('jobs') or {}
+        job = jobs.get('preflight')
+        if not isinstance(job, dict):
+            return False
+        steps = job.setdefault('steps', [])
+        insert_at = 1 if steps and isinstance(steps[0], dict) and str(steps[0].get('uses','')).startswith('actions/checkout') else 0
+        has_guard = _find_step_uses_suffix_index(steps, 'runner-unblock-guard') is not None
+        if has_guard:
+            return False
+        guard = {
+            'name': 'Runner Unblock Guard (preflight)',
+            'uses': './.github/actions/runner-unblock-guard',
+            'with': {
+                'snapshot-path': 'tests/results/runner-unblock-snapshot.json',
+                'cleanup': DQS("${{ env.CLEAN_LV_BEFORE == 'true' }}"),
+                'process-names': 'LabVIEW,LVCompare',
+            },
+        }
+        _insert_step(steps, insert_at, guard)
+        job['steps'] = steps
+        return True
+    except Exception:
+        return False
 
 
-def _mk_wire_guard_pre_step() -> dict:
-    return {
-        'name': 'Wire Guard (pre)',
-        'uses': './.github/actions/wire-guard-pre',
-        'with': {
-            'results-dir': 'results/fixture-drift',
-        },
-    }
+class TransformSpec(NamedTuple):
+    """One registry entry.
 
+    files/doc_names route the transform (fnmatch patterns on the file name, or
+    exact top-level `name:` values). anchors are raw-text tokens at least one
+    of which must be present for the transform to have any effect; None means
+    it can create content unconditionally. after names transforms that must
+    run first. module is imported only when a plan needs the transform.
+    job_hook names the per-job form of func in the same module (see
+    `_job_visitor`); contiguous job-hook specs share one walk over the jobs.
+    """
+    name: str
+    func: str
+    module: str | None = None
+    files: tuple[str, ...] = ()
+    doc_names: tuple[str, ...] = ()
+    args: tuple = ()
+    anchors: tuple[str, ...] | None = None
+    after: tuple[str, ...] = ()
+    job_hook: str | None = None
+
+
+_PESTER_DOC_NAMES = ('Pester (self-hosted)', 'Pester (integration)')
+_ORCH = '_transforms_orchestrated'
+_WIRE = '_transforms_wire'
+_MATRIX_SNAPSHOT = 'tests/results/${{ matrix.category }}/runner-unblock-snapshot.json'
+# The probes go after checkout, and existing ones are re-placed (or removed
+# when there is no checkout), so either is reason to run.
+_WIRE_PROBE_ANCHORS = ('actions/checkout@', 'Wire Probe (J1)', 'Wire Probe (J2)')
+
+# Registration order is the application order within a plan; `after` edges are
+# validated against it. ci-orchestrated-v2.yml is a deprecated manual stub and
+# intentionally has no routes.
+TRANSFORMS: tuple[TransformSpec, ...] = (
+    TransformSpec('pester.force-run-input', 'ensure_force_run_input',
+                  files=('pester-selfhosted.yml',), doc_names=_PESTER_DOC_NAMES, anchors=('workflow_dispatch',)),
+    TransformSpec('pester.preinit-force-run-outputs', 'ensure_preinit_force_run_outputs',
+                  files=('pester-selfhosted.yml',), doc_names=_PESTER_DOC_NAMES, anchors=('pre-init',)),
+    TransformSpec('fixture-drift.session-index-post', 'ensure_session_index_post_in_job',
+                  files=('fixture-drift.yml',), args=('validate-windows', 'results/fixture-drift', 'fixture-drift-session-index'),
+                  anchors=('validate-windows',)),
+    TransformSpec('fixture-drift.long-wire', 'ensure_long_wire_fixture_drift_windows', module='_transforms_fixture_drift',
+                  files=('fixture-drift.yml',), anchors=('validate-windows',), after=('fixture-drift.session-index-post',)),
+    TransformSpec('hosted.normalize-preflight-steps', 'normalize_hosted_preflight_steps',
+                  files=('*',), anchors=(HOSTED_PREFLIGHT_STEP_NAME, HOSTED_NOTICE_STEP_NAME)),
+    TransformSpec('orchestrated.hosted-preflight', 'ensure_hosted_preflight', module=_ORCH,
+                  files=('ci-orchestrated.yml',), args=('preflight',), after=('hosted.normalize-preflight-steps',)),
+    TransformSpec('orchestrated.session-index-post.pester', 'ensure_session_index_post_in_pester_matrix', module=_ORCH,
+                  files=('ci-orchestrated.yml',), args=('pester',), anchors=('pester',)),
+    TransformSpec('orchestrated.session-index-post.pester-category', 'ensure_session_index_post_in_pester_matrix', module=_ORCH,
+                  files=('ci-orchestrated.yml',), args=('pester-category',), anchors=('pester-category',)),
+    TransformSpec('orchestrated.unblock-guard.drift', 'ensure_runner_unblock_guard',
+                  files=('ci-orchestrated.yml',), args=('drift', 'results/fixture-drift/runner-unblock-snapshot.json'), anchors=('drift',)),
+    TransformSpec('orchestrated.unblock-guard.pester', 'ensure_runner_unblock_guard',
+                  files=('ci-orchestrated.yml',), args=('pester', _MATRIX_SNAPSHOT), anchors=('pester',)),
+    TransformSpec('orchestrated.unblock-guard.pester-category', 'ensure_runner_unblock_guard',
+                  files=('ci-orchestrated.yml',), args=('pester-category', _MATRIX_SNAPSHOT), anchors=('pester-category',)),
+    TransformSpec('orchestrated.rerun-hint.summary', 'ensure_rerun_hint_after_summary', module=_ORCH,
+                  files=('ci-orchestrated.yml',), args=('matrix',), anchors=('Summarize Pester categories',)),
+    TransformSpec('orchestrated.rerun-hint.windows-single', 'ensure_rerun_hint_in_job', module=_ORCH,
+                  files=('ci-orchestrated.yml',), args=('windows-single', 'single'), anchors=('windows-single',),
+                  after=('orchestrated.rerun-hint.summary',)),
+    TransformSpec('orchestrated.rerun-hint.publish', 'ensure_rerun_hint_in_job', module=_ORCH,
+                  files=('ci-orchestrated.yml',), args=('publish', 'matrix'), anchors=('publish',),
+                  after=('orchestrated.rerun-hint.summary',)),
+    TransformSpec('orchestrated.interactivity-probe', 'ensure_interactivity_probe_job', module=_ORCH,
+                  files=('ci-orchestrated.yml',)),
+    TransformSpec('orchestrated.strategy-gates', 'ensure_orchestrated_strategy_gates', module=_ORCH,
+                  files=('ci-orchestrated.yml',), anchors=('windows-single', 'pester-category'),
+                  after=('orchestrated.interactivity-probe',)),
+    TransformSpec('orchestrated.lint-resiliency', 'ensure_lint_resiliency',
+                  files=('ci-orchestrated.yml',), args=('lint', True), anchors=('lint',)),
+    TransformSpec('orchestrated.drift-gate-defaults', 'ensure_orchestrated_drift_gate_defaults', module=_ORCH,
+                  files=('ci-orchestrated.yml',), anchors=('Non-LabVIEW checks (Docker)',), after=('orchestrated.lint-resiliency',)),
+    TransformSpec('orchestrated.wire.probes', 'ensure_wire_probes_all_jobs', module=_WIRE, job_hook='_wire_probes_job',
+                  files=('ci-orchestrated.yml',), args=('tests/results',), anchors=_WIRE_PROBE_ANCHORS,
+                  after=('orchestrated.hosted-preflight', 'orchestrated.lint-resiliency')),
+    TransformSpec('orchestrated.wire.S1', 'ensure_wire_S1_before_session_index', module=_WIRE, job_hook='_wire_S1_job',
+                  files=('ci-orchestrated.yml',), anchors=('Session index post',),
+                  after=('orchestrated.session-index-post.pester', 'orchestrated.session-index-post.pester-category')),
+    TransformSpec('orchestrated.wire.T1', 'ensure_wire_T1_for_tests', module=_ORCH, job_hook='_wire_T1_job',
+                  files=('ci-orchestrated.yml',),
+                  anchors=('Run Pester tests via local dispatcher (category)', 'Pester categories (serial, deterministic)')),
+    TransformSpec('orchestrated.wire.C1C2', 'ensure_wire_C1C2_around_drift', module=_ORCH, job_hook='_wire_C1C2_job',
+                  files=('ci-orchestrated.yml',), anchors=('/fixture-drift',)),
+    TransformSpec('orchestrated.wire.I1I2', 'ensure_wire_I1I2_invoker', module=_ORCH, job_hook='_wire_I1I2_job',
+                  files=('ci-orchestrated.yml',), anchors=('Ensure Invoker (start)', 'Ensure Invoker (stop)')),
+    TransformSpec('orchestrated.wire.G0G1', 'ensure_wire_G0G1_guard', module=_ORCH, job_hook='_wire_G0G1_job',
+                  files=('ci-orchestrated.yml',), anchors=('Runner Unblock Guard', 'runner-unblock-guard'),
+                  after=('orchestrated.unblock-guard.drift', 'orchestrated.unblock-guard.pester', 'orchestrated.unblock-guard.pester-category')),
+    TransformSpec('orchestrated.wire.P1', 'ensure_wire_P1_after_final', module=_ORCH, job_hook='_wire_P1_job',
+                  files=('ci-orchestrated.yml',), anchors=('Append final summary (single)', 'Summarize orchestrated run')),
+    TransformSpec('pester-integration.wiring', 'ensure_pester_integration_wiring',
+                  files=('pester-integration-on-label.yml',), anchors=('pester-integration',)),
+    TransformSpec('smoke.session-index-post', 'ensure_session_index_post_in_job',
+                  files=('smoke.yml',), args=('compare', 'tests/results', 'smoke-session-index'), anchors=('compare',)),
+    TransformSpec('smoke.unblock-guard', 'ensure_runner_unblock_guard',
+                  files=('smoke.yml',), args=('compare', 'tests/results/runner-unblock-snapshot.json'), anchors=('compare',)),
+    TransformSpec('compare-artifacts.session-index-post', 'ensure_session_index_post_in_job',
+                  files=('compare-artifacts.yml',), args=('publish', 'tests/results', 'compare-session-index'), anchors=('publish',)),
+    TransformSpec('compare-artifacts.unblock-guard', 'ensure_runner_unblock_guard',
+                  files=('compare-artifacts.yml',), args=('publish', 'tests/results/runner-unblock-snapshot.json'), anchors=('publish',)),
+    TransformSpec('pester-reusable.preflight-guard', 'ensure_reusable_preflight_guard',
+                  files=('pester-reusable.yml',), anchors=('preflight',)),
+    TransformSpec('validate.lint-resiliency', 'ensure_lint_resiliency',
+                  files=('validate.yml',), args=('lint', True), anchors=('lint',)),
+    TransformSpec('validate.wire.probes', 'ensure_wire_probes_all_jobs', module=_WIRE, job_hook='_wire_probes_job',
+                  files=('validate.yml',), args=('tests/results',), anchors=_WIRE_PROBE_ANCHORS,
+                  after=('validate.lint-resiliency',)),
+    TransformSpec('validate.wire.S1', 'ensure_wire_S1_before_session_index', module=_WIRE, job_hook='_wire_S1_job',
+                  files=('validate.yml',), anchors=('Session index post',)),
+)
+
+# Transforms that moved into group modules stay importable from here.
+_LAZY_EXPORTS = {
+    'ensure_wire_probes_all_jobs': _WIRE,
+    'ensure_wire_S1_before_session_index': _WIRE,
+    'ensure_long_wire_fixture_drift_windows': '_transforms_fixture_drift',
+    **{
+        name: _ORCH for name in (
+            'COMPARE_CAPABILITY_INGRESS_RUNS_ON',
+            'ensure_hosted_preflight',
+            'ensure_session_index_post_in_pester_matrix',
+            'ensure_rerun_hint_in_job',
+            'ensure_rerun_hint_after_summary',
+            'ensure_interactivity_probe_job',
+            'ensure_orchestrated_strategy_gates',
+            'ensure_orchestrated_drift_gate_defaults',
+            'ensure_wire_T1_for_tests',
+            'ensure_wire_C1C2_around_drift',
+            'ensure_wire_I1I2_invoker',
+            'ensure_wire_G0G1_guard',
+            'ensure_wire_P1_after_final',
+        )
+    },
+}
 
-def _mk_wire_guard_post_step() -> dict:
-    return {
-        'name': 'Wire Guard (post)',
-        'uses': './.github/actions/wire-guard-post',
-        'with': {
-            'results-dir': 'results/fixture-drift',
-        },
-    }
 
+def __getattr__(name: str):
+    if name == 'yaml':
+        return _yaml()
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    return getattr(import_module(module), name)
 
-def _mk_warmup_step() -> dict:
-    return {
-        'name': 'LabVIEW warmup (best-effort)',
-        'shell': 'pwsh',
-        'run': LIT('pwsh -File tools/Warmup-LabVIEWRuntime.ps1\n'),
-    }
 
+def _spec_routes(spec: TransformSpec, file_name: str, doc_name: object) -> bool:
+    if any(fnmatchcase(file_name, pattern) for pattern in spec.files):
+        return True
+    return isinstance(doc_name, str) and doc_name in spec.doc_names
+
+
+def _order_plan(specs: list[TransformSpec]) -> tuple[TransformSpec, ...]:
+    """Stable topological order: registration order, constrained by `after`."""
+    names = {spec.name for spec in specs}
+    done: set[str] = set()
+    ordered: list[TransformSpec] = []
+    pending = list(specs)
+    while pending:
+        for i, spec in enumerate(pending):
+            if all(dep in done or dep not in names for dep in spec.after):
+                ordered.append(pending.pop(i))
+                done.add(spec.name)
+                break
+        else:
+            raise RuntimeError(f"transform dependency cycle among: {', '.join(s.name for s in pending)}")
+    return tuple(ordered)
 
-def _mk_wire_invoker_start_step() -> dict:
-    return {
-        'name': 'Wire Invoker (start)',
-        'uses': './.github/actions/wire-invoker-start',
-        'with': {
-            'results-dir': 'results/fixture-drift',
-        },
-    }
 
-
-def _mk_wire_invoker_stop_step() -> dict:
-    return {
-        'name': 'Wire Invoker (stop)',
-        'uses': './.github/actions/wire-invoker-stop',
-        'with': {
-            'results-dir': 'results/fixture-drift',
-        },
-    }
+@lru_cache(maxsize=None)
+def transform_plan(file_name: str, doc_name: object = '') -> tuple[TransformSpec, ...]:
+    """The ordered transforms routed to a file, computed once per (file name, workflow name)."""
+    return _order_plan([spec for spec in TRANSFORMS if _spec_routes(spec, file_name, doc_name)])
 
 
-def _mk_wire_session_index_step() -> dict:
-    return {
-        'name': 'Wire Session Index (S1)',
-        'if': SQS('${{ always() }}'),
-        'uses': './.github/actions/wire-session-index',
-        'with': {
-            'results-dir': 'results/fixture-drift',
-        },
-    }
+@lru_cache(maxsize=None)
+def _resolve_transform(module: str | None, func: str) -> Callable[..., bool]:
+    if module is None:
+        return globals()[func]
+    return getattr(import_module(module), func)
 
 
-def _step_exists(steps: list, predicate) -> bool:
-    for st in steps:
-        try:
-            if predicate(st):
-                return True
-        except Exception:
+def prefilter_may_apply(file_name: str, text: str) -> bool:
+    """Cheap substring scan: False only when no routed transform can affect the text."""
+    doc_names = [name for spec in TRANSFORMS for name in spec.doc_names if name in text]
+    for spec in TRANSFORMS:
+        routed = any(fnmatchcase(file_name, pattern) for pattern in spec.files) or any(name in spec.doc_names for name in doc_names)
+        if not routed:
             continue
+        if spec.anchors is None or any(anchor in text for anchor in spec.anchors):
+            return True
     return False
 
 
-def _insert_step_relative(steps: list, anchor_name: str, new_step: dict, where: str = 'after') -> bool:
-    """Insert new_step relative to the first step with name==anchor_name.
-    where: 'before' or 'after'
-    """
-    for idx, st in enumerate(steps):
-        if isinstance(st, dict) and st.get('name') == anchor_name:
-            insert_at = idx if where == 'before' else idx + 1
-            steps.insert(insert_at, new_step)
-            return True
-    return False
+def _phase(profile, name: str):
+    """profile.phase(name) when profiling (see `_profile`), else a no-op context."""
+    return contextlib.nullcontext({}) if profile is None else profile.phase(name)
 
 
-def ensure_long_wire_fixture_drift_windows(doc) -> bool:
-    changed = False
-    jobs = doc.get('jobs') or {}
-    job = jobs.get('validate-windows')
-    if not isinstance(job, dict):
-        return changed
-    # job-level serialization
-    c0 = _ensure_job_concurrency(doc, 'validate-windows', 'lv-fixture-win', False)
-    changed = changed or c0
-    steps = job.setdefault('steps', [])
+@lru_cache(maxsize=None)
+def _fused_runs(plan: tuple[TransformSpec, ...]) -> tuple[tuple[TransformSpec, ...], ...]:
+    """`plan` split into steps: each maximal run of job-hook specs, every other spec alone."""
+    runs: list[list[TransformSpec]] = []
+    for spec in plan:
+        if spec.job_hook is not None and runs and runs[-1][-1].job_hook is not None:
+            runs[-1].append(spec)
+        else:
+            runs.append([spec])
+    return tuple(tuple(run) for run in runs)
 
-    # Ensure J1 before checkout and J2 after checkout
-    checkout_idx = next((i for i, s in enumerate(steps) if isinstance(s, dict) and str(s.get('uses','')).startswith('actions/checkout@')), None)
-    if checkout_idx is not None:
-        # J1
-        if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Probe (J1)'):
-            steps.insert(checkout_idx, _mk_wire_probe_step('J1'))
-            changed = True
-            checkout_idx += 1  # shift due to insertion
-        # J2
-        if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Probe (J2)'):
-            steps.insert(checkout_idx + 1, _mk_wire_probe_step('J2'))
-            changed = True
 
-    # After docs-only detection: LV Guard (pre), Wire Guard (pre), Warmup, Wire Invoker (start)
-    anchor = 'Detect docs-only change'
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'LV Guard (pre)'):
-        if _insert_step_relative(steps, anchor, _mk_lv_guard_pre_step(), 'after'):
-            changed = True
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Guard (pre)'):
-        if _insert_step_relative(steps, anchor, _mk_wire_guard_pre_step(), 'after'):
-            changed = True
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'LabVIEW warmup (best-effort)'):
-        if _insert_step_relative(steps, anchor, _mk_warmup_step(), 'after'):
-            changed = True
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Invoker (start)'):
-        if _insert_step_relative(steps, anchor, _mk_wire_invoker_start_step(), 'after'):
-            changed = True
+def _hooks_key(run: tuple[TransformSpec, ...]) -> str:
+    return '\0'.join(f'{spec.name}{spec.args!r}' for spec in run)
 
-    # C1 before orchestrator, C2 after orchestrator
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Probe (C1)'):
-        if _insert_step_relative(steps, 'Fixture Drift Orchestrator', _mk_wire_probe_step('C1'), 'before'):
-            changed = True
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Probe (C2)'):
-        if _insert_step_relative(steps, 'Fixture Drift Orchestrator', _mk_wire_probe_step('C2'), 'after'):
-            changed = True
 
-    # After Verify fixture step: C3 and V1
-    ver_name = 'Verify fixture vs LVCompare (notice-only)'
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Probe (C3)'):
-        if _insert_step_relative(steps, ver_name, _mk_wire_probe_step('C3'), 'after'):
-            changed = True
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Probe (V1)'):
-        if _insert_step_relative(steps, ver_name, _mk_wire_probe_step('V1'), 'after'):
-            changed = True
+def run_plan(doc, plan: tuple[TransformSpec, ...], profile=None, fuse: bool = True, memo=None) -> bool:
+    """Apply `plan` in order; True when any transform reported a change.
 
-    # Ensure wire session index S1 before session-index-post
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('uses','') == './.github/actions/wire-session-index'):
-        # Insert before Session index post (best-effort)
-        if _insert_step_relative(steps, 'Session index post (best-effort)', _mk_wire_session_index_step(), 'before'):
+    Runs of job-hook specs share one walk over the jobs (`_job_visitor`)
+    unless fuse=False or a journal or profile needs per-transform records.
+    `memo` is an optional `_job_memo.JobMemo` consulted by those walks.
+    """
+    changed = False
+    journal = active_journal()
+    if fuse and journal is None and profile is None:
+        from _job_visitor import visit_jobs
+        for run in _fused_runs(plan):
+            if run[0].job_hook is not None and (len(run) > 1 or memo is not None):
+                hooks = [(_resolve_transform(spec.module, spec.job_hook), spec.args) for spec in run]
+                if any(visit_jobs(doc, hooks, memo, _hooks_key(run))):
+                    changed = True
+            elif _resolve_transform(run[0].module, run[0].func)(doc, *run[0].args):
+                changed = True
+        return changed
+    for spec in plan:
+        transform = _resolve_transform(spec.module, spec.func)
+        with journal.transform(spec.name) if journal is not None else contextlib.nullcontext():
+            if profile is None:
+                result = transform(doc, *spec.args)
+            else:
+                with profile.phase(f'transform:{spec.name}') as record:
+                    result = transform(doc, *spec.args)
+                    record['changed'] = bool(result)
+        if result:
             changed = True
+    return changed
 
-    # After Runner Unblock Guard, add Wire Invoker (stop)
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Invoker (stop)'):
-        if _insert_step_relative(steps, 'Runner Unblock Guard', _mk_wire_invoker_stop_step(), 'after'):
-            changed = True
 
-    # After Ensure Invoker (stop), add P1
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('name') == 'Wire Probe (P1)'):
-        if _insert_step_relative(steps, 'Ensure Invoker (stop)', _mk_wire_probe_step('P1'), 'after'):
-            changed = True
+_MERGE_KEY = re.compile(r'^[ \t-]*<<[ \t]*:', re.MULTILINE)
 
-    # After LV Guard (post), add wire-guard-post
-    if not _step_exists(steps, lambda s: isinstance(s, dict) and s.get('uses','') == './.github/actions/wire-guard-post'):
-        if _insert_step_relative(steps, 'LV Guard (post)', _mk_wire_guard_post_step(), 'after'):
-            changed = True
 
-    job['steps'] = steps
-    jobs['validate-windows'] = job
-    doc['jobs'] = jobs
-    return changed
+def fast_check_may_change(file_name: str, text: str) -> bool:
+    """Run the routed transforms over a C-loaded plain copy of `text`.
 
+    False means no transform reports a change, so the round-trip path would
+    return the text unchanged. Anything the plain structure cannot model
+    faithfully answers True and is left to the round-trip path.
+    """
+    if '<<' in text and _MERGE_KEY.search(text):
+        # The safe loader expands merge keys; the round-trip loader keeps them.
+        return True
+    try:
+        from _fast_check import load_plain
+        doc = load_plain(text)
+        if not isinstance(doc, dict):
+            return True
+        doc_name = doc.get('name', '')
+        with indexed(doc):
+            return run_plan(doc, transform_plan(file_name, doc_name if isinstance(doc_name, str) else ''))
+    except Exception:
+        return True
 
-def apply_transforms(path: Path) -> tuple[bool, str]:
-    orig = path.read_text(encoding='utf-8')
-    doc = load_yaml(path)
-    changed = False
-    name = doc.get('name', '')
-    # Only transform self-hosted Pester workflow here
-    if name in ('Pester (self-hosted)', 'Pester (integration)') or path.name == 'pester-selfhosted.yml':
-        c1 = ensure_force_run_input(doc)
-        c2 = ensure_preinit_force_run_outputs(doc)
-        changed = c1 or c2
-        # Hosted preflight note for self-hosted preflight lives in separate workflows; skip here.
-    # fixture-drift.yml session index post in validate-windows
-    if path.name == 'fixture-drift.yml':
-        c5 = ensure_session_index_post_in_job(doc, 'validate-windows', 'results/fixture-drift', 'fixture-drift-session-index')
-        lw = ensure_long_wire_fixture_drift_windows(doc)
-        changed = changed or c5 or lw
-    # Normalize hosted preflight steps across any workflow
-    c_global = normalize_hosted_preflight_steps(doc)
-    changed = changed or c_global
-    # ci-orchestrated.yml hosted preflight + pester matrix session index post + rerun hints + interactivity probe wiring
-    if path.name == 'ci-orchestrated.yml':
-        c5 = ensure_hosted_preflight(doc, 'preflight')
-        # The matrix job may be named 'pester' or 'pester-category'; try both
-        c6 = ensure_session_index_post_in_pester_matrix(doc, 'pester')
-        c7 = ensure_session_index_post_in_pester_matrix(doc, 'pester-category')
-        # Guard normalization
-        g1 = ensure_runner_unblock_guard(doc, 'drift', 'results/fixture-drift/runner-unblock-snapshot.json')
-        g2 = ensure_runner_unblock_guard(doc, 'pester', 'tests/results/${{ matrix.category }}/runner-unblock-snapshot.json')
-        g3 = ensure_runner_unblock_guard(doc, 'pester-category', 'tests/results/${{ matrix.category }}/runner-unblock-snapshot.json')
-        # Rerun hints across jobs
-        r1 = ensure_rerun_hint_after_summary(doc, 'matrix')
-        r2 = ensure_rerun_hint_in_job(doc, 'windows-single', 'single')
-        r3 = ensure_rerun_hint_in_job(doc, 'publish', 'matrix')
-        # Interactivity probe job + gating
-        p1 = ensure_interactivity_probe_job(doc)
-        # windows-single needs probe and requires ok==true
-        w_if = "${{ (inputs.strategy == 'single' || vars.ORCH_STRATEGY == 'single') && needs.probe.outputs.ok == 'true' }}"
-        w1 = _set_job_if(doc, 'windows-single', w_if)
-        w2 = _ensure_job_needs(doc, 'windows-single', 'probe')
-        # pester-category runs matrix or fallback when single is requested but probe is false
-        pc_if = "${{ inputs.strategy == 'matrix' || vars.ORCH_STRATEGY == 'matrix' || (inputs.strategy == '' && vars.ORCH_STRATEGY == '') || (inputs.strategy == 'single' && needs.probe.outputs.ok == 'false') }}"
-        pc1 = _set_job_if(doc, 'pester-category', pc_if)
-        pc2 = _ensure_job_needs(doc, 'pester-category', 'probe')
-        lr1 = ensure_lint_resiliency(doc, 'lint', include_node=True)
-        dg = ensure_orchestrated_drift_gate_defaults(doc)
-        wp = ensure_wire_probes_all_jobs(doc, 'tests/results')
-        s1 = ensure_wire_S1_before_session_index(doc)
-        t1 = ensure_wire_T1_for_tests(doc)
-        cdrift = ensure_wire_C1C2_around_drift(doc)
-        i12 = ensure_wire_I1I2_invoker(doc)
-        gg = ensure_wire_G0G1_guard(doc)
-        p1f = ensure_wire_P1_after_final(doc)
-        changed = changed or c5 or c6 or c7 or g1 or g2 or g3 or r1 or r2 or r3 or p1 or w1 or w2 or pc1 or pc2 or lr1 or dg or wp or s1 or t1 or cdrift or i12 or gg or p1f
-    # Skip transforms for deprecated ci-orchestrated-v2.yml (kept as a stub/manual only)
-    if path.name == 'ci-orchestrated-v2.yml':
-        pass
-    # pester-integration-on-label.yml: ensure session index post in integration job
-    if path.name == 'pester-integration-on-label.yml':
-        # Do not inject steps into a reusable workflow job (uses: ...)
-        try:
-            jobs = doc.get('jobs') or {}
-            j = jobs.get('pester-integration')
-            is_reusable = isinstance(j, dict) and 'uses' in j and isinstance(j.get('uses'), str)
-        except Exception:
-            is_reusable = False
-        if not is_reusable:
-            c10 = ensure_session_index_post_in_job(doc, 'pester-integration', 'tests/results', 'pester-integration-session-index')
-            g5 = ensure_runner_unblock_guard(doc, 'pester-integration', 'tests/results/runner-unblock-snapshot.json')
-            changed = changed or c10 or g5
-    # smoke.yml: ensure session index post
-    if path.name == 'smoke.yml':
-        c11 = ensure_session_index_post_in_job(doc, 'compare', 'tests/results', 'smoke-session-index')
-        g6 = ensure_runner_unblock_guard(doc, 'compare', 'tests/results/runner-unblock-snapshot.json')
-        changed = changed or c11 or g6
-    if path.name == 'compare-artifacts.yml':
-        c12 = ensure_session_index_post_in_job(doc, 'publish', 'tests/results', 'compare-session-index')
-        g7 = ensure_runner_unblock_guard(doc, 'publish', 'tests/results/runner-unblock-snapshot.json')
-        changed = changed or c12 or g7
-    # pester-reusable.yml: add a Runner Unblock Guard to preflight with cleanup gating
-    if path.name == 'pester-reusable.yml':
-        try:
-            jobs = doc.get('jobs') or {}
-            job = jobs.get('preflight')
-            if isinstance(job, dict):
-                steps = job.setdefault('steps', [])
-                insert_at = 1 if steps and isinstance(steps[0], dict) and str(steps[0].get('uses','')).startswith('actions/checkout') else 0
-                has_guard = any(isinstance(st, dict) and str(st.get('uses','')).endswith('runner-unblock-guard') for st in steps)
-                if not has_guard:
-                    guard = {
-                        'name': 'Runner Unblock Guard (preflight)',
-                        'uses': './.github/actions/runner-unblock-guard',
-                        'with': {
-                            'snapshot-path': 'tests/results/runner-unblock-snapshot.json',
-                            'cleanup': DQS("${{ env.CLEAN_LV_BEFORE == 'true' }}"),
-                            'process-names': 'LabVIEW,LVCompare',
-                        },
-                    }
-                    steps.insert(insert_at, guard)
-                    job['steps'] = steps
-                    changed = True
-        except Exception:
-            pass
-    if path.name == 'validate.yml':
-        lr2 = ensure_lint_resiliency(doc, 'lint', include_node=True)
-        wp2 = ensure_wire_probes_all_jobs(doc, 'tests/results')
-        s12 = ensure_wire_S1_before_session_index(doc)
-        changed = changed or lr2 or wp2 or s12
+
+def apply_transforms(
+    path: Path,
+    splice: bool = False,
+    fast_check: bool = False,
+    journal: list | None = None,
+    fail_fast: bool = False,
+    limits: Limits | None = None,
+    memo=None,
+    text: str | None = None,
+) -> tuple[bool, str | None]:
+    """transform_text over `path`; `text` is its content when the caller already read it."""
+    return transform_text(
+        path,
+        path.read_text(encoding='utf-8') if text is None else text,
+        splice=splice,
+        fast_check=fast_check,
+        journal=journal,
+        fail_fast=fail_fast,
+        limits=limits,
+        memo=memo,
+    )
 
 
+def transform_text(
+    path: Path,
+    orig: str,
+    prefilter: bool = True,
+    splice: bool = False,
+    profile=None,
+    fast_check: bool = False,
+    journal: list | None = None,
+    fail_fast: bool = False,
+    limits: Limits | None = None,
+    memo=None,
+) -> tuple[bool, str | None]:
+    """Run the transforms routed to `path` over `orig`; returns (changed, text).
+
+    With splice=True only the job blocks that changed are re-emitted into
+    `orig` (see `_splice`); other changes fall back to a full dump. With
+    fast_check=True files the C-loaded plain pass clears skip the round-trip
+    entirely. A transform that reports a change but leaves the `_merkle` root
+    digest where it was costs no dump. `profile` is an optional `_profile.FileProfile` that receives
+    per-phase records. `journal`, when given, is extended with the mutation
+    records of `_journal`; with fail_fast=True the first recorded mutation
+    ends the run and (True, None) is returned without dumping. `limits`
+    (see `_limits`) raises LimitExceeded for oversized or over-nested input
+    before it reaches the round-trip loader. `memo` is an optional
+    `_job_memo.JobMemo` of per-job outcomes for the round-trip pass.
+    A prefiltered file still gets one event pass, so malformed input fails
+    instead of passing as unchanged.
+    """
+    if limits is not None:
+        check_size(orig, limits)
+    if prefilter:
+        with _phase(profile, 'prefilter'):
+            may_apply = prefilter_may_apply(path.name, orig)
+        if not may_apply:
+            with _phase(profile, 'validate'):
+                check_well_formed(orig)
+            return False, orig
+    if fast_check:
+        with _phase(profile, 'fast-check'):
+            may_change = fast_check_may_change(path.name, orig)
+        if not may_change:
+            return False, orig
+    if limits is not None:
+        with _phase(profile, 'limits'):
+            check_structure(orig, limits)
+    with _phase(profile, 'parse'):
+        doc = _yaml().load(orig)
+    doc_name = doc.get('name', '')
+    with _phase(profile, 'digest'):
+        before = (snapshot_jobs(doc) if splice else None) or digest_document(doc)
+    recording = journaling(doc, fail_fast) if journal is not None or fail_fast else contextlib.nullcontext()
+    with indexed(doc), recording as recorder:
+        try:
+            changed = run_plan(doc, transform_plan(path.name, doc_name if isinstance(doc_name, str) else ''), profile, memo=memo)
+        except FirstMutation:
+            changed = None
+    if journal is not None and recorder is not None:
+        journal.extend(recorder.records)
+    if changed is None:
+        return True, None
     if changed:
-        new = dump_yaml(doc)
-        if new == orig:
+        with _phase(profile, 'digest'):
+            after = digest_document(doc)
+        if after.root == before.root:
+            # The transforms put back exactly what was loaded; nothing to emit.
+            return False, orig
+        with _phase(profile, 'dump'):
+            new = splice_changed_jobs(doc, orig, before, dump_yaml_indented, after) if splice else None
+            if new is None:
+                new = dump_yaml(doc)
+        with _phase(profile, 'compare'):
+            same = new == orig
+        if same:
             return False, orig
         return True, new
     return False, orig
 
 
-def main(argv: List[str]) -> int:
-    if not argv or argv[0] not in ('--check', '--write'):
-        print('Usage: update_workflows.py (--check|--write) <files...>')
-        return 2
-    mode = argv[0]
-    files = [Path(p) for p in argv[1:]]
-    if not files:
-        print('No files provided')
-        return 2
-    changed_any = False
-    failed_files: list[tuple[Path, str]] = []
+# Worker processes are recycled after this many files to cap resident memory.
+WORKER_MAX_TASKS = 16
+# Non-transform modules whose code shapes transform output (part of the cache key).
+ENGINE_SUPPORT_MODULES = (
+    '_fast_check.py', '_job_memo.py', '_job_visitor.py', '_merkle.py', '_splice.py', '_step_index.py', '_step_templates.py',
+)
+
+_VALUE_OPTIONS = (
+    '--jobs', '--cache-dir', '--profile', '--profile-cprofile', '--results', '--interval', '--debounce', '--journal',
+    '--shard', '--shard-durations', '--max-file-bytes', '--max-depth', '--max-alias-nodes', '--file-timeout', '--max-memory',
+)
+_FLAG_OPTIONS = ('--no-cache', '--splice', '--no-fast-check', '--watch', '--transaction', '--fail-fast')
+
+
+def _parse_options(args: List[str]) -> tuple[dict[str, str], List[str]] | None:
+    options: dict[str, str] = {}
+    files: List[str] = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in _FLAG_OPTIONS:
+            options[arg] = ''
+            i += 1
+            continue
+        if arg in _VALUE_OPTIONS:
+            if i + 1 >= len(args):
+                return None
+            options[arg] = args[i + 1]
+            i += 2
+            continue
+        files.append(arg)
+        i += 1
+    return options, files
+
+
+def _resolve_jobs(value: str | None) -> int | None:
+    """Map a --jobs value to a worker count; 0 means one worker per CPU."""
+    if value is None:
+        return 1
+    try:
+        jobs = int(value)
+    except ValueError:
+        return None
+    if jobs < 0:
+        return None
+    if jobs == 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _resolve_limits(options: dict[str, str]) -> Limits | None:
+    """Limits from the --max-*/--file-timeout options (0 turns one off); None (after printing why) when invalid."""
+    values = {}
+    for option, field, scale, kind in (
+        ('--max-file-bytes', 'max_bytes', 1, int),
+        ('--max-depth', 'max_depth', 1, int),
+        ('--max-alias-nodes', 'max_alias_nodes', 1, int),
+        ('--file-timeout', 'seconds', 1, float),
+        ('--max-memory', 'memory_bytes', 1024 * 1024, int),
+    ):
+        if option not in options:
+            continue
+        try:
+            value = kind(options[option])
+        except ValueError:
+            value = -1
+        if value < 0:
+            print(f'Invalid {option} value: {options[option]!r} (expected a non-negative number)')
+            return None
+        values[field] = value * scale
+    if values.get('memory_bytes'):
+        try:
+            import resource  # noqa: F401
+        except ImportError:
+            print('::warning::--max-memory is not enforced on this platform')
+    return Limits()._replace(**values)
+
+
+def _warm_worker() -> None:
+    # Exercise the round-trip loader/emitter once so the first real file does
+    # not pay for ruamel's lazily built resolver and representer tables.
+    dump_yaml(_yaml().load('warmup:\n- name: warmup\n  run: |\n    true\n'))
+    from _fast_check import load_plain
+    load_plain('warmup: true\n')
+
+
+class FileVerdict(NamedTuple):
+    changed: bool
+    text: str | None
+    error: str | None
+    short_circuited: bool = False
+    diff: str | None = None
+    journal: tuple = ()
+
+
+def unified_diff(path: str, orig: str, new: str) -> str:
+    """git-style unified diff from `orig` to `new`, labelled a/<path> and b/<path>."""
+    import difflib
+    label = Path(path).as_posix().lstrip('/')
+    lines = []
+    for line in difflib.unified_diff(
+        orig.splitlines(keepends=True),
+        new.splitlines(keepends=True),
+        fromfile=f'a/{label}',
+        tofile=f'b/{label}',
+    ):
+        if not line.endswith('\n'):
+            line += '\n\\ No newline at end of file\n'
+        lines.append(line)
+    return ''.join(lines)
+
+
+class RunOptions(NamedTuple):
+    """Per-run engine switches shared by the serial, pooled and profiled paths."""
+    splice: bool = False
+    diff: bool = False
+    fast_check: bool = True
+    journal: bool = False
+    fail_fast: bool = False
+    limits: Limits = Limits()
+    # Result cache dir that also holds the per-job memo (`_job_memo`); None disables it.
+    job_memo: str | None = None
+
+
+def _open_job_memo(run: RunOptions):
+    if not run.job_memo:
+        return None
+    from _cache import ResultCache, max_bytes_from_env
+    from _job_memo import JobMemo
+    engine_digest, ruamel_version = engine_identity()
+    return JobMemo(ResultCache(Path(run.job_memo), max_bytes_from_env()), f'{engine_digest}\0{ruamel_version}')
+
+
+def _process_file(path: str, run: RunOptions = RunOptions()) -> FileVerdict:
+    records = [] if run.journal or run.fail_fast else None
+    try:
+        orig = Path(path).read_text(encoding='utf-8')
+        was_changed, new_text = apply_transforms(
+            Path(path),
+            splice=run.splice,
+            fast_check=run.fast_check,
+            journal=records,
+            fail_fast=run.fail_fast,
+            limits=run.limits,
+            memo=_open_job_memo(run),
+            text=orig,
+        )
+        # The diff is built in the worker, alongside the verdict it explains,
+        # against the very text that was transformed.
+        patch = unified_diff(path, orig, new_text) if run.diff and was_changed else None
+    except Exception as e:
+        return FileVerdict(False, None, str(e))
+    return FileVerdict(was_changed, new_text, None, diff=patch, journal=tuple(records or ()))
+
+
+@lru_cache(maxsize=None)
+def engine_identity() -> tuple[str, str]:
+    """(updater + transform/support module digest, ruamel version) identifying the transform engine."""
+    from ruamel.yaml import __version__ as ruamel_version
+    here = Path(__file__).resolve()
+    digest = hashlib.sha256(here.read_bytes())
+    for module_path in sorted([*here.parent.glob('_transforms_*.py'), *(here.parent / name for name in ENGINE_SUPPORT_MODULES)]):
+        digest.update(module_path.name.encode('utf-8'))
+        digest.update(module_path.read_bytes())
+    return digest.hexdigest(), ruamel_version
+
+
+def _open_cache(options: dict[str, str]):
+    from _cache import CACHE_DIR_ENV, ResultCache, max_bytes_from_env
+    if '--no-cache' in options:
+        return None
+    cache_dir = options.get('--cache-dir') or os.environ.get(CACHE_DIR_ENV, '').strip()
+    if not cache_dir:
+        return None
+    return ResultCache(Path(cache_dir), max_bytes_from_env())
+
+
+def _cache_key_for(data: bytes, splice: bool = False) -> str:
+    from _cache import cache_key, content_digest
+    engine_digest, ruamel_version = engine_identity()
+    if splice:
+        # Spliced output can differ from a full dump, so it is cached separately.
+        engine_digest += ':splice'
+    return cache_key(content_digest(data), engine_digest, ruamel_version)
+
+
+def _iter_verdicts(files: List[Path], jobs: int, cache, run: RunOptions = RunOptions()):
+    """Yield a FileVerdict per file, in input order.
+
+    Files are read once up front: the prefilter marks files no transform
+    can touch (they still go to the worker, which only checks that they
+    parse), and the result cache answers unchanged content.
+    """
+    known: dict[int, FileVerdict] = {}
+    keys: list[str | None] = [None] * len(files)
+    short: set[int] = set()
+    for i, f in enumerate(files):
+        try:
+            data = f.read_bytes()
+            text = data.decode('utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        if not prefilter_may_apply(f.name, text):
+            short.add(i)
+            continue
+        if cache is None:
+            continue
+        keys[i] = _cache_key_for(data, run.splice)
+        hit = cache.get(keys[i])
+        if hit is not None:
+            patch = unified_diff(str(f), text, hit[1]) if run.diff and hit[0] else None
+            known[i] = FileVerdict(hit[0], hit[1], None, diff=patch)
+    misses = [f for i, f in enumerate(files) if i not in known]
+    if cache is not None:
+        run = run._replace(job_memo=str(cache.root))
+    miss_results = _iter_results(misses, jobs, run)
+    stored = False
+    for i in range(len(files)):
+        if i in known:
+            yield known[i]
+            continue
+        verdict = next(miss_results)
+        if i in short and verdict.error is None:
+            yield verdict._replace(short_circuited=True)
+            continue
+        # A fail-fast "changed" verdict has no text to cache.
+        if cache is not None and verdict.error is None and keys[i] is not None and verdict.text is not None:
+            cache.put(keys[i], verdict.changed, verdict.text)
+            stored = True
+        yield verdict
+    if stored:
+        cache.prune()
+
+
+def _pool_failure(task: tuple, reason: str) -> FileVerdict:
+    return FileVerdict(False, None, reason)
+
+
+def _iter_results(files: List[Path], jobs: int, run: RunOptions = RunOptions()):
+    from _limits import can_time_inline, wall_clock
+    paths = [str(f) for f in files]
+    seconds = run.limits.file_seconds
+    inline = not run.limits.isolated and (jobs <= 1 or len(paths) <= 1)
+    if inline and (seconds is None or can_time_inline()):
+        for p in paths:
+            if seconds is None:
+                verdict = _process_file(p, run)
+            else:
+                # The timer must not run while the consumer holds the verdict.
+                with wall_clock(seconds):
+                    verdict = _process_file(p, run)
+            yield verdict
+        return
+    from _supervisor import supervised_map
+    # Results come back in submission order, which keeps the report deterministic.
+    yield from supervised_map(
+        _process_file,
+        [(p, run) for p in paths],
+        max(1, min(jobs, len(paths))),
+        _pool_failure,
+        initializer=_warm_worker,
+        seconds=seconds,
+        memory_bytes=run.limits.memory_bytes,
+        max_tasks=WORKER_MAX_TASKS,
+    )
+
+
+def _iter_profiled_verdicts(files: List[Path], run: RunOptions, profiles: list):
+    """Serial, uncached counterpart of _iter_verdicts that fills one FileProfile per file."""
+    from _profile import FileProfile
     for f in files:
+        profile = FileProfile(str(f))
+        profiles.append(profile)
         try:
-            was_changed, new_text = apply_transforms(f)
+            with profile.phase('read'):
+                orig = f.read_text(encoding='utf-8')
+            profile.source = orig
+            with profile.phase('prefilter'):
+                may_apply = prefilter_may_apply(f.name, orig)
+            if not may_apply:
+                with profile.phase('validate'):
+                    check_well_formed(orig)
+                profile.changed = False
+                yield FileVerdict(False, None, None, short_circuited=True)
+                continue
+            # No fast check: a clean file would leave after it, with no parse,
+            # transform or dump phases to report.
+            was_changed, new_text = transform_text(
+                f, orig, prefilter=False, splice=run.splice, profile=profile, fast_check=False, limits=run.limits
+            )
         except Exception as e:
-            failed_files.append((f, str(e)))
-            print(f'::error::Failed to process {f}: {e}')
+            profile.error = str(e)
+            yield FileVerdict(False, None, str(e))
+            continue
+        profile.changed = was_changed
+        patch = unified_diff(str(f), orig, new_text) if run.diff and was_changed else None
+        yield FileVerdict(was_changed, new_text, None, diff=patch)
+
+
+def _cprofile_slowest(profiles: list, splice: bool, out_path: Path) -> dict | None:
+    """Re-run the slowest successfully processed file under cProfile and dump its stats."""
+    import cProfile
+    candidates = [p for p in profiles if p.error is None and p.source is not None]
+    if not candidates:
+        return None
+    slowest = max(candidates, key=lambda p: p.seconds)
+    profiler = cProfile.Profile()
+    # Profile the text as read, even if --write has since replaced the file.
+    profiler.runcall(transform_text, Path(slowest.path), slowest.source, False, splice)
+    profiler.dump_stats(str(out_path))
+    return {'path': str(out_path), 'file': slowest.path, 'seconds': slowest.seconds}
+
+
+def _report(mode: str, files: List[Path], verdicts, cache, splice: bool, profiles: list | None = None,
+            statuses: dict[str, str] | None = None, transaction: bool = False) -> int:
+    """Print per-file verdicts, write in --write mode, and map the run to an exit code."""
+    from _write_stage import WriteStage
+    changed_any = False
+    failed_files: list[tuple[Path, str]] = []
+    if statuses is None:
+        statuses = {}
+    stage = WriteStage(transactional=transaction) if mode == '--write' else None
+
+    def written(f: Path) -> None:
+        if cache is not None:
+            cache.put(_cache_key_for(f.read_bytes(), splice), False, None)
+        statuses[str(f)] = 'updated'
+        print(f'updated: {f}')
+
+    for i, (f, verdict) in enumerate(zip(files, verdicts)):
+        if verdict.error is not None:
+            failed_files.append((f, verdict.error))
+            statuses[str(f)] = 'error'
+            print(f'::error::Failed to process {f}: {verdict.error}')
             continue
-        if was_changed:
+        if verdict.short_circuited:
+            statuses[str(f)] = 'clean'
+            print(f'short-circuited (no transform anchors): {f}')
+            continue
+        if verdict.changed:
             changed_any = True
-            if mode == '--write':
-                f.write_text(new_text, encoding='utf-8', newline='\n')
-                print(f'updated: {f}')
+            if stage is not None:
+                try:
+                    with _phase(profiles[i] if profiles else None, 'write'):
+                        wrote = stage.write(f, verdict.text)
+                except OSError as exc:
+                    failed_files.append((f, str(exc)))
+                    statuses[str(f)] = 'error'
+                    print(f'::error::Failed to write {f}: {exc}')
+                    continue
+                if not wrote:
+                    statuses[str(f)] = 'clean'
+                elif not transaction:
+                    written(f)
+                else:
+                    statuses[str(f)] = 'needs-update'
             else:
+                statuses[str(f)] = 'needs-update'
                 print(f'NEEDS UPDATE: {f}')
+                for record in verdict.journal:
+                    print(f'  {describe_record(record)}')
+                if verdict.diff:
+                    # Stream each patch as soon as its file is done.
+                    sys.stdout.write(verdict.diff)
+                    sys.stdout.flush()
+        else:
+            statuses[str(f)] = 'clean'
+    if stage is not None and stage.pending:
+        if failed_files:
+            discarded = stage.abort()
+            print(f'transaction aborted: {len(discarded)} staged write(s) discarded after {len(failed_files)} failure(s)')
+        else:
+            try:
+                committed = stage.commit()
+            except OSError as exc:
+                print(f'::error::transaction rolled back: {exc}')
+                return 4
+            for f in committed:
+                written(f)
+    if stage is not None and (stage.written or stage.unchanged):
+        print(f'wrote {len(stage.written)} file(s), {stage.bytes_written} bytes; '
+              f'{len(stage.unchanged)} byte-identical write(s) skipped')
     if failed_files:
         return 4
-    if mode == '--check' and changed_any:
+    if mode != '--write' and changed_any:
         return 3
     return 0
 
 
+def describe_record(record: dict) -> str:
+    """One-line explanation of a `_journal` record."""
+    where = ' '.join(part for part in (
+        f"job {record['job']}" if record.get('job') is not None else None,
+        f"key {record['key']}" if record.get('key') is not None else None,
+        f"step {record['step']!r}" if record.get('step') is not None else None,
+    ) if part)
+    return f"{record['transform']}: {record['op']}" + (f' ({where})' if where else '')
+
+
+def _journaled(files: List[Path], verdicts, handle):
+    """Pass verdicts through, appending their journal records to `handle` as JSON lines."""
+    from _journal import JOURNAL_SCHEMA
+    engine_digest, ruamel_version = engine_identity()
+    handle.write(json.dumps({'schema': JOURNAL_SCHEMA, 'engine': engine_digest, 'ruamel': ruamel_version}) + '\n')
+    for f, verdict in zip(files, verdicts):
+        for record in verdict.journal:
+            handle.write(json.dumps({'path': str(f), **record}) + '\n')
+        yield verdict
+
+
+def _write_results(path: Path, statuses: dict[str, str], shard: dict | None = None) -> None:
+    """Per-file verdicts for callers that track clean files (`workflow_enclave.py --all`) or merge shards."""
+    from _shard import write_results
+    write_results(path, statuses, shard)
+
+
+def _run_watch(mode: str, files: List[Path], run: RunOptions, options: dict[str, str], transaction: bool = False) -> int:
+    """Check once, then re-check each file as it changes until interrupted (`--watch`)."""
+    from _watch import DEFAULT_DEBOUNCE, DEFAULT_INTERVAL, watch_files
+    try:
+        interval = float(options.get('--interval', DEFAULT_INTERVAL))
+        debounce = float(options.get('--debounce', DEFAULT_DEBOUNCE))
+    except ValueError:
+        print('--interval and --debounce must be numeric (seconds)')
+        return 2
+
+    def recheck(paths: List[Path]) -> None:
+        print(f"[{time.strftime('%H:%M:%S')}] changed: {', '.join(str(p) for p in paths)}")
+        statuses: dict[str, str] = {}
+        # In-process and uncached: the point is a warm engine, not a warm cache.
+        _report(mode, paths, (_process_file(p, run) for p in paths), None, run.splice, statuses=statuses,
+                transaction=transaction)
+        for p in paths:
+            if statuses.get(str(p)) == 'clean':
+                print(f'clean: {p}')
+        sys.stdout.flush()
+
+    _report(mode, files, (_process_file(p, run) for p in files), None, run.splice, transaction=transaction)
+    print(f'watching {len(files)} file(s) for changes (Ctrl+C to stop)')
+    sys.stdout.flush()
+    try:
+        watch_files(files, recheck, interval, debounce)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _stdio_request(request: dict, run: RunOptions) -> dict:
+    """Answer one `--stdio` request (see `_stdio`); only `write` mode writes, only a missing text reads."""
+    path = Path(request['path'])
+    orig = request['text'] if 'text' in request else path.read_text(encoding='utf-8')
+    changed, new_text = transform_text(path, orig, splice=run.splice, fast_check=run.fast_check, limits=run.limits)
+    response = {'changed': changed, 'text': new_text}
+    if request['mode'] == 'diff':
+        response['diff'] = unified_diff(request['path'], orig, new_text) if changed else ''
+    elif request['mode'] == 'write':
+        from _write_stage import WriteStage
+        response['written'] = WriteStage().write(path, new_text) if changed else False
+    return response
+
+
+def _run_stdio(run: RunOptions) -> int:
+    """Serve JSON-lines requests from stdin until EOF on one warm engine (`--stdio`)."""
+    from _stdio import serve
+    _warm_worker()
+    engine_digest, ruamel_version = engine_identity()
+    header = {'engine': engine_digest, 'ruamel': ruamel_version, 'splice': run.splice, 'fastCheck': run.fast_check}
+    try:
+        return serve(sys.stdin, sys.stdout, header, lambda request: _stdio_request(request, run))
+    except KeyboardInterrupt:
+        return 0
+
+
+def _select_shard(files: List[Path], options: dict[str, str]) -> tuple[List[Path], dict | None] | None:
+    """Keep this node's `--shard i/n` slice of `files`; None (after printing why) on bad options."""
+    from _shard import select_shard
+    if '--shard' not in options:
+        if '--shard-durations' in options:
+            print('--shard-durations requires --shard')
+            return None
+        return files, None
+    names = [str(f) for f in files]
+    try:
+        kept, shard = select_shard(names, options['--shard'], options.get('--shard-durations'))
+    except ValueError as exc:
+        print(exc)
+        return None
+    print(f"shard {shard['index']}/{shard['count']}: {len(kept)} of {len(names)} files")
+    return [Path(f) for f in kept], shard
+
+
+def main(argv: List[str]) -> int:
+    usage = ('Usage: update_workflows.py (--check|--write|--diff) [--jobs N] [--cache-dir DIR|--no-cache] [--splice] [--no-fast-check] '
+             '[--profile FILE [--profile-cprofile FILE]] [--results FILE] [--transaction] '
+             '[--watch [--interval S] [--debounce S]] [--journal FILE] [--fail-fast] '
+             '[--shard I/N [--shard-durations PROFILE]] [--max-file-bytes N] [--max-depth N] [--max-alias-nodes N] '
+             '[--file-timeout S] [--max-memory MB] <files...>\n'
+             '       update_workflows.py --stdio [--splice] [--no-fast-check]\n'
+             '       update_workflows.py --merge-results [--results FILE] <shard-results...>')
+    if argv and argv[0] == '--merge-results':
+        from _shard import run_merge
+        parsed = _parse_options(argv[1:])
+        if parsed is None or not parsed[1] or set(parsed[0]) - {'--results'}:
+            print(usage)
+            return 2
+        out = parsed[0].get('--results')
+        return run_merge([Path(p) for p in parsed[1]], Path(out) if out else None)
+    if argv and argv[0] == '--stdio':
+        extra = [arg for arg in argv[1:] if arg not in ('--splice', '--no-fast-check')]
+        if extra:
+            print(f"--stdio takes requests on stdin; unexpected argument(s): {' '.join(extra)}")
+            return 2
+        return _run_stdio(RunOptions(splice='--splice' in argv, fast_check='--no-fast-check' not in argv))
+    if not argv or argv[0] not in ('--check', '--write', '--diff'):
+        print(usage)
+        return 2
+    mode = argv[0]
+    parsed = _parse_options(argv[1:])
+    if parsed is None:
+        print(usage)
+        return 2
+    options, file_args = parsed
+    jobs = _resolve_jobs(options.get('--jobs'))
+    if jobs is None:
+        print(f"Invalid --jobs value: {options['--jobs']!r} (expected a non-negative integer)")
+        return 2
+    files = [Path(p) for p in file_args]
+    if not files:
+        print('No files provided')
+        return 2
+    if '--shard' in options and '--watch' in options:
+        print('--shard cannot be combined with --watch')
+        return 2
+    sharded = _select_shard(files, options)
+    if sharded is None:
+        return 2
+    files, shard = sharded
+    profile_path = options.get('--profile')
+    if '--profile-cprofile' in options and not profile_path:
+        print('--profile-cprofile requires --profile')
+        return 2
+    journal_path = options.get('--journal')
+    limits = _resolve_limits(options)
+    if limits is None:
+        return 2
+    if limits.isolated and (profile_path or '--watch' in options):
+        print('--file-timeout/--max-memory need worker processes; they cannot be combined with --profile or --watch')
+        return 2
+    run = RunOptions(
+        splice='--splice' in options,
+        diff=mode == '--diff',
+        fast_check='--no-fast-check' not in options,
+        journal=bool(journal_path),
+        fail_fast='--fail-fast' in options,
+        limits=limits,
+    )
+    transaction = '--transaction' in options
+    if transaction and mode != '--write':
+        print('--transaction requires --write')
+        return 2
+    if run.fail_fast and mode != '--check':
+        print('--fail-fast requires --check (it stops before the text needed to write or diff exists)')
+        return 2
+    if (journal_path or run.fail_fast) and (profile_path or '--watch' in options):
+        print('--journal/--fail-fast cannot be combined with --profile or --watch')
+        return 2
+    if '--watch' in options:
+        if profile_path:
+            print('--watch cannot be combined with --profile')
+            return 2
+        return _run_watch(mode, files, run, options, transaction)
+    statuses: dict[str, str] = {}
+    if profile_path:
+        # Profiling measures the work itself: serial, in-process, no cache.
+        from _profile import tracing_allocations, write_report
+        profiles: list = []
+        with tracing_allocations():
+            exit_code = _report(mode, files, _iter_profiled_verdicts(files, run, profiles), None, run.splice, profiles, statuses,
+                                transaction)
+        cprofile = None
+        if options.get('--profile-cprofile'):
+            cprofile = _cprofile_slowest(profiles, run.splice, Path(options['--profile-cprofile']))
+        engine_digest, ruamel_version = engine_identity()
+        write_report(Path(profile_path), profiles, {'digest': engine_digest, 'ruamel': ruamel_version, **run._asdict(), 'limits': run.limits._asdict()}, cprofile)
+        print(f'profile written: {profile_path}')
+    elif journal_path:
+        # Journal records come from running the transforms; cached verdicts have none.
+        with open(journal_path, 'w', encoding='utf-8', newline='\n') as handle:
+            verdicts = _journaled(files, _iter_verdicts(files, jobs, None, run), handle)
+            exit_code = _report(mode, files, verdicts, None, run.splice, statuses=statuses, transaction=transaction)
+        print(f'journal written: {journal_path}')
+    else:
+        cache = _open_cache(options)
+        exit_code = _report(mode, files, _iter_verdicts(files, jobs, cache, run), cache, run.splice, statuses=statuses,
+                            transaction=transaction)
+    if options.get('--results'):
+        _write_results(Path(options['--results']), statuses, shard)
+    return exit_code
+
+
 if __name__ == '__main__':
     sys.exit(main(sys.argv[1:]))
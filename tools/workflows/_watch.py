@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Polling file watcher for the updater's `--watch` mode.
+
+Stdlib only, so it behaves the same on every runner OS: each tick stats the
+watched files and compares (mtime_ns, size) with the last snapshot. A change
+is only handed to `on_change` once the file has been quiet for `debounce`
+seconds, so an editor's truncate-then-write (or a formatter running right
+after save) produces one run instead of several. Files are re-snapshotted
+after `on_change`, which keeps `--write` from re-triggering on its own output.
+"""
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_INTERVAL = 0.25
+DEFAULT_DEBOUNCE = 0.3
+
+
+def _stat_key(path: Path) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def watch_files(
+    paths: list[Path],
+    on_change: Callable[[list[Path]], None],
+    interval: float = DEFAULT_INTERVAL,
+    debounce: float = DEFAULT_DEBOUNCE,
+    should_stop: Callable[[], bool] = lambda: False,
+    sleep: Callable[[float], None] = time.sleep,
+) -> None:
+    """Call `on_change` with the settled, changed subset of `paths` until `should_stop()`."""
+    seen = {path: _stat_key(path) for path in paths}
+    # path -> monotonic time of its most recent observed change
+    pending: dict[Path, float] = {}
+    while not should_stop():
+        sleep(interval)
+        now = time.monotonic()
+        for path in paths:
+            key = _stat_key(path)
+            if key != seen[path]:
+                seen[path] = key
+                pending[path] = now
+        settled = [path for path in paths if path in pending and now - pending[path] >= debounce]
+        if not settled:
+            continue
+        for path in settled:
+            del pending[path]
+        on_change(settled)
+        for path in settled:
+            seen[path] = _stat_key(path)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Output stage for the updater's `--write` mode.
+
+Every write goes to a temp file in the target's directory (same filesystem,
+file mode copied from the target), is fsync'd, then renamed over the target,
+so a crash never leaves a half-written workflow. Writes whose bytes already
+match the file on disk are skipped, which keeps mtimes -- and therefore
+editors' watchers and the `--all` scan state -- untouched.
+
+With `transactional=True` the renames are deferred to `commit()`: a run that
+fails on any file can `abort()` and leave the whole set as it was. A rename
+failing midway through `commit()` restores the files already replaced from
+their original bytes before re-raising.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import NamedTuple
+
+
+class _Staged(NamedTuple):
+    target: Path
+    temp: Path
+    original: bytes | None
+    size: int
+
+
+def _write_temp(target: Path, data: bytes) -> Path:
+    fd, name = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.', suffix='.tmp')
+    temp = Path(name)
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        if target.exists():
+            shutil.copymode(target, temp)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    return temp
+
+
+def _restore(target: Path, original: bytes | None) -> None:
+    if original is None:
+        target.unlink(missing_ok=True)
+    else:
+        os.replace(_write_temp(target, original), target)
+
+
+class WriteStage:
+    def __init__(self, transactional: bool = False) -> None:
+        self.transactional = transactional
+        self.written: list[Path] = []
+        self.unchanged: list[Path] = []
+        self.bytes_written = 0
+        self._staged: list[_Staged] = []
+
+    @property
+    def pending(self) -> list[Path]:
+        return [entry.target for entry in self._staged]
+
+    def write(self, target: Path, text: str) -> bool:
+        """Write (or stage) `text`; False when the file already holds exactly these bytes."""
+        data = text.encode('utf-8')
+        try:
+            original = target.read_bytes()
+        except FileNotFoundError:
+            original = None
+        if original == data:
+            self.unchanged.append(target)
+            return False
+        entry = _Staged(target, _write_temp(target, data), original, len(data))
+        if self.transactional:
+            self._staged.append(entry)
+        else:
+            os.replace(entry.temp, entry.target)
+            self._record(entry)
+        return True
+
+    def _record(self, entry: _Staged) -> None:
+        self.written.append(entry.target)
+        self.bytes_written += entry.size
+
+    def commit(self) -> list[Path]:
+        """Rename every staged file into place; returns the committed targets."""
+        staged, self._staged = self._staged, []
+        done: list[_Staged] = []
+        try:
+            for entry in staged:
+                os.replace(entry.temp, entry.target)
+                done.append(entry)
+        except OSError:
+            for entry in reversed(done):
+                _restore(entry.target, entry.original)
+            for entry in staged[len(done):]:
+                entry.temp.unlink(missing_ok=True)
+            raise
+        for entry in done:
+            self._record(entry)
+        return [entry.target for entry in done]
+
+    def abort(self) -> list[Path]:
+        """Discard every staged write; returns the targets left untouched."""
+        staged, self._staged = self._staged, []
+        for entry in staged:
+            entry.temp.unlink(missing_ok=True)
+        return [entry.target for entry in staged]
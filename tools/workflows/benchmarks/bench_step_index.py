@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-document step index against the linear scans it replaced.
+
+Builds a synthetic ci-orchestrated-shaped workflow with thousands of steps and
+runs the orchestrated transform plan on fresh copies:
+
+- indexed: inside `indexed(doc)` (one index per steps list, updated in place);
+- linear scan: every lookup walks `steps` from the front and stops at the
+  first match, as the helpers did before the index (`LinearSteps` stands in
+  for `index_for`); this is the baseline the speedup is measured against;
+- per-query rebuild: no active index, so each lookup builds a throwaway one
+  (what a transform called outside the engine pays today).
+
+All three must produce the same document.
+
+Usage: python tools/workflows/benchmarks/bench_step_index.py [--jobs N] [--steps N] [--repeat N]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_ROOT = Path(__file__).resolve().parents[1]
+if str(SCRIPT_ROOT) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_ROOT))
+
+import _step_index  # noqa: E402
+import _transforms_fixture_drift  # noqa: E402
+import _transforms_orchestrated  # noqa: E402
+import _transforms_wire  # noqa: E402
+import _update_workflows_impl  # noqa: E402
+from _step_index import indexed  # noqa: E402
+from _update_workflows_impl import dump_yaml, run_plan, transform_plan, yaml  # noqa: E402
+
+_INDEX_USERS = (_transforms_fixture_drift, _transforms_orchestrated, _transforms_wire, _update_workflows_impl)
+
+
+class LinearSteps:
+    """The StepIndex interface answered by scanning `steps`, like the pre-index helpers."""
+
+    def __init__(self, steps: list) -> None:
+        self.steps = steps
+
+    def _values(self, field: str):
+        for pos, step in enumerate(self.steps):
+            if isinstance(step, dict) and step.get(field) is not None:
+                yield pos, str(step.get(field))
+
+    def positions(self, field: str, value: str) -> list[int]:
+        return [pos for pos, found in self._values(field) if found == value]
+
+    def first(self, field: str, value: str) -> int | None:
+        return next((pos for pos, found in self._values(field) if found == value), None)
+
+    def first_matching(self, field: str, predicate) -> int | None:
+        return next((pos for pos, found in self._values(field) if predicate(found)), None)
+
+    def has(self, field: str, value: str) -> bool:
+        return self.first(field, value) is not None
+
+    def insert(self, pos: int, step: object) -> None:
+        self.steps.insert(max(0, min(pos, len(self.steps))), step)
+
+    def delete(self, pos: int) -> None:
+        del self.steps[pos]
+
+    def replace(self, pos: int, step: object) -> None:
+        self.steps[pos] = step
+
+    def refresh(self, pos: int) -> None:
+        pass
+
+
+def synthetic_workflow(job_count: int, steps_per_job: int) -> str:
+    lines = ['name: CI Orchestrated (deterministic chain)', 'on: workflow_dispatch', 'jobs:']
+    for j in range(job_count):
+        lines.append(f'  job-{j}:')
+        lines.append('    runs-on: ubuntu-latest')
+        lines.append('    steps:')
+        lines.append('      - uses: actions/checkout@v5')
+        for s in range(steps_per_job):
+            lines.append(f'      - name: Step {j}-{s}')
+            lines.append(f'        run: echo {s}')
+        lines.append('      - name: Runner Unblock Guard')
+        lines.append('        uses: ./.github/actions/runner-unblock-guard')
+        lines.append('      - name: Session index post (best-effort)')
+        lines.append('        uses: ./.github/actions/session-index-post')
+        lines.append('      - name: Summarize orchestrated run')
+        lines.append('        run: echo done')
+    return '\n'.join(lines) + '\n'
+
+
+def _time_plan(text: str, mode: str, repeat: int) -> tuple[float, str]:
+    plan = transform_plan('ci-orchestrated.yml', 'CI Orchestrated (deterministic chain)')
+    best = float('inf')
+    for _ in range(repeat):
+        doc = yaml.load(text)
+        started = time.perf_counter()
+        if mode == 'indexed':
+            with indexed(doc):
+                run_plan(doc, plan)
+        else:
+            run_plan(doc, plan)
+        best = min(best, time.perf_counter() - started)
+    return best, dump_yaml(doc)
+
+
+def _time_linear(text: str, repeat: int) -> tuple[float, str]:
+    saved = [module.index_for for module in _INDEX_USERS]
+    for module in _INDEX_USERS:
+        module.index_for = LinearSteps
+    try:
+        return _time_plan(text, 'linear', repeat)
+    finally:
+        for module, index_for in zip(_INDEX_USERS, saved):
+            module.index_for = index_for
+
+
+def main(argv: list[str]) -> int:
+    options = {'--jobs': 8, '--steps': 500, '--repeat': 3}
+    args = list(argv)
+    while args:
+        flag = args.pop(0)
+        if flag not in options or not args:
+            print(__doc__.strip().splitlines()[-1])
+            return 2
+        try:
+            options[flag] = max(1, int(args.pop(0)))
+        except ValueError:
+            print(f'::error::{flag} expects an integer')
+            return 2
+    text = synthetic_workflow(options['--jobs'], options['--steps'])
+    total_steps = options['--jobs'] * (options['--steps'] + 4)
+    indexed_s, indexed_out = _time_plan(text, 'indexed', options['--repeat'])
+    linear_s, linear_out = _time_linear(text, options['--repeat'])
+    rebuild_s, rebuild_out = _time_plan(text, 'rebuild', options['--repeat'])
+    if not indexed_out == linear_out == rebuild_out:
+        print('::error::indexed, linear-scan and rebuild runs produced different documents')
+        return 1
+    print(f'steps: {total_steps}')
+    print(f'indexed: {indexed_s * 1000:.1f} ms')
+    print(f'linear scan (pre-index helpers): {linear_s * 1000:.1f} ms')
+    print(f'per-query rebuild (no active index): {rebuild_s * 1000:.1f} ms')
+    print(f'speedup vs linear scan: {linear_s / indexed_s:.1f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Phase benchmark for the workflow updater.
+
+Times `yaml.load`, every transform routed to each file (individually, by
+registry name) and `dump_yaml` over:
+
+- managed: the managed workflow set from workflow-manifest.json
+- synthetic-10x / synthetic-100x: the managed set scaled up -- jobs cloned
+  N times, matrix entries extended N times, and the original jobs' steps
+  padded N times -- so each dimension grows by N while the file stays
+  routable under its original name.
+
+Results can be recorded to a baseline JSON and later compared against it; a
+phase that is slower than baseline * (1 + threshold) and by more than the
+noise floor counts as a regression (exit 3). New transforms show up as their
+own `transform:<name>` phase automatically.
+
+Usage:
+  python tools/workflows/benchmarks/bench_updater.py [--corpus managed,synthetic-10x,synthetic-100x]
+      [--repeat N] [--record FILE] [--baseline FILE] [--threshold 0.25] [--floor-ms 5]
+"""
+from __future__ import annotations
+
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_ROOT = Path(__file__).resolve().parents[1]
+REPO_ROOT = SCRIPT_ROOT.parents[1]
+if str(SCRIPT_ROOT) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_ROOT))
+
+BENCH_SCHEMA = 'comparevi/workflow-updater-bench@v1'
+MANIFEST_PATH = SCRIPT_ROOT / 'workflow-manifest.json'
+CORPORA = ('managed', 'synthetic-10x', 'synthetic-100x')
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_FLOOR_MS = 5.0
+
+
+def managed_corpus() -> list[tuple[str, str]]:
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+    corpus = []
+    for entry in manifest.get('managedWorkflowFiles') or []:
+        path = REPO_ROOT / entry
+        corpus.append((path.name, path.read_text(encoding='utf-8')))
+    return corpus
+
+
+def _scale_matrix(job: dict, factor: int) -> None:
+    matrix = (job.get('strategy') or {}).get('matrix') if isinstance(job.get('strategy'), dict) else None
+    if not isinstance(matrix, dict):
+        return
+    for key, values in matrix.items():
+        if not isinstance(values, list):
+            continue
+        originals = list(values)
+        for i in range(1, factor):
+            for value in originals:
+                values.append(f'{value}-{i}' if isinstance(value, str) else copy.deepcopy(value))
+
+
+def scale_workflow(doc, factor: int):
+    """Grow jobs, matrix entries and steps of a loaded workflow `factor`-fold, in place."""
+    jobs = doc.get('jobs')
+    if not isinstance(jobs, dict) or factor <= 1:
+        return doc
+    originals = [(name, job) for name, job in jobs.items() if isinstance(job, dict)]
+    clones = [(f'{name}-x{i}', copy.deepcopy(job)) for i in range(1, factor) for name, job in originals]
+    for name, job in originals:
+        _scale_matrix(job, factor)
+        steps = job.get('steps')
+        if isinstance(steps, list):
+            padding = len(steps) * (factor - 1)
+            steps.extend({'name': f'Synthetic step {i}', 'run': 'echo synthetic'} for i in range(padding))
+    for name, clone in clones:
+        jobs[name] = clone
+    return doc
+
+
+def build_corpus(name: str) -> list[tuple[str, str]]:
+    from _update_workflows_impl import dump_yaml, yaml
+    corpus = managed_corpus()
+    if name == 'managed':
+        return corpus
+    factor = int(name.rsplit('-', 1)[1].rstrip('x'))
+    return [(file_name, dump_yaml(scale_workflow(yaml.load(text), factor))) for file_name, text in corpus]
+
+
+def _time(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def measure(corpus: list[tuple[str, str]], repeat: int) -> dict[str, float]:
+    """Best-of-`repeat` seconds per phase, summed over the corpus."""
+    from _step_index import indexed
+    from _update_workflows_impl import dump_yaml, run_plan, transform_plan, yaml
+    best: dict[str, float] = {}
+    for _ in range(repeat):
+        totals: dict[str, float] = {}
+        for file_name, text in corpus:
+            holder = {}
+            totals['load'] = totals.get('load', 0.0) + _time(lambda: holder.setdefault('doc', yaml.load(text)))
+            doc = holder['doc']
+            doc_name = doc.get('name', '')
+            plan = transform_plan(file_name, doc_name if isinstance(doc_name, str) else '')
+            with indexed(doc):
+                for spec in plan:
+                    phase = f'transform:{spec.name}'
+                    totals[phase] = totals.get(phase, 0.0) + _time(lambda: run_plan(doc, (spec,)))
+            # Always dump so the emitter is measured even on already-normalized input.
+            totals['dump'] = totals.get('dump', 0.0) + _time(lambda: dump_yaml(doc))
+        totals['total'] = sum(totals.values())
+        for phase, seconds in totals.items():
+            best[phase] = min(best.get(phase, seconds), seconds)
+    return best
+
+
+def find_regressions(baseline: dict, current: dict, threshold: float, floor_seconds: float) -> list[str]:
+    """Phases slower than baseline by more than `threshold` (relative) and `floor_seconds` (absolute)."""
+    regressions = []
+    for corpus, phases in current.items():
+        for phase, seconds in phases.items():
+            before = (baseline.get(corpus) or {}).get(phase)
+            if not isinstance(before, (int, float)):
+                continue
+            if seconds > before * (1 + threshold) and seconds - before > floor_seconds:
+                regressions.append(f'{corpus} {phase}: {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms')
+    return regressions
+
+
+def _load_baseline(path: Path) -> dict:
+    payload = json.loads(path.read_text(encoding='utf-8'))
+    if not isinstance(payload, dict) or payload.get('schema') != BENCH_SCHEMA:
+        raise RuntimeError(f'not a workflow updater benchmark baseline ({BENCH_SCHEMA}): {path}')
+    return payload.get('results') or {}
+
+
+def _parse_args(argv: list[str]) -> dict | None:
+    options = {
+        '--corpus': ','.join(CORPORA),
+        '--repeat': '3',
+        '--threshold': str(DEFAULT_THRESHOLD),
+        '--floor-ms': str(DEFAULT_FLOOR_MS),
+    }
+    args = list(argv)
+    while args:
+        flag = args.pop(0)
+        if flag not in ('--corpus', '--repeat', '--record', '--baseline', '--threshold', '--floor-ms') or not args:
+            return None
+        options[flag] = args.pop(0)
+    return options
+
+
+def main(argv: list[str]) -> int:
+    options = _parse_args(argv)
+    if options is None:
+        print(__doc__.strip().split('Usage:', 1)[1].rstrip())
+        return 2
+    corpora = [name for name in options['--corpus'].split(',') if name]
+    unknown = [name for name in corpora if name not in CORPORA]
+    if unknown:
+        print(f"Unknown corpus: {', '.join(unknown)} (expected {', '.join(CORPORA)})")
+        return 2
+    try:
+        repeat = max(1, int(options['--repeat']))
+        threshold = float(options['--threshold'])
+        floor_seconds = float(options['--floor-ms']) / 1000
+    except ValueError:
+        print('--repeat, --threshold and --floor-ms must be numeric')
+        return 2
+
+    results = {}
+    for name in corpora:
+        results[name] = measure(build_corpus(name), repeat)
+        phases = results[name]
+        print(f'{name}:')
+        for phase in sorted(phases, key=lambda p: (p == 'total', -phases[p])):
+            print(f'  {phase:<56} {phases[phase] * 1000:10.1f} ms')
+
+    if options.get('--record'):
+        Path(options['--record']).write_text(
+            json.dumps({'schema': BENCH_SCHEMA, 'repeat': repeat, 'results': results}, indent=2, sort_keys=True) + '\n',
+            encoding='utf-8'
+        )
+        print(f"recorded baseline: {options['--record']}")
+    if options.get('--baseline'):
+        regressions = find_regressions(_load_baseline(Path(options['--baseline'])), results, threshold, floor_seconds)
+        for line in regressions:
+            print(f'::error::benchmark regression: {line}')
+        if regressions:
+            return 3
+        print(f'no regressions beyond {threshold:.0%} (floor {floor_seconds * 1000:.0f} ms)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
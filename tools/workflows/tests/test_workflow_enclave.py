@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import contextlib
+import functools
+import io
+import json
 import subprocess
 import sys
 import tempfile
+import time
 import unittest
 import os
 from pathlib import Path
@@ -14,16 +19,42 @@ REPO_ROOT = SCRIPT_ROOT.parents[1]
 if str(SCRIPT_ROOT) not in sys.path:
     sys.path.insert(0, str(SCRIPT_ROOT))
 
+import _daemon
 import _enclave
+from _cache import CACHE_SCHEMA, ResultCache
 from _enclave import REQUIREMENTS_PATH, load_default_scope
+from ruamel.yaml.scalarstring import LiteralScalarString, SingleQuotedScalarString
+from _job_memo import JobMemo
+from _job_visitor import visit_jobs
+from _limits import LimitExceeded, Limits, check_structure
+from _merkle import changed_jobs, digest_document, node_digest
+from _scan_state import ScanState
+from _shard import merge_results, select_shard
+from _supervisor import supervised_map
+from _watch import watch_files
+from _write_stage import WriteStage
+from _transforms_wire import ensure_wire_probes_all_jobs
+from _step_index import StepIndex, index_for, indexed
+from _step_templates import StepTemplate, decorated
 from _update_workflows_impl import (
+    HOSTED_NOTICE_STEP_NAME,
+    SQS,
+    TRANSFORMS,
+    TransformSpec,
+    _mk_hosted_notice_step,
     dump_yaml,
     ensure_force_run_input,
     ensure_interactivity_probe_job,
     ensure_lint_resiliency,
     ensure_preinit_force_run_outputs,
+    fast_check_may_change,
     load_yaml,
     main as updater_main,
+    prefilter_may_apply,
+    run_plan,
+    transform_plan,
+    transform_text,
+    yaml as transform_yaml,
 )
 
 
@@ -297,6 +328,1514 @@ class WorkflowUpdaterRoundTripTests(unittest.TestCase):
 
         self.assertEqual(exit_code, 4)
 
+    def test_updater_parallel_check_matches_serial_report_order(self) -> None:
+        source_paths = [
+            REPO_ROOT / '.github' / 'workflows' / 'validate.yml',
+            REPO_ROOT / '.github' / 'workflows' / 'ci-orchestrated.yml',
+            REPO_ROOT / '.github' / 'workflows' / 'smoke.yml',
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_paths = []
+            for source_path in source_paths:
+                temp_path = Path(temp_dir) / source_path.name
+                temp_path.write_text(source_path.read_text(encoding='utf-8'), encoding='utf-8', newline='\n')
+                temp_paths.append(str(temp_path))
+            broken_path = Path(temp_dir) / 'broken.yml'
+            broken_path.write_text('jobs: [\n', encoding='utf-8')
+            temp_paths.insert(1, str(broken_path))
+
+            runs = []
+            for jobs in ('1', '3'):
+                completed = subprocess.run(
+                    [sys.executable, str(SCRIPT_ROOT / 'update_workflows.py'), '--check', '--jobs', jobs, *temp_paths],
+                    capture_output=True,
+                    text=True,
+                    check=False
+                )
+                runs.append(completed)
+
+        self.assertEqual(runs[0].returncode, 4, runs[0].stdout + runs[0].stderr)
+        self.assertEqual(runs[1].returncode, runs[0].returncode, runs[1].stdout + runs[1].stderr)
+        self.assertEqual(runs[1].stdout, runs[0].stdout)
+
+    def test_diff_mode_prints_unified_diff_without_writing(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            drifted_path = Path(temp_dir) / 'pester-selfhosted.yml'
+            original = (
+                "name: Pester (self-hosted)\n"
+                "on:\n"
+                "  workflow_dispatch:\n"
+                "    inputs: {}\n"
+            )
+            drifted_path.write_text(original, encoding='utf-8', newline='\n')
+            cache_dir = Path(temp_dir) / 'cache'
+            argv = ['--diff', '--cache-dir', str(cache_dir), str(drifted_path)]
+
+            outputs = []
+            for _ in range(2):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    self.assertEqual(updater_main(argv), 3)
+                outputs.append(output.getvalue())
+
+            self.assertEqual(drifted_path.read_text(encoding='utf-8'), original)
+        label = drifted_path.as_posix().lstrip('/')
+        self.assertIn(f'NEEDS UPDATE: {drifted_path}', outputs[0])
+        self.assertIn(f'--- a/{label}\n+++ b/{label}\n', outputs[0])
+        self.assertIn('-    inputs: {}\n', outputs[0])
+        self.assertIn('+      force_run:\n', outputs[0])
+        # The second run is answered from the cache and still carries the diff.
+        self.assertEqual(outputs[1], outputs[0])
+
+    def test_diff_is_against_the_text_that_was_transformed(self) -> None:
+        from _update_workflows_impl import RunOptions, _process_file
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'ci.yml'
+            path.write_text('name: CI\n', encoding='utf-8')
+
+            def transform(target, **kwargs):
+                # Someone edits the file while it is being transformed.
+                target.write_text('name: edited underneath\n', encoding='utf-8')
+                return True, kwargs['text'] + 'on: push\n'
+
+            with patch('_update_workflows_impl.apply_transforms', side_effect=transform):
+                verdict = _process_file(str(path), RunOptions(diff=True))
+
+        self.assertIn(' name: CI\n+on: push\n', verdict.diff)
+        self.assertNotIn('underneath', verdict.diff)
+
+    def test_updater_rejects_invalid_jobs_value(self) -> None:
+        self.assertEqual(updater_main(['--check', '--jobs', 'many', 'validate.yml']), 2)
+        self.assertEqual(updater_main(['--check', '--jobs']), 2)
+
+
+class WorkflowUpdaterResultCacheTests(unittest.TestCase):
+    def test_warm_check_reuses_cached_verdicts_without_transforming(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir) / 'cache'
+            clean_path = Path(temp_dir) / 'smoke.yml'
+            clean_path.write_text(
+                (REPO_ROOT / '.github' / 'workflows' / 'smoke.yml').read_text(encoding='utf-8'),
+                encoding='utf-8',
+                newline='\n'
+            )
+            drifted_path = Path(temp_dir) / 'pester-selfhosted.yml'
+            drifted_path.write_text(
+                "name: Pester (self-hosted)\n"
+                "on:\n"
+                "  workflow_dispatch:\n"
+                "    inputs: {}\n",
+                encoding='utf-8',
+                newline='\n'
+            )
+            argv = ['--check', '--cache-dir', str(cache_dir), str(clean_path), str(drifted_path)]
+
+            self.assertEqual(updater_main(argv), 3)
+            with patch('_update_workflows_impl.apply_transforms', side_effect=AssertionError('cache miss')):
+                self.assertEqual(updater_main(argv), 3)
+                self.assertEqual(updater_main(['--write', *argv[1:]]), 0)
+                self.assertIn('force_run', drifted_path.read_text(encoding='utf-8'))
+                self.assertEqual(updater_main(argv), 0)
+
+    def test_cache_evicts_least_recently_used_entries(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = ResultCache(Path(temp_dir), max_bytes=10 ** 9)
+            keys = [format(i, '064x') for i in range(3)]
+            for i, key in enumerate(keys):
+                cache.put(key, True, 'x' * 100)
+                os.utime(cache._entry_path(key), ns=(i * 10 ** 9, i * 10 ** 9))
+            self.assertIsNotNone(cache.get(keys[0]))
+            cache.max_bytes = cache._entry_path(keys[0]).stat().st_size * 2
+
+            self.assertEqual(cache.prune(), 1)
+            self.assertIsNotNone(cache.get(keys[0]))
+            self.assertIsNone(cache.get(keys[1]))
+            self.assertIsNotNone(cache.get(keys[2]))
+
+    def test_cache_round_trips_through_single_file_export(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = ResultCache(Path(temp_dir) / 'source')
+            source.put('a' * 64, True, 'name: normalized\n')
+            source.put('b' * 64, False, None)
+            export_path = Path(temp_dir) / 'cache-export.json'
+
+            self.assertEqual(source.export_to(export_path), 2)
+            self.assertIn(CACHE_SCHEMA, export_path.read_text(encoding='utf-8'))
+            target = ResultCache(Path(temp_dir) / 'target')
+            self.assertEqual(target.import_from(export_path), 2)
+            self.assertEqual(target.get('a' * 64), (True, 'name: normalized\n'))
+            self.assertEqual(target.get('b' * 64), (False, None))
+
+            export_path.write_text('{"schema":"other@v1","entries":[]}', encoding='utf-8')
+            with self.assertRaisesRegex(RuntimeError, 'not a workflow updater cache export'):
+                target.import_from(export_path)
+
+
+class WorkflowUpdaterPrefilterTests(unittest.TestCase):
+    def test_prefilter_short_circuits_files_without_transform_anchors(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            unrelated_path = Path(temp_dir) / 'docs-only.yml'
+            unrelated_path.write_text(
+                "name: Docs\n"
+                "on: [push]\n"
+                "jobs:\n"
+                "  build:\n"
+                "    runs-on: ubuntu-latest\n"
+                "    steps:\n"
+                "    - run: echo docs\n",
+                encoding='utf-8',
+                newline='\n'
+            )
+            output = io.StringIO()
+            with patch('_update_workflows_impl._yaml', side_effect=AssertionError('round-trip loaded')):
+                with contextlib.redirect_stdout(output):
+                    exit_code = updater_main(['--check', '--no-cache', str(unrelated_path)])
+
+        self.assertEqual(exit_code, 0)
+        self.assertIn(f'short-circuited (no transform anchors): {unrelated_path}', output.getvalue())
+
+    def test_drifted_probes_without_a_checkout_still_reach_the_wire_transform(self) -> None:
+        text = (
+            'name: Validate\n'
+            'on: push\n'
+            'jobs:\n'
+            '  build:\n'
+            '    runs-on: ubuntu-latest\n'
+            '    steps:\n'
+            '    - name: Wire Probe (J1)\n'
+            '      uses: ./.github/actions/wire-probe\n'
+            '      with:\n'
+            '        phase: J9\n'
+            '    - run: echo build\n'
+        )
+        self.assertTrue(prefilter_may_apply('validate.yml', text))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'validate.yml'
+            path.write_text(text, encoding='utf-8', newline='\n')
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                exit_code = updater_main(['--check', '--no-cache', str(path)])
+
+        self.assertEqual(exit_code, 3, output.getvalue())
+        self.assertNotIn('short-circuited', output.getvalue())
+
+    def test_prefiltered_files_that_do_not_parse_fail_closed(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            broken_path = Path(temp_dir) / 'broken.yml'
+            broken_path.write_text('jobs: [\n', encoding='utf-8')
+            self.assertFalse(prefilter_may_apply(broken_path.name, broken_path.read_text(encoding='utf-8')))
+            for extra in ([], ['--jobs', '2'], ['--profile', str(Path(temp_dir) / 'profile.json')]):
+                with self.subTest(extra=extra), contextlib.redirect_stdout(io.StringIO()) as output:
+                    exit_code = updater_main(['--check', '--no-cache', *extra, str(broken_path), str(broken_path)])
+                self.assertEqual(exit_code, 4)
+                self.assertNotIn('short-circuited', output.getvalue())
+
+    def test_prefilter_keeps_files_with_anchors_or_unconditional_routes(self) -> None:
+        self.assertTrue(prefilter_may_apply('ci-orchestrated.yml', 'name: Orchestrated\n'))
+        self.assertTrue(prefilter_may_apply('other.yml', f'steps:\n- name: {HOSTED_NOTICE_STEP_NAME}\n'))
+        self.assertTrue(prefilter_may_apply('other.yml', "name: 'Pester (self-hosted)'\non:\n  workflow_dispatch: {}\n"))
+        self.assertFalse(prefilter_may_apply('smoke.yml', 'name: Smoke\njobs:\n  build: {}\n'))
+        for source_path in (REPO_ROOT / '.github' / 'workflows').glob('*.yml'):
+            with self.subTest(workflow=source_path.name):
+                text = source_path.read_text(encoding='utf-8')
+                if not prefilter_may_apply(source_path.name, text):
+                    self.assertEqual(transform_text(source_path, text, prefilter=False), (False, text))
+
+
+class WorkflowTransformRegistryTests(unittest.TestCase):
+    def test_plans_route_by_file_name_and_workflow_name(self) -> None:
+        validate_plan = [spec.name for spec in transform_plan('validate.yml', 'Validate')]
+        self.assertEqual(
+            validate_plan,
+            ['hosted.normalize-preflight-steps', 'validate.lint-resiliency', 'validate.wire.probes', 'validate.wire.S1']
+        )
+        integration_plan = [spec.name for spec in transform_plan('pester-integration.yml', 'Pester (integration)')]
+        self.assertIn('pester.force-run-input', integration_plan)
+        self.assertEqual([spec.name for spec in transform_plan('ci-orchestrated-v2.yml', '')], ['hosted.normalize-preflight-steps'])
+
+    def test_registry_dependencies_follow_registration_order(self) -> None:
+        names = [spec.name for spec in TRANSFORMS]
+        self.assertEqual(len(names), len(set(names)))
+        for spec in TRANSFORMS:
+            for dependency in spec.after:
+                self.assertIn(dependency, names)
+                self.assertLess(names.index(dependency), names.index(spec.name), spec.name)
+
+    def test_group_modules_load_only_when_a_plan_needs_them(self) -> None:
+        smoke_path = REPO_ROOT / '.github' / 'workflows' / 'smoke.yml'
+        script = (
+            'import sys\n'
+            'from pathlib import Path\n'
+            'import _update_workflows_impl as impl\n'
+            f'text = Path(r"{smoke_path}").read_text(encoding="utf-8")\n'
+            'impl.transform_text(Path("smoke.yml"), text, prefilter=False)\n'
+            'print(sorted(m for m in sys.modules if m.startswith("_transforms_")))\n'
+            'impl.transform_text(Path("validate.yml"), "jobs:\\n  lint:\\n    steps: []\\n")\n'
+            'print(sorted(m for m in sys.modules if m.startswith("_transforms_")))\n'
+        )
+        completed = subprocess.run(
+            [sys.executable, '-c', script],
+            capture_output=True,
+            text=True,
+            cwd=str(SCRIPT_ROOT),
+            check=False
+        )
+
+        self.assertEqual(completed.returncode, 0, completed.stdout + completed.stderr)
+        self.assertEqual(completed.stdout.splitlines(), ['[]', "['_transforms_wire']"])
+
+
+class WorkflowUpdaterFastCheckTests(unittest.TestCase):
+    def test_plain_loader_keeps_scalar_styles(self) -> None:
+        from _fast_check import load_plain
+        doc = load_plain("a: |\n  body\nb: 'single'\nc: \"double\"\nd: plain\n")
+        self.assertIsInstance(doc['a'], LiteralScalarString)
+        self.assertIsInstance(doc['b'], SingleQuotedScalarString)
+        self.assertIs(type(doc['d']), str)
+
+    def test_plain_loader_marks_what_the_round_trip_loader_sees_as_decorated(self) -> None:
+        from _fast_check import load_plain
+        text = (
+            "jobs:\n"
+            "  a:\n"
+            "    needs: [x, y]\n"
+            "    steps:\n"
+            "    # above the first step\n"
+            "    - run: |\n"
+            "        # shell comment, not YAML\n"
+            "        true\n"
+            "    - with: &w\n"
+            "        k: v  # trailing\n"
+            "  b:\n"
+            "    steps:\n"
+            "    - run: '# quoted'\n"
+            "    - uses: x\n"
+        )
+        round_trip, plain = transform_yaml.load(text), load_plain(text)
+        nodes = lambda doc: {
+            'needs': doc['jobs']['a']['needs'],
+            'a.steps': doc['jobs']['a']['steps'],
+            'a.run-step': doc['jobs']['a']['steps'][0],
+            'a.with': doc['jobs']['a']['steps'][1]['with'],
+            'b.steps': doc['jobs']['b']['steps'],
+            'b.run-step': doc['jobs']['b']['steps'][0],
+        }
+        expected = {'needs': True, 'a.steps': True, 'a.run-step': False, 'a.with': True, 'b.steps': False, 'b.run-step': False}
+        for label, node in nodes(plain).items():
+            with self.subTest(node=label):
+                self.assertEqual(decorated(node), expected[label])
+                # Never less than the round-trip loader sees.
+                if decorated(nodes(round_trip)[label]):
+                    self.assertTrue(decorated(node))
+
+    def test_committed_workflows_clear_the_fast_check(self) -> None:
+        for name in ('validate.yml', 'ci-orchestrated.yml'):
+            with self.subTest(workflow=name):
+                text = (REPO_ROOT / '.github' / 'workflows' / name).read_text(encoding='utf-8')
+                self.assertFalse(fast_check_may_change(name, text))
+
+    def test_fast_check_never_clears_a_file_the_round_trip_would_change(self) -> None:
+        samples = [(path.name, path.read_text(encoding='utf-8')) for path in sorted((REPO_ROOT / '.github' / 'workflows').glob('*.yml'))]
+        samples.append(('pester-selfhosted.yml', 'name: Pester (self-hosted)\non:\n  workflow_dispatch:\n    inputs: {}\n'))
+        samples.append(('validate.yml', 'name: Validate\njobs:\n  lint:\n    steps: []\n'))
+        for name, text in samples:
+            with self.subTest(workflow=name):
+                changed, _ = transform_text(Path(name), text, prefilter=False)
+                if changed:
+                    self.assertTrue(fast_check_may_change(name, text))
+
+    def test_clean_files_skip_the_round_trip_loader(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            clean_path = Path(temp_dir) / 'smoke.yml'
+            clean_path.write_text(
+                (REPO_ROOT / '.github' / 'workflows' / 'smoke.yml').read_text(encoding='utf-8'),
+                encoding='utf-8',
+                newline='\n'
+            )
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                with patch('_update_workflows_impl.yaml.load', side_effect=AssertionError('round-trip load')):
+                    self.assertEqual(updater_main(['--check', '--no-cache', str(clean_path)]), 0)
+                    self.assertEqual(updater_main(['--check', '--no-cache', '--no-fast-check', str(clean_path)]), 4)
+
+
+class WorkflowUpdaterProfileTests(unittest.TestCase):
+    def test_profile_report_records_phases_transforms_and_cprofile(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            drifted_path = Path(temp_dir) / 'pester-selfhosted.yml'
+            drifted_path.write_text(
+                "name: Pester (self-hosted)\n"
+                "on:\n"
+                "  workflow_dispatch:\n"
+                "    inputs: {}\n",
+                encoding='utf-8',
+                newline='\n'
+            )
+            report_path = Path(temp_dir) / 'profile.json'
+            stats_path = Path(temp_dir) / 'slowest.prof'
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                exit_code = updater_main([
+                    '--write', '--profile', str(report_path), '--profile-cprofile', str(stats_path), str(drifted_path)
+                ])
+
+            self.assertEqual(exit_code, 0, output.getvalue())
+            report = json.loads(report_path.read_text(encoding='utf-8'))
+            self.assertTrue(stats_path.is_file())
+
+        self.assertEqual(report['schema'], 'comparevi/workflow-updater-profile@v1')
+        self.assertEqual(report['cprofile']['file'], str(drifted_path))
+        [file_report] = report['files']
+        self.assertTrue(file_report['changed'])
+        phases = {record['phase']: record for record in file_report['phases']}
+        for name in ('read', 'parse', 'dump', 'compare', 'write'):
+            self.assertIn(name, phases)
+            self.assertGreaterEqual(phases[name]['peakBytes'], 0)
+        self.assertTrue(phases['transform:pester.force-run-input']['changed'])
+        self.assertIn('changed', phases['transform:pester.preinit-force-run-outputs'])
+
+    def test_profile_times_every_transform_on_unchanged_large_workflows(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for name in ('ci-orchestrated.yml', 'validate.yml'):
+                path = Path(temp_dir) / name
+                path.write_text((REPO_ROOT / '.github' / 'workflows' / name).read_text(encoding='utf-8'), encoding='utf-8', newline='\n')
+                paths.append(path)
+            report_path = Path(temp_dir) / 'profile.json'
+            with contextlib.redirect_stdout(io.StringIO()):
+                exit_code = updater_main(['--check', '--profile', str(report_path), *map(str, paths)])
+            report = json.loads(report_path.read_text(encoding='utf-8'))
+
+        self.assertEqual(exit_code, 0)
+        for path, file_report in zip(paths, report['files']):
+            with self.subTest(workflow=path.name):
+                self.assertFalse(file_report['changed'])
+                phases = [record['phase'] for record in file_report['phases']]
+                self.assertNotIn('fast-check', phases)
+                for name in ('read', 'prefilter', 'parse'):
+                    self.assertIn(name, phases)
+                doc_name = transform_yaml.load((REPO_ROOT / '.github' / 'workflows' / path.name).read_text(encoding='utf-8'))['name']
+                expected = [f'transform:{spec.name}' for spec in transform_plan(path.name, doc_name)]
+                self.assertEqual([phase for phase in phases if phase.startswith('transform:')], expected)
+
+    def test_cprofile_requires_profile(self) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(updater_main(['--check', '--profile-cprofile', 'x.prof', 'validate.yml']), 2)
+
+
+class WorkflowFusedJobVisitorTests(unittest.TestCase):
+    @staticmethod
+    def _strip_wire_steps(doc, keep_every: int) -> None:
+        for job in (doc.get('jobs') or {}).values():
+            steps = job.get('steps') if isinstance(job, dict) else None
+            if not isinstance(steps, list):
+                continue
+            wire = [i for i, step in enumerate(steps)
+                    if isinstance(step, dict) and (str(step.get('name', '')).startswith('Wire ') or '/wire-' in str(step.get('uses', '')))]
+            for i in reversed(wire[::keep_every] if keep_every > 1 else wire):
+                del steps[i]
+
+    def test_fused_walk_matches_sequential_rules_on_real_workflows(self) -> None:
+        fused_files = 0
+        for path in sorted((REPO_ROOT / '.github' / 'workflows').glob('*.yml')):
+            text = path.read_text(encoding='utf-8')
+            doc_name = transform_yaml.load(text).get('name', '')
+            plan = transform_plan(path.name, doc_name if isinstance(doc_name, str) else '')
+            if sum(spec.job_hook is not None for spec in plan) < 2:
+                continue
+            fused_files += 1
+            for keep_every in (0, 1, 2):
+                with self.subTest(workflow=path.name, drift=keep_every):
+                    outputs = []
+                    for fuse in (True, False):
+                        doc = transform_yaml.load(text)
+                        if keep_every:
+                            self._strip_wire_steps(doc, keep_every)
+                        with indexed(doc):
+                            changed = run_plan(doc, plan, fuse=fuse)
+                        outputs.append((changed, dump_yaml(doc)))
+                    self.assertEqual(outputs[0], outputs[1])
+                    if keep_every:
+                        self.assertTrue(outputs[0][0])
+        self.assertGreaterEqual(fused_files, 2)
+
+
+class WorkflowJobMemoTests(unittest.TestCase):
+    def test_memo_skips_jobs_no_hook_changed_and_never_hides_a_reported_change(self) -> None:
+        calls = []
+
+        def noop(jobs, jn, job):
+            calls.append(('noop', jn))
+            return False
+
+        def rebuild(jobs, jn, job):
+            # Reports a change but hands back an identical job.
+            calls.append(('rebuild', jn))
+            jobs[jn] = dict(job)
+            return True
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            memo = JobMemo(ResultCache(Path(temp_dir)), 'test')
+            doc = {'jobs': {'a': {'steps': [{'run': 'a'}]}, 'b': {'steps': [{'run': 'b'}]}}}
+            self.assertEqual(visit_jobs(doc, [(noop, ())], memo, 'noop'), [False])
+            self.assertEqual(visit_jobs(doc, [(noop, ())], memo, 'noop'), [False])
+            self.assertEqual(calls, [('noop', 'a'), ('noop', 'b')])
+            # Only the edited job is re-run; another hook set has its own entries.
+            doc['jobs']['b']['steps'].append({'run': 'b2'})
+            self.assertEqual(visit_jobs(doc, [(noop, ())], memo, 'noop'), [False])
+            self.assertEqual(calls[2:], [('noop', 'b')])
+            for _ in range(2):
+                self.assertEqual(visit_jobs(doc, [(rebuild, ())], memo, 'rebuild'), [True])
+            self.assertEqual(calls[3:], [('rebuild', 'a'), ('rebuild', 'b')] * 2)
+
+    def test_memo_never_records_a_job_a_hook_changed_silently(self) -> None:
+        calls = []
+
+        def silent(jobs, jn, job):
+            calls.append(jn)
+            job.setdefault('steps', [])
+            return False
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            memo = JobMemo(ResultCache(Path(temp_dir)), 'test')
+            for _ in range(2):
+                self.assertEqual(visit_jobs({'jobs': {'reuse': {'uses': './x.yml'}}}, [(silent, ())], memo, 'silent'), [False])
+        self.assertEqual(calls, ['reuse', 'reuse'])
+
+    def test_write_output_does_not_depend_on_the_cache(self) -> None:
+        text = (
+            'name: CI Orchestrated\n'
+            'on: push\n'
+            'jobs:\n'
+            '  reuse:\n'
+            '    uses: ./.github/workflows/other.yml\n'
+            '  invoke:\n'
+            '    runs-on: ubuntu-latest\n'
+            '    steps:\n'
+            '    - name: Ensure Invoker (start)\n'
+            '      run: echo start\n'
+        )
+        written = {}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = ['--cache-dir', str(Path(temp_dir) / 'cache')]
+            for label, argv in (('check', ['--check', *cache]), ('cached', ['--write', *cache]), ('uncached', ['--write', '--no-cache'])):
+                path = Path(temp_dir) / label / 'ci-orchestrated.yml'
+                path.parent.mkdir()
+                path.write_text(text, encoding='utf-8', newline='\n')
+                with contextlib.redirect_stdout(io.StringIO()):
+                    updater_main([*argv, str(path)])
+                written[label] = path.read_text(encoding='utf-8')
+
+        self.assertEqual(written['cached'], written['uncached'])
+        self.assertIn('Wire Invoker (start)', written['uncached'])
+        self.assertNotIn('steps', transform_yaml.load(written['uncached'])['jobs']['reuse'])
+
+    def test_memo_keeps_verdicts(self) -> None:
+        drifted = Path('pester-selfhosted.yml'), WorkflowEnclaveAllScopeTests.DRIFTED
+        real = [(path, path.read_text(encoding='utf-8')) for path in sorted((REPO_ROOT / '.github' / 'workflows').glob('*.yml'))]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            memo = JobMemo(ResultCache(Path(temp_dir)), 'test')
+            for path, text in [drifted, *real]:
+                expected = transform_text(path, text)
+                for attempt in ('cold', 'warm'):
+                    with self.subTest(workflow=path.name, memo=attempt):
+                        self.assertEqual(transform_text(path, text, fast_check=True, memo=memo), expected)
+                        self.assertEqual(transform_text(path, text, memo=memo), expected)
+
+    def test_check_verdict_does_not_depend_on_the_cache(self) -> None:
+        lines = (REPO_ROOT / '.github' / 'workflows' / 'validate.yml').read_text(encoding='utf-8').split('\n')
+        first = lines.index('  lint:') + lines[lines.index('  lint:'):].index('    steps:') + 1
+        after_j2 = next(i for i in range(first, len(lines)) if lines[i].startswith('    - ') and 'Wire Probe' not in lines[i]
+                        and i > lines.index('    - name: Wire Probe (J2)', first))
+        cases = {
+            'before-first-step': first,
+            'after-j2': after_j2,
+        }
+        for label, at in cases.items():
+            with self.subTest(comment=label), tempfile.TemporaryDirectory() as temp_dir:
+                path = Path(temp_dir) / 'validate.yml'
+                path.write_text('\n'.join([*lines[:at], '    # managed wire probes', *lines[at:]]), encoding='utf-8', newline='\n')
+                with contextlib.redirect_stdout(io.StringIO()):
+                    uncached = updater_main(['--check', '--no-cache', str(path)])
+                    cached = [updater_main(['--check', '--cache-dir', str(Path(temp_dir) / 'cache'), str(path)]) for _ in range(2)]
+                self.assertEqual(cached, [uncached, uncached])
+                if label == 'after-j2':
+                    # Rebuilding J2 drops the comment that hangs on it.
+                    self.assertEqual(uncached, 3)
+
+
+class WorkflowMerkleDigestTests(unittest.TestCase):
+    SAMPLE = (
+        "name: sample\n"
+        "jobs:\n"
+        "  build:\n"
+        "    runs-on: ubuntu-latest\n"
+        "    steps:\n"
+        "    - name: One\n"
+        "      run: echo 1\n"
+        "  test:\n"
+        "    runs-on: 'ubuntu-latest'\n"
+        "    steps:\n"
+        "    - name: Two # why\n"
+        "      run: |\n"
+        "        echo 2\n"
+    )
+
+    def test_digests_cover_scalar_style_order_and_comments(self) -> None:
+        doc = transform_yaml.load(self.SAMPLE)
+        build, test = doc['jobs']['build'], doc['jobs']['test']
+        self.assertEqual(node_digest(build['steps']), node_digest([{'name': 'One', 'run': 'echo 1'}]))
+        self.assertNotEqual(node_digest(build['runs-on']), node_digest(test['runs-on']))
+        self.assertEqual(node_digest(test['runs-on']), node_digest(SQS('ubuntu-latest')))
+        self.assertNotEqual(node_digest(test['steps'][0]['run']), node_digest('echo 2\n'))
+        self.assertNotEqual(node_digest({'a': 1, 'b': 2}), node_digest({'b': 2, 'a': 1}))
+        # The trailing comment on `name` belongs to the step map.
+        self.assertNotEqual(node_digest(test['steps'][0]), node_digest(dict(test['steps'][0])))
+
+    def test_changed_jobs_follow_the_mutated_path_only(self) -> None:
+        doc = transform_yaml.load(self.SAMPLE)
+        before = digest_document(doc)
+        doc['jobs']['test']['steps'][0]['run'] = LiteralScalarString('echo 3\n')
+        after = digest_document(doc)
+        self.assertNotEqual(after.root, before.root)
+        self.assertEqual(after.top_level, before.top_level)
+        self.assertEqual(changed_jobs(before, after), ['test'])
+
+        doc['jobs']['test']['steps'][0]['run'] = LiteralScalarString('echo 2\n')
+        self.assertEqual(digest_document(doc), before)
+
+    def test_reported_change_that_restores_the_document_skips_the_dump(self) -> None:
+        def churn(doc) -> bool:
+            steps = doc['jobs']['build']['steps']
+            steps.append(steps.pop())
+            return True
+
+        plan = (TransformSpec('test.churn', 'churn'),)
+        with patch('_update_workflows_impl.transform_plan', return_value=plan), \
+                patch('_update_workflows_impl._resolve_transform', return_value=churn), \
+                patch('_update_workflows_impl.dump_yaml', side_effect=AssertionError('dumped an unchanged document')):
+            self.assertEqual(transform_text(Path('sample.yml'), self.SAMPLE, prefilter=False), (False, self.SAMPLE))
+
+
+class WorkflowUpdaterSpliceTests(unittest.TestCase):
+    VALIDATE = (
+        'name: Validate\n'
+        'on: push\n'
+        'jobs:\n'
+        '  lint:\n'
+        '    runs-on: ubuntu-latest\n'
+        '    steps: []\n'
+        '  other:\n'
+        '    runs-on:   ubuntu-latest   # hand-aligned\n'
+        '    steps:\n'
+        '    - run:   echo hi\n'
+    )
+
+    def test_splice_reemits_only_changed_jobs(self) -> None:
+        changed, full = transform_text(Path('validate.yml'), self.VALIDATE)
+        spliced_changed, spliced = transform_text(Path('validate.yml'), self.VALIDATE, splice=True)
+
+        self.assertTrue(changed)
+        self.assertTrue(spliced_changed)
+        untouched = self.VALIDATE[self.VALIDATE.index('  other:'):]
+        self.assertTrue(spliced.endswith(untouched))
+        self.assertNotIn(untouched, full)
+        self.assertEqual(spliced[:spliced.index('  other:')], full[:full.index('  other:')])
+
+    def test_splice_keeps_four_space_jobs_nested_where_they_were(self) -> None:
+        from _fast_check import load_plain
+        text = (
+            'name: Validate\n'
+            'on: push\n'
+            'jobs:\n'
+            '    lint:\n'
+            '        runs-on: ubuntu-latest\n'
+            '        steps: []\n'
+            '    other:\n'
+            '        runs-on:   ubuntu-latest   # hand-aligned\n'
+            '        steps:\n'
+            '            -   run:   echo hi\n'
+        )
+        changed, full = transform_text(Path('validate.yml'), text)
+        spliced_changed, spliced = transform_text(Path('validate.yml'), text, splice=True)
+
+        self.assertTrue(changed)
+        self.assertTrue(spliced_changed)
+        self.assertTrue(spliced.endswith(text[text.index('    other:'):]))
+        self.assertEqual(list(load_plain(spliced)['jobs']), ['lint', 'other'])
+        self.assertEqual(load_plain(spliced), load_plain(full))
+        # Emitting with the wrong indentation is caught and falls back to a full dump.
+        with patch('_splice._detect_indent', return_value=(2, 2, 0)):
+            self.assertEqual(transform_text(Path('validate.yml'), text, splice=True), (changed, full))
+
+    def test_splice_falls_back_to_full_dump_outside_jobs(self) -> None:
+        text = (
+            'name: Pester (self-hosted)\n'
+            'on:\n'
+            '  workflow_dispatch:\n'
+            '    inputs: {}\n'
+            'jobs:\n'
+            '  noop:\n'
+            '    runs-on:   ubuntu-latest\n'
+        )
+        self.assertEqual(
+            transform_text(Path('pester-selfhosted.yml'), text, splice=True),
+            transform_text(Path('pester-selfhosted.yml'), text)
+        )
+
+    def test_splice_matches_full_dump_on_repo_workflows(self) -> None:
+        for path in sorted((REPO_ROOT / '.github' / 'workflows').glob('*.yml')):
+            text = path.read_text(encoding='utf-8')
+            with self.subTest(workflow=path.name):
+                self.assertEqual(
+                    transform_text(path, text, prefilter=False, splice=True),
+                    transform_text(path, text, prefilter=False)
+                )
+
+
+class WorkflowStepIndexTests(unittest.TestCase):
+    def test_insert_delete_and_refresh_keep_positions_current(self) -> None:
+        steps = [
+            {'uses': 'actions/checkout@v5'},
+            {'name': 'Build', 'id': 'build'},
+            {'name': 'Test', 'uses': './.github/actions/session-index-post'},
+        ]
+        index = StepIndex(steps)
+
+        index.insert(1, {'name': 'Probe'})
+        self.assertEqual(index.first('name', 'Build'), 2)
+        self.assertEqual(index.first('id', 'build'), 2)
+        self.assertEqual(index.first_matching('uses', lambda uses: uses.endswith('session-index-post')), 3)
+
+        index.delete(0)
+        self.assertEqual(index.first('name', 'Probe'), 0)
+        self.assertIsNone(index.first_matching('uses', lambda uses: uses.startswith('actions/checkout@')))
+
+        steps[1]['name'] = 'Build (renamed)'
+        index.refresh(1)
+        self.assertFalse(index.has('name', 'Build'))
+        self.assertEqual(index.positions('name', 'Build (renamed)'), [1])
+
+        steps.append({'name': 'Appended directly'})
+        self.assertEqual(index.first('name', 'Appended directly'), 3)
+
+    def test_indexed_document_shares_one_index_per_steps_list(self) -> None:
+        doc = {'jobs': {'a': {'steps': [{'name': 'One'}]}, 'b': {'steps': []}}}
+        steps = doc['jobs']['a']['steps']
+        with indexed(doc):
+            self.assertIs(index_for(steps), index_for(steps))
+        self.assertIsNot(index_for(steps), index_for(steps))
+
+
+class WorkflowStepTemplateTests(unittest.TestCase):
+    def test_templates_are_interned_and_build_fresh_nodes(self) -> None:
+        template = _mk_hosted_notice_step()
+        self.assertIs(template, _mk_hosted_notice_step())
+        first, second = template.build(), template.build()
+        self.assertEqual(first, second)
+        self.assertIsNot(first['run'], second['run'])
+        self.assertIsInstance(first['run'], LiteralScalarString)
+        self.assertEqual(first['name'], HOSTED_NOTICE_STEP_NAME)
+
+    def test_field_matches_ignores_scalar_style_and_mapping_order(self) -> None:
+        template = StepTemplate({
+            'name': 'Probe',
+            'if': SQS('${{ always() }}'),
+            'with': {'phase': 'J1', 'results-dir': 'tests/results'},
+        })
+        step = {'name': 'Probe', 'if': '${{ always() }}', 'with': {'results-dir': 'tests/results', 'phase': 'J1'}}
+        for key in ('name', 'if', 'with'):
+            self.assertTrue(template.field_matches(step, key), key)
+        self.assertFalse(template.field_matches({'name': 'Probe', 'with': {'phase': 'J2'}}, 'with'))
+        self.assertFalse(template.field_matches({'name': 'Probe'}, 'if'))
+
+    def test_emits_same_is_strict_about_style_order_and_comments(self) -> None:
+        template = StepTemplate({'name': 'Probe', 'if': SQS('${{ always() }}'), 'with': {'phase': 'J1'}})
+        doc = transform_yaml.load(
+            "a:\n  name: Probe\n  if: '${{ always() }}'\n  with:\n    phase: J1\n"
+            "b:\n  name: Probe\n  if: \"${{ always() }}\"\n  with:\n    phase: J1\n"
+            "c:\n  if: '${{ always() }}'\n  name: Probe\n  with:\n    phase: J1\n"
+            "d:\n  name: Probe\n  if: '${{ always() }}'\n  with:\n    phase: J1  # keep\n"
+        )
+        self.assertTrue(template.emits_same(doc['a']))
+        for key in ('b', 'c', 'd'):
+            self.assertFalse(template.emits_same(doc[key]), key)
+
+
+class WorkflowWireProbeIdempotenceTests(unittest.TestCase):
+    def test_normalized_workflows_report_no_change_and_skip_the_dump(self) -> None:
+        for name in ('ci-orchestrated.yml', 'validate.yml'):
+            with self.subTest(workflow=name):
+                path = REPO_ROOT / '.github' / 'workflows' / name
+                text = path.read_text(encoding='utf-8')
+                doc = transform_yaml.load(text)
+                with indexed(doc):
+                    self.assertFalse(run_plan(doc, transform_plan(name, doc.get('name', ''))))
+                with patch('_update_workflows_impl.dump_yaml', side_effect=AssertionError('dumped a clean file')):
+                    self.assertEqual(transform_text(path, text), (False, text))
+
+    def test_misplaced_or_restyled_probes_are_still_rewritten(self) -> None:
+        probe = (
+            "    - name: Wire Probe ({phase})\n"
+            "      if: {cond}\n"
+            "      uses: ./.github/actions/wire-probe\n"
+            "      with:\n"
+            "        phase: {phase}\n"
+            "        results-dir: tests/results\n"
+        )
+        canonical = "'${{ vars.WIRE_PROBES != ''0'' }}'"
+        head = "name: Validate\non: push\njobs:\n  lint:\n    runs-on: ubuntu-latest\n    steps:\n"
+        checkout = "    - uses: actions/checkout@v5\n"
+        in_place = head + checkout + probe.format(phase='J1', cond=canonical) + probe.format(phase='J2', cond=canonical)
+        cases = {
+            'in-place': (in_place, False),
+            'misplaced': (head + probe.format(phase='J1', cond=canonical) + checkout + probe.format(phase='J2', cond=canonical), True),
+            'restyled': (in_place.replace(canonical, '"${{ vars.WIRE_PROBES != \'0\' }}"', 1), True),
+            'commented': (head + '    # steps below are managed\n' + in_place[len(head):], True),
+        }
+        from _fast_check import load_plain
+        for label, (text, expect_changed) in cases.items():
+            for loader in (transform_yaml.load, load_plain):
+                with self.subTest(case=label, loader=loader.__name__):
+                    doc = loader(text)
+                    with indexed(doc):
+                        self.assertEqual(ensure_wire_probes_all_jobs(doc), expect_changed)
+                    if loader is not load_plain:
+                        # The comment also hangs on the job's `steps` key, so it survives the rebuild.
+                        self.assertEqual(dump_yaml(doc), text if label == 'commented' else in_place)
+
+
+class WorkflowUpdaterBenchmarkTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        benchmarks_root = str(SCRIPT_ROOT / 'benchmarks')
+        if benchmarks_root not in sys.path:
+            sys.path.insert(0, benchmarks_root)
+        import bench_updater
+        cls.bench = bench_updater
+
+    def test_scale_workflow_grows_jobs_steps_and_matrix(self) -> None:
+        doc = transform_yaml.load(
+            'jobs:\n'
+            '  test:\n'
+            '    strategy:\n'
+            '      matrix:\n'
+            '        category: [unit, integration]\n'
+            '    steps:\n'
+            '    - uses: actions/checkout@v5\n'
+            '    - run: echo hi\n'
+        )
+        self.bench.scale_workflow(doc, 3)
+
+        self.assertEqual(list(doc['jobs']), ['test', 'test-x1', 'test-x2'])
+        self.assertEqual(len(doc['jobs']['test']['steps']), 6)
+        self.assertEqual(len(doc['jobs']['test-x1']['steps']), 2)
+        self.assertEqual(len(doc['jobs']['test']['strategy']['matrix']['category']), 6)
+
+    def test_regressions_respect_threshold_and_noise_floor(self) -> None:
+        baseline = {'managed': {'load': 1.0, 'dump': 0.001}}
+        current = {'managed': {'load': 1.2, 'dump': 0.003, 'transform:new': 5.0}}
+        self.assertEqual(self.bench.find_regressions(baseline, current, 0.25, 0.005), [])
+        regressions = self.bench.find_regressions(baseline, current, 0.1, 0.005)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('managed load:'))
+
+
+@unittest.skipUnless(_daemon.daemon_supported(), 'Unix domain sockets are unavailable')
+class WorkflowUpdaterWriteStageTests(unittest.TestCase):
+    DRIFTED = (
+        "name: Pester (self-hosted)\n"
+        "on:\n"
+        "  workflow_dispatch:\n"
+        "    inputs: {}\n"
+    )
+
+    def test_writes_are_atomic_renames_that_skip_identical_bytes(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = Path(temp_dir) / 'ci.yml'
+            target.write_text('name: CI\n', encoding='utf-8')
+            os.chmod(target, 0o640)
+            old = time.time_ns() - 60 * 10 ** 9
+            os.utime(target, ns=(old, old))
+
+            stage = WriteStage()
+            self.assertFalse(stage.write(target, 'name: CI\n'))
+            self.assertEqual(target.stat().st_mtime_ns, old)
+            self.assertTrue(stage.write(target, 'name: CI 2\n'))
+
+            self.assertEqual(target.read_text(encoding='utf-8'), 'name: CI 2\n')
+            self.assertEqual(target.stat().st_mode & 0o777, 0o640)
+            self.assertEqual((stage.written, stage.unchanged, stage.bytes_written), ([target], [target], 11))
+            self.assertEqual(sorted(p.name for p in Path(temp_dir).iterdir()), ['ci.yml'])
+
+    def test_transaction_commit_rolls_back_when_a_rename_fails(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = Path(temp_dir) / 'a.yml'
+            second = Path(temp_dir) / 'b.yml'
+            first.write_text('a: 1\n', encoding='utf-8')
+            second.write_text('b: 1\n', encoding='utf-8')
+            stage = WriteStage(transactional=True)
+            stage.write(first, 'a: 2\n')
+            stage.write(second, 'b: 2\n')
+            self.assertEqual(first.read_text(encoding='utf-8'), 'a: 1\n')
+
+            real_replace = os.replace
+            calls = []
+
+            def flaky_replace(src, dst):
+                calls.append(dst)
+                if Path(dst) == second and len(calls) == 2:
+                    raise OSError('disk full')
+                return real_replace(src, dst)
+
+            with patch('_write_stage.os.replace', side_effect=flaky_replace):
+                with self.assertRaises(OSError):
+                    stage.commit()
+
+            self.assertEqual(first.read_text(encoding='utf-8'), 'a: 1\n')
+            self.assertEqual(second.read_text(encoding='utf-8'), 'b: 1\n')
+            self.assertEqual(sorted(p.name for p in Path(temp_dir).iterdir()), ['a.yml', 'b.yml'])
+
+    def test_transactional_write_leaves_every_file_untouched_when_one_fails(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            drifted = Path(temp_dir) / 'pester-selfhosted.yml'
+            drifted.write_text(self.DRIFTED, encoding='utf-8', newline='\n')
+            broken = Path(temp_dir) / 'broken.yml'
+            broken.write_text('name: Pester (self-hosted)\non: workflow_dispatch\njobs: [\n', encoding='utf-8')
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                exit_code = updater_main(['--write', '--transaction', '--no-cache', str(drifted), str(broken)])
+            self.assertEqual(exit_code, 4)
+            self.assertEqual(drifted.read_text(encoding='utf-8'), self.DRIFTED)
+            self.assertIn('transaction aborted: 1 staged write(s) discarded after 1 failure(s)', output.getvalue())
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                exit_code = updater_main(['--write', '--transaction', '--no-cache', str(drifted)])
+            self.assertEqual(exit_code, 0)
+            self.assertNotEqual(drifted.read_text(encoding='utf-8'), self.DRIFTED)
+            self.assertIn(f'updated: {drifted}', output.getvalue())
+            self.assertIn(f'wrote 1 file(s), {drifted.stat().st_size} bytes', output.getvalue())
+            self.assertEqual(sorted(p.name for p in Path(temp_dir).iterdir()), ['broken.yml', 'pester-selfhosted.yml'])
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(updater_main(['--check', '--transaction', 'validate.yml']), 2)
+
+
+class WorkflowUpdaterJournalTests(unittest.TestCase):
+    def _validate_without_j2(self) -> str:
+        text = (REPO_ROOT / '.github' / 'workflows' / 'validate.yml').read_text(encoding='utf-8')
+        start = text.index('- name: Wire Probe (J2)')
+        return text[:start] + text[text.index('- ', start + 2):]
+
+    def test_journal_records_step_level_mutations(self) -> None:
+        records: list = []
+        changed, _ = transform_text(Path('validate.yml'), self._validate_without_j2(), journal=records)
+
+        self.assertTrue(changed)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(
+            {key: records[0][key] for key in ('transform', 'op', 'job', 'step', 'before')},
+            {'transform': 'validate.wire.probes', 'op': 'insert-step', 'job': 'lint', 'step': 'Wire Probe (J2)', 'before': None},
+        )
+        self.assertRegex(records[0]['after'], r'^[0-9a-f]{16}$')
+
+        clean = (REPO_ROOT / '.github' / 'workflows' / 'validate.yml').read_text(encoding='utf-8')
+        records = []
+        self.assertEqual(transform_text(Path('validate.yml'), clean, journal=records), (False, clean))
+        self.assertEqual(records, [])
+
+    def test_fail_fast_stops_at_the_first_mutation_without_dumping(self) -> None:
+        # Drift for two transforms: lint-resiliency (env pin) runs before wire.probes.
+        text = self._validate_without_j2().replace("''1.7.8'' }}'", "''1.7.7'' }}'", 1)
+        records: list = []
+        transform_text(Path('validate.yml'), text, journal=records)
+        self.assertEqual([r['transform'] for r in records], ['validate.lint-resiliency', 'validate.wire.probes'])
+
+        records = []
+        with patch('_update_workflows_impl.dump_yaml', side_effect=AssertionError('dumped under fail-fast')):
+            self.assertEqual(transform_text(Path('validate.yml'), text, journal=records, fail_fast=True), (True, None))
+        self.assertEqual([(r['transform'], r['op'], r['key']) for r in records], [('validate.lint-resiliency', 'set-key', 'env')])
+
+    def test_check_fail_fast_explains_drift_and_writes_journal_lines(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            drifted = Path(temp_dir) / 'validate.yml'
+            drifted.write_text(self._validate_without_j2(), encoding='utf-8', newline='\n')
+            journal_path = Path(temp_dir) / 'journal.jsonl'
+            cache_dir = Path(temp_dir) / 'cache'
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(updater_main(['--check', '--fail-fast', '--journal', str(journal_path), str(drifted)]), 3)
+                self.assertEqual(updater_main(['--check', '--fail-fast', '--cache-dir', str(cache_dir), str(drifted)]), 3)
+                self.assertEqual(updater_main(['--write', '--fail-fast', str(drifted)]), 2)
+            lines = [json.loads(line) for line in journal_path.read_text(encoding='utf-8').splitlines()]
+            # A fail-fast verdict carries no text, so nothing was cached.
+            self.assertEqual(list(cache_dir.glob('*/*.json')), [])
+
+        self.assertEqual(lines[0]['schema'], 'comparevi/workflow-updater-journal@v1')
+        self.assertEqual([(r['path'], r['op'], r['step']) for r in lines[1:]], [(str(drifted), 'insert-step', 'Wire Probe (J2)')])
+        self.assertIn("  validate.wire.probes: insert-step (job lint step 'Wire Probe (J2)')", output.getvalue())
+
+
+class WorkflowUpdaterStdioTests(unittest.TestCase):
+    def test_stdio_answers_each_request_line_without_touching_disk(self) -> None:
+        clean = (REPO_ROOT / '.github' / 'workflows' / 'validate.yml').read_text(encoding='utf-8')
+        start = clean.index('- name: Wire Probe (J2)')
+        drifted = clean[:start] + clean[clean.index('- ', start + 2):]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            virtual = Path(temp_dir) / 'virtual' / 'validate.yml'
+            on_disk = Path(temp_dir) / 'validate.yml'
+            on_disk.write_text(drifted, encoding='utf-8', newline='\n')
+            requests = [
+                {'id': 1, 'path': str(virtual), 'text': drifted},
+                {'id': 2, 'path': str(virtual), 'text': clean, 'mode': 'diff'},
+                {'id': 3, 'path': str(virtual), 'text': drifted, 'mode': 'diff'},
+                {'id': 4, 'path': str(virtual), 'text': clean, 'mode': 'format'},
+                {'id': 5, 'path': str(on_disk), 'mode': 'write'},
+            ]
+            stdin = '\n'.join([*(json.dumps(r) for r in requests[:3]), 'not json', '', *(json.dumps(r) for r in requests[3:])]) + '\n'
+            completed = subprocess.run(
+                [sys.executable, str(SCRIPT_ROOT / 'update_workflows.py'), '--stdio'],
+                input=stdin, capture_output=True, text=True, encoding='utf-8', check=False,
+            )
+            self.assertEqual(completed.returncode, 0, completed.stderr)
+            header, *responses = [json.loads(line) for line in completed.stdout.splitlines()]
+            self.assertFalse(virtual.parent.exists())
+            self.assertEqual(on_disk.read_text(encoding='utf-8'), clean)
+
+        self.assertEqual(header['schema'], 'comparevi/workflow-updater-stdio@v1')
+        self.assertEqual([r.get('id') for r in responses], [1, 2, 3, None, 4, 5])
+        for response in responses:
+            self.assertEqual({'path', 'changed', 'text', 'error', 'durationMs'} - response.keys(), set())
+        self.assertEqual((responses[0]['changed'], responses[0]['text'], responses[0]['error']), (True, clean, None))
+        self.assertEqual((responses[1]['changed'], responses[1]['text'], responses[1]['diff']), (False, clean, ''))
+        self.assertIn('+    - name: Wire Probe (J2)\n', responses[2]['diff'])
+        self.assertIn('invalid JSON request', responses[3]['error'])
+        self.assertIn("unknown mode 'format'", responses[4]['error'])
+        self.assertEqual((responses[5]['changed'], responses[5]['written'], responses[5]['error']), (True, True, None))
+
+
+class WorkflowUpdaterWatchTests(unittest.TestCase):
+    def test_watcher_debounces_bursts_and_ignores_its_own_writes(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            edited = Path(temp_dir) / 'ci-orchestrated.yml'
+            quiet = Path(temp_dir) / 'validate.yml'
+            edited.write_text('name: a\n', encoding='utf-8')
+            quiet.write_text('name: b\n', encoding='utf-8')
+            ticks = []
+            batches = []
+
+            def tick(seconds: float) -> None:
+                ticks.append(seconds)
+                # A burst of saves on ticks 1-3, then nothing.
+                if len(ticks) <= 3:
+                    edited.write_text('name: a' + 'x' * len(ticks) + '\n', encoding='utf-8')
+                time.sleep(seconds)
+
+            def on_change(paths):
+                batches.append([p.name for p in paths])
+                # Rewriting (as --write does) must not trigger another batch.
+                edited.write_text('name: normalized\n', encoding='utf-8')
+
+            watch_files([edited, quiet], on_change, interval=0.02, debounce=0.5,
+                        should_stop=lambda: len(ticks) >= 60, sleep=tick)
+
+        self.assertEqual(batches, [['ci-orchestrated.yml']])
+
+    def test_watch_mode_reports_initial_drift_then_rechecks_changed_files(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            workflow_path = Path(temp_dir) / 'pester-selfhosted.yml'
+            drifted = (
+                "name: Pester (self-hosted)\n"
+                "on:\n"
+                "  workflow_dispatch:\n"
+                "    inputs: {}\n"
+            )
+            workflow_path.write_text(drifted, encoding='utf-8', newline='\n')
+
+            def fake_watch(paths, on_change, interval, debounce):
+                self.assertEqual((interval, debounce), (0.5, 0.0))
+                on_change(paths)
+
+            output = io.StringIO()
+            with patch('_watch.watch_files', side_effect=fake_watch), contextlib.redirect_stdout(output):
+                exit_code = updater_main(['--write', '--watch', '--interval', '0.5', '--debounce', '0', str(workflow_path)])
+
+        self.assertEqual(exit_code, 0)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], f'updated: {workflow_path}')
+        self.assertTrue(lines[1].startswith('wrote 1 file(s)'))
+        self.assertTrue(lines[2].startswith('watching 1 file(s)'))
+        self.assertTrue(lines[3].endswith(f'changed: {workflow_path}'))
+        self.assertEqual(lines[4], f'clean: {workflow_path}')
+
+    def test_watch_rejects_profile_and_bad_timings(self) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(updater_main(['--check', '--watch', '--profile', 'p.json', 'validate.yml']), 2)
+            self.assertEqual(updater_main(['--check', '--watch', '--debounce', 'soon', 'validate.yml']), 2)
+
+
+class WorkflowShardTests(unittest.TestCase):
+    def test_shards_partition_the_scope_by_weight_whatever_the_input_order(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            files = []
+            for i, size in enumerate((900, 500, 400, 300, 200, 100, 100)):
+                path = Path(temp_dir) / f'w{i}.yml'
+                path.write_text('x' * size, encoding='utf-8')
+                files.append(str(path))
+            slices = [select_shard(files, f'{i}/3')[0] for i in (1, 2, 3)]
+            self.assertEqual(sorted(f for s in slices for f in s), sorted(files))
+            self.assertEqual([select_shard(list(reversed(files)), f'{i}/3')[0] for i in (1, 2, 3)],
+                             [list(reversed(s)) for s in slices])
+            self.assertEqual(slices[0], [files[0]])
+            self.assertEqual(len({select_shard(files, f'{i}/3')[1]['scope'] for i in (1, 2, 3)}), 1)
+
+            # Recorded durations outweigh sizes; unrecorded files scale by size.
+            report = Path(temp_dir) / 'profile.json'
+            report.write_text(json.dumps({'files': [{'path': files[6], 'seconds': 9.0}, {'path': files[0], 'seconds': 0.9}]}),
+                              encoding='utf-8')
+            self.assertEqual(select_shard(files, '1/3', str(report))[0], [files[6]])
+
+            for spec in ('0/3', '4/3', '1', 'a/b'):
+                with self.subTest(spec=spec), self.assertRaises(ValueError):
+                    select_shard(files, spec)
+
+    def test_merged_shard_results_keep_main_exit_codes(self) -> None:
+        drifted = WorkflowEnclaveAllScopeTests.DRIFTED
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            files = []
+            for name, text in (('pester-selfhosted.yml', drifted), ('plain.yml', 'name: Plain\non: push\njobs: {}\n')):
+                (root / name).write_text(text, encoding='utf-8', newline='\n')
+                files.append(str(root / name))
+            codes = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in (1, 2):
+                    codes.append(updater_main(['--check', '--no-cache', '--shard', f'{i}/2', '--results', str(root / f'{i}.json'), *files]))
+                merged = updater_main(['--merge-results', '--results', str(root / 'merged.json'), str(root / '1.json'), str(root / '2.json')])
+                missing = updater_main(['--merge-results', str(root / '1.json')])
+                other = updater_main(['--check', '--no-cache', '--shard', '2/2', '--results', str(root / 'other.json'), files[0]])
+                mixed = updater_main(['--merge-results', str(root / '1.json'), str(root / 'other.json')])
+            statuses, problems = merge_results([root / '1.json', root / '2.json'])
+            written = json.loads((root / 'merged.json').read_text(encoding='utf-8'))
+
+        self.assertEqual(sorted(codes), [0, 3])
+        self.assertEqual((merged, missing, mixed), (3, 4, 4))
+        self.assertEqual(other, 0)
+        self.assertEqual(problems, [])
+        self.assertEqual(statuses, {files[0]: 'needs-update', files[1]: 'clean'})
+        self.assertEqual(written['files'], statuses)
+
+    def test_all_scope_shards_before_consulting_the_scan_state(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / 'repo'
+            WorkflowEnclaveAllScopeTests._fake_repo(root)
+            calls = []
+
+            def run_in_process(argv):
+                calls.append(argv)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return updater_main(argv)
+
+            with patch.object(_enclave, 'REPO_ROOT', root), \
+                    patch.object(_enclave, 'VENV_DIR', Path(temp_dir) / 'home'), \
+                    patch.object(_enclave, 'SCAN_STATE_PATH', Path(temp_dir) / 'home' / 'scan-state.json'), \
+                    patch.object(_enclave, 'run_updater', side_effect=run_in_process), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                codes = [_enclave.run_all_scope(['--check', '--no-cache', '--shard', f'{i}/2', '--results', str(root / f'{i}.json')])
+                         for i in (1, 2)]
+                self.assertEqual(_enclave.run_all_scope(['--write', '--no-cache']), 0)
+                # Everything is clean in the scan state now; shard files still list their slice.
+                self.assertEqual(_enclave.run_all_scope(['--check', '--no-cache', '--shard', '1/2', '--results', str(root / '1.json')]), 0)
+                statuses, problems = merge_results([root / '1.json', root / '2.json'])
+
+        self.assertEqual(sorted(codes), [0, 3])
+        self.assertFalse(any('--shard' in argv for argv in calls))
+        self.assertEqual(problems, [])
+        self.assertEqual(sorted(Path(name).name for name in statuses), ['action.yml', 'pester-selfhosted.yml', 'plain.yaml'])
+
+    def test_all_scope_marks_pending_files_error_when_the_updater_writes_no_results(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / 'repo'
+            WorkflowEnclaveAllScopeTests._fake_repo(root)
+            with patch.object(_enclave, 'REPO_ROOT', root), \
+                    patch.object(_enclave, 'VENV_DIR', Path(temp_dir) / 'home'), \
+                    patch.object(_enclave, 'SCAN_STATE_PATH', Path(temp_dir) / 'home' / 'scan-state.json'), \
+                    patch.object(_enclave, 'run_updater', return_value=2), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                codes = [_enclave.run_all_scope(['--check', '--no-cache', '--max-depth', 'x', '--shard', f'{i}/2',
+                                                 '--results', str(root / f'{i}.json')])
+                         for i in (1, 2)]
+                merged = updater_main(['--merge-results', str(root / '1.json'), str(root / '2.json')])
+                statuses, _ = merge_results([root / '1.json', root / '2.json'])
+
+        self.assertEqual(codes, [2, 2])
+        self.assertNotEqual(merged, 0)
+        self.assertEqual(set(statuses.values()), {'error'})
+
+
+class WorkflowResourceLimitTests(unittest.TestCase):
+    @staticmethod
+    def _alias_bomb(levels: int) -> str:
+        lines = ['x-a: &a [x, x, x, x, x, x, x, x, x, x]']
+        for i in range(1, levels):
+            prev, name = chr(ord('a') + i - 1), chr(ord('a') + i)
+            lines.append(f"x-{name}: &{name} [{', '.join([f'*{prev}'] * 10)}]")
+        return '\n'.join(lines) + '\n'
+
+    def test_structural_limits_stop_alias_bombs_and_deep_nesting(self) -> None:
+        check_structure(self._alias_bomb(3), Limits())
+        with self.assertRaisesRegex(LimitExceeded, 'max-alias-nodes'):
+            check_structure(self._alias_bomb(6), Limits())
+        check_structure(self._alias_bomb(6), Limits(max_alias_nodes=0))
+        deep = 'a: ' + '[' * 80 + ']' * 80 + '\n'
+        with self.assertRaisesRegex(LimitExceeded, 'max-depth'):
+            check_structure(deep, Limits())
+        check_structure(deep, Limits(max_depth=100))
+
+    def test_over_limit_files_fail_the_run_with_exit_4(self) -> None:
+        source = (REPO_ROOT / '.github' / 'workflows' / 'validate.yml').read_text(encoding='utf-8')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'validate.yml'
+            path.write_text(self._alias_bomb(6) + source, encoding='utf-8', newline='\n')
+            for extra, message in ((['--no-fast-check'], 'max-alias-nodes'), (['--max-file-bytes', '1000'], 'max-file-bytes')):
+                with self.subTest(extra=extra):
+                    out = io.StringIO()
+                    with contextlib.redirect_stdout(out):
+                        code = updater_main(['--check', '--no-cache', *extra, str(path)])
+                    self.assertEqual(code, 4)
+                    self.assertIn(f'::error::Failed to process {path}', out.getvalue())
+                    self.assertIn(message, out.getvalue())
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(updater_main(['--check', '--file-timeout', 'soon', str(path)]), 2)
+
+    def test_supervisor_kills_overrunning_and_reports_dead_workers(self) -> None:
+        started = time.monotonic()
+        results = list(supervised_map(time.sleep, [(0,), (30,), (0,), (0,)], 2, lambda task, reason: reason, seconds=1.0))
+        self.assertLess(time.monotonic() - started, 20)
+        self.assertEqual(results[0], None)
+        self.assertIn('1s per-file time limit', results[1])
+        self.assertEqual(results[2:], [None, None])
+        results = list(supervised_map(os._exit, [(3,), (0,)], 1, lambda task, reason: reason))
+        self.assertEqual(results[0], 'worker exited with code 3')
+        self.assertEqual(results[1], 'worker exited with code 0')
+
+    def test_supervisor_reaps_workers_that_hang_while_starting(self) -> None:
+        started = time.monotonic()
+        results = list(supervised_map(time.sleep, [(0,), (0,)], 1, lambda task, reason: reason,
+                                      initializer=functools.partial(time.sleep, 30), start_seconds=1.0))
+        self.assertLess(time.monotonic() - started, 20)
+        self.assertEqual(results, ['worker did not start within 1s'] * 2)
+
+    def test_inline_runs_get_the_default_per_file_time_limit(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'pester-selfhosted.yml'
+            path.write_text(WorkflowEnclaveAllScopeTests.DRIFTED, encoding='utf-8', newline='\n')
+            out = io.StringIO()
+            started = time.monotonic()
+            with patch('_limits.DEFAULT_FILE_SECONDS', 0.5), \
+                    patch('_update_workflows_impl.apply_transforms', side_effect=lambda *a, **k: time.sleep(30)), \
+                    contextlib.redirect_stdout(out):
+                code = updater_main(['--check', '--no-cache', str(path)])
+
+        self.assertIsNone(Limits(seconds=0).file_seconds)
+        self.assertLess(time.monotonic() - started, 20)
+        self.assertEqual(code, 4)
+        self.assertIn('0.5s per-file time limit', out.getvalue())
+
+
+class WorkflowEnclaveChangedSinceTests(unittest.TestCase):
+    def _git(self, root: Path, *args: str) -> None:
+        subprocess.run(['git', '-C', str(root), '-c', 'user.name=t', '-c', 'user.email=t@example.invalid', *args],
+                       check=True, capture_output=True)
+
+    def test_changed_paths_cover_commits_worktree_and_untracked_files(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            for name in ('committed.yml', 'edited.yml', 'same.yml'):
+                (root / name).write_text(f'name: {name}\n', encoding='utf-8')
+            self._git(root, 'init', '-q')
+            self._git(root, 'add', '.')
+            self._git(root, 'commit', '-q', '-m', 'base')
+            self._git(root, 'tag', 'base')
+            (root / 'committed.yml').write_text('name: moved\n', encoding='utf-8')
+            self._git(root, 'commit', '-q', '-am', 'change')
+            (root / 'edited.yml').write_text('name: edited\n', encoding='utf-8')
+            (root / 'new.yml').write_text('name: new\n', encoding='utf-8')
+            with patch.object(_enclave, 'REPO_ROOT', root):
+                self.assertEqual(_enclave.changed_paths_since('base'), ['committed.yml', 'edited.yml', 'new.yml'])
+                with self.assertRaises(RuntimeError):
+                    _enclave.changed_paths_since('no-such-ref')
+
+    def test_scope_is_the_changed_managed_workflows_unless_the_updater_changed(self) -> None:
+        scope = load_default_scope()
+        cases = [
+            (['README.md'], [], []),
+            ([scope[2], '.github/workflows/unmanaged.yml', 'docs/x.md'], [scope[2]], []),
+            ([scope[0], 'tools/workflows/_transforms_wire.py'], scope, ['tools/workflows/_transforms_wire.py']),
+            (['tools/workflows/workflow-manifest.json'], scope, ['tools/workflows/workflow-manifest.json']),
+            (['tools/workflows/tests/test_workflow_enclave.py'], [], []),
+        ]
+        for changed, files, engine_inputs in cases:
+            with self.subTest(changed=changed), patch.object(_enclave, 'changed_paths_since', return_value=changed):
+                self.assertEqual(_enclave.changed_since_scope('origin/develop'), (files, engine_inputs))
+
+        output = io.StringIO()
+        with patch.object(_enclave, 'changed_paths_since', return_value=['README.md']), \
+                patch.object(_enclave, 'run_updater', side_effect=AssertionError('nothing to run')), \
+                contextlib.redirect_stdout(output):
+            self.assertEqual(_enclave.run_changed_since('origin/develop', ['--check']), 0)
+        self.assertIn(f'0 of {len(scope)} managed workflows changed', output.getvalue())
+
+
+class WorkflowEnclaveAllScopeTests(unittest.TestCase):
+    DRIFTED = (
+        "name: Pester (self-hosted)\n"
+        "on:\n"
+        "  workflow_dispatch:\n"
+        "    inputs: {}\n"
+    )
+
+    @classmethod
+    def _fake_repo(cls, root: Path) -> None:
+        workflows = root / '.github' / 'workflows'
+        (workflows / 'nested').mkdir(parents=True)
+        (root / '.github' / 'actions' / 'probe').mkdir(parents=True)
+        (workflows / 'pester-selfhosted.yml').write_text(cls.DRIFTED, encoding='utf-8', newline='\n')
+        (workflows / 'nested' / 'plain.yaml').write_text('name: Plain\non: push\njobs: {}\n', encoding='utf-8')
+        (workflows / 'README.md').write_text('not a workflow\n', encoding='utf-8')
+        (root / '.github' / 'actions' / 'probe' / 'action.yml').write_text('name: Probe\nruns:\n  using: composite\n  steps: []\n', encoding='utf-8')
+
+    def test_discovery_covers_workflows_and_composite_actions(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            self._fake_repo(root)
+            with patch.object(_enclave, 'REPO_ROOT', root):
+                scope = _enclave.discover_all_scope()
+
+        self.assertEqual(scope, [
+            '.github/actions/probe/action.yml',
+            '.github/workflows/nested/plain.yaml',
+            '.github/workflows/pester-selfhosted.yml',
+        ])
+
+    def test_all_scope_skips_files_unchanged_since_a_clean_check(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / 'repo'
+            self._fake_repo(root)
+            updater_calls = []
+
+            def run_in_process(argv):
+                updater_calls.append([Path(arg).name for arg in argv if arg.endswith(('.yml', '.yaml'))])
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return updater_main(argv)
+
+            with patch.object(_enclave, 'REPO_ROOT', root), \
+                    patch.object(_enclave, 'VENV_DIR', Path(temp_dir) / 'home'), \
+                    patch.object(_enclave, 'SCAN_STATE_PATH', Path(temp_dir) / 'home' / 'scan-state.json'), \
+                    patch.object(_enclave, 'run_updater', side_effect=run_in_process), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(_enclave.run_all_scope(['--check', '--no-cache']), 3)
+                self.assertEqual(_enclave.run_all_scope(['--check', '--no-cache']), 3)
+                # Touching a clean file without changing it is caught by the digest.
+                plain = root / '.github' / 'workflows' / 'nested' / 'plain.yaml'
+                os.utime(plain, ns=(plain.stat().st_atime_ns, plain.stat().st_mtime_ns + 10 ** 9))
+                self.assertEqual(_enclave.run_all_scope(['--check', '--no-cache']), 3)
+                self.assertEqual(_enclave.run_all_scope(['--write', '--no-cache']), 0)
+                self.assertEqual(_enclave.run_all_scope(['--check', '--no-cache']), 0)
+                # Verdict-affecting options key the state separately.
+                self.assertEqual(_enclave.run_all_scope(['--check', '--no-cache', '--splice']), 0)
+
+        self.assertEqual(updater_calls, [
+            ['action.yml', 'plain.yaml', 'pester-selfhosted.yml'],
+            ['pester-selfhosted.yml'],
+            ['pester-selfhosted.yml'],
+            ['pester-selfhosted.yml'],
+            ['action.yml', 'plain.yaml', 'pester-selfhosted.yml'],
+        ])
+
+    def test_scan_state_trusts_old_stat_and_rechecks_racy_or_changed_files(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = Path(temp_dir) / 'ci.yml'
+            target.write_text('name: CI\n', encoding='utf-8')
+            state_path = Path(temp_dir) / 'scan-state.json'
+
+            state = ScanState(state_path, 'engine-a')
+            state.record(target, 'ci.yml')
+            # Just written: inside the racy window, so the mtime is not trusted.
+            self.assertIsNone(state.entries['ci.yml']['mtimeNs'])
+            old = time.time_ns() - 60 * 10 ** 9
+            os.utime(target, ns=(old, old))
+            state.record(target, 'ci.yml')
+            state.save()
+
+            reloaded = ScanState(state_path, 'engine-a')
+            with patch('_scan_state._digest', side_effect=AssertionError('stat match must not read the file')):
+                self.assertTrue(reloaded.is_clean(target, 'ci.yml'))
+            self.assertEqual(ScanState(state_path, 'engine-b').entries, {})
+
+            # Same size, later mtime: the digest decides.
+            target.write_text('name: CX\n', encoding='utf-8')
+            self.assertFalse(reloaded.is_clean(target, 'ci.yml'))
+
+
+class WorkflowStartupBudgetTests(unittest.TestCase):
+    """`python -X importtime` budget for the CLI entry points on their usage path.
+
+    The entry points measure 15-40 ms here; a slow CI host can loosen it with
+    COMPAREVI_WORKFLOW_STARTUP_BUDGET_MS rather than the default moving for
+    everyone.
+    """
+
+    BUDGET_MS = float(os.environ.get('COMPAREVI_WORKFLOW_STARTUP_BUDGET_MS', '150'))
+    DEFERRED_MODULES = ('ruamel', 'subprocess', 'socket', 'tempfile', 'difflib', 'multiprocessing', 'concurrent')
+
+    def _importtime(self, script: str, pycache: str) -> list[tuple[int, str]]:
+        env = {key: value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+        # A private bytecode cache keeps source compilation out of the measurement.
+        env['PYTHONPYCACHEPREFIX'] = pycache
+        command = [sys.executable, '-X', 'importtime', str(SCRIPT_ROOT / script)]
+        subprocess.run(command, capture_output=True, env=env, check=False)
+        completed = subprocess.run(command, capture_output=True, text=True, env=env, check=False)
+        self.assertEqual(completed.returncode, 2, completed.stdout + completed.stderr)
+        entries = []
+        for line in completed.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            entries.append((int(cumulative), name.rstrip()))
+        return entries
+
+    def test_entry_points_stay_within_the_import_budget(self) -> None:
+        with tempfile.TemporaryDirectory() as pycache:
+            for script in ('update_workflows.py', 'workflow_enclave.py'):
+                with self.subTest(script=script):
+                    entries = self._importtime(script, pycache)
+                    names = [name.strip() for _, name in entries]
+                    deferred = sorted({n for n in names if n.split('.')[0] in self.DEFERRED_MODULES})
+                    self.assertEqual(deferred, [], f'{script} imports heavy modules at startup')
+                    # Top-level imports after interpreter startup (site) are the script's own.
+                    top_level = [(us, name) for us, name in entries if not name.startswith('  ')]
+                    after_site = top_level[[name.strip() for _, name in top_level].index('site') + 1:]
+                    total_ms = sum(us for us, _ in after_site) / 1000
+                    self.assertLess(total_ms, self.BUDGET_MS, f'{script}: {after_site}')
+
+
+class WorkflowUpdaterDaemonTests(unittest.TestCase):
+    def test_daemon_serves_updater_requests_until_shutdown(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sock_path = _daemon.socket_path_for(Path(temp_dir))
+            workflow_path = Path(temp_dir) / 'pester-selfhosted.yml'
+            workflow_path.write_text(
+                "name: Pester (self-hosted)\n"
+                "on:\n"
+                "  workflow_dispatch:\n"
+                "    inputs: {}\n",
+                encoding='utf-8',
+                newline='\n'
+            )
+            server = subprocess.Popen(
+                [sys.executable, str(SCRIPT_ROOT / '_daemon.py'), '--serve', str(sock_path)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            try:
+                deadline = time.monotonic() + 30
+                while _daemon.request(sock_path, {'op': 'ping'}, timeout=5.0) is None:
+                    self.assertIsNone(server.poll())
+                    self.assertLess(time.monotonic(), deadline, 'daemon did not start')
+                    time.sleep(0.1)
+
+                self.assertEqual(sock_path.stat().st_mode & 0o777, 0o600)
+                response = _daemon.request(
+                    sock_path,
+                    {'op': 'run', 'argv': ['--check', '--no-cache', workflow_path.name], 'cwd': temp_dir},
+                    timeout=30.0
+                )
+                self.assertEqual(response['exitCode'], 3, response)
+                self.assertIn('NEEDS UPDATE: pester-selfhosted.yml', response['output'])
+                chunks = []
+                response = _daemon.request(
+                    sock_path,
+                    {'op': 'run', 'argv': ['--check', '--no-cache', workflow_path.name], 'cwd': temp_dir},
+                    timeout=30.0,
+                    on_output=chunks.append
+                )
+                self.assertEqual(response, {'exitCode': 3})
+                self.assertIn('NEEDS UPDATE: pester-selfhosted.yml', ''.join(chunks))
+                self.assertEqual(
+                    _daemon.request(sock_path, {'op': 'run', 'argv': ['--check'], 'cwd': 'relative'}, timeout=5.0),
+                    {'error': 'cwd must be an absolute path'}
+                )
+
+                self.assertEqual(_daemon.request(sock_path, {'op': 'shutdown'}, timeout=5.0), {'ok': True})
+                self.assertEqual(server.wait(timeout=10), 0)
+                self.assertFalse(sock_path.exists())
+            finally:
+                if server.poll() is None:
+                    server.kill()
+                    server.wait()
+
+    def test_daemon_requests_restart_when_sources_change(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sock_path = _daemon.socket_path_for(Path(temp_dir))
+            with patch.object(_daemon, 'sources_fingerprint', side_effect=['before', 'after']):
+                exit_code = _daemon.serve(sock_path)
+
+        self.assertEqual(exit_code, _daemon.DAEMON_RESTART_EXIT_CODE)
+
+    def test_request_without_daemon_returns_none(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.assertIsNone(_daemon.request(Path(temp_dir) / 'missing.sock', {'op': 'ping'}))
+
+    def test_wedged_daemon_times_out_and_the_caller_falls_back(self) -> None:
+        import socket
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sock_path = Path(temp_dir) / 'updater.sock'
+            # Accepts connections but never answers.
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as wedged:
+                wedged.bind(str(sock_path))
+                wedged.listen(1)
+                started = time.monotonic()
+                with patch.object(_enclave, '_daemon_socket_path', return_value=sock_path), \
+                        patch.object(_enclave, 'DAEMON_RUN_TIMEOUT', 0.5), \
+                        contextlib.redirect_stdout(io.StringIO()) as out:
+                    self.assertIsNone(_enclave._run_via_daemon(['--check', 'ci.yml']))
+                    # The daemon may still be writing: a write is never run a second time.
+                    self.assertEqual(_enclave._run_via_daemon(['--write', 'ci.yml']), 4)
+
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertIn('no answer within 0.5s; running the updater directly', out.getvalue())
+        self.assertIn('not re-running it', out.getvalue())
+
+    def test_run_output_streams_as_complete_lines(self) -> None:
+        import socket
+        server, client = socket.socketpair()
+        with server, client:
+            output = _daemon._StreamedOutput(server)
+            output.write('one\ntw')
+            output.write('o\n')
+            output.write('tail')
+            output.finish()
+            server.shutdown(socket.SHUT_WR)
+            messages = [json.loads(line) for line in client.makefile('rb')]
+        self.assertEqual(messages, [{'output': 'one\n'}, {'output': 'two\n'}, {'output': 'tail'}])
+
+    @unittest.skipUnless(hasattr(os, 'getuid'), 'per-user runtime dirs are POSIX')
+    def test_long_homes_put_the_socket_in_a_private_runtime_dir(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            home = Path(temp_dir) / ('h' * 120)
+            with patch.dict(os.environ, {'XDG_RUNTIME_DIR': ''}), patch('tempfile.gettempdir', return_value=temp_dir):
+                sock_path = _daemon.socket_path_for(home)
+                runtime = sock_path.parent
+                self.assertEqual(runtime.stat().st_uid, os.getuid())
+                self.assertEqual(runtime.stat().st_mode & 0o777, 0o700)
+                # A dir someone else could enter (e.g. pre-created to hijack the socket) is refused.
+                runtime.chmod(0o755)
+                self.assertIsNone(_daemon.socket_path_for(home))
+                self.assertIsNone(_daemon.request(None, {'op': 'ping'}))
+
 
 if __name__ == '__main__':
     unittest.main()
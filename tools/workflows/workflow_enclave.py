@@ -8,25 +8,102 @@ SCRIPT_ROOT = Path(__file__).resolve().parent
 if str(SCRIPT_ROOT) not in sys.path:
     sys.path.insert(0, str(SCRIPT_ROOT))
 
-from _enclave import ensure_enclave, load_default_scope, run_updater
+from _enclave import (
+    ensure_enclave,
+    load_default_scope,
+    open_result_cache,
+    run_all_scope,
+    run_changed_since,
+    run_daemon,
+    run_updater,
+    stop_daemon,
+    stream_updater,
+    take_option,
+)
 
 
 def main(argv: list[str]) -> int:
     if argv == ['--ensure-only']:
         ensure_enclave()
         return 0
-    use_default_scope = False
-    if argv and argv[0] == '--default-scope':
-        use_default_scope = True
+    if argv == ['--daemon']:
+        return run_daemon()
+    if argv == ['--daemon-stop']:
+        if not stop_daemon():
+            print('No workflow updater daemon is running.')
+        return 0
+    if len(argv) == 2 and argv[0] == '--cache-export':
+        count = open_result_cache().export_to(Path(argv[1]))
+        print(f'exported {count} cache entries to {argv[1]}')
+        return 0
+    if len(argv) == 2 and argv[0] == '--cache-import':
+        count = open_result_cache().import_from(Path(argv[1]))
+        print(f'imported {count} cache entries from {argv[1]}')
+        return 0
+    if argv and argv[0] == '--merge-results':
+        from _shard import run_merge
+        out, paths = take_option(argv[1:], '--results')
+        if not paths:
+            print('Usage: workflow_enclave.py --merge-results [--results FILE] <shard-results...>')
+            return 2
+        return run_merge([Path(p) for p in paths], Path(out) if out else None)
+    if argv and argv[0] == '--stdio':
+        return stream_updater(argv)
+    scope = None
+    since = None
+    if argv and argv[0] in ('--default-scope', '--all', '--watch'):
+        scope = argv[0]
         argv = argv[1:]
-    if not argv or argv[0] not in ('--check', '--write'):
+    elif len(argv) >= 2 and argv[0] == '--changed-since':
+        scope, since = argv[0], argv[1]
+        argv = argv[2:]
+    if not argv or argv[0] not in ('--check', '--write', '--diff'):
         print('Usage:')
         print('  workflow_enclave.py --ensure-only')
         print('  workflow_enclave.py --default-scope (--check|--write)')
         print('  workflow_enclave.py (--check|--write) <files...>')
+        print('  workflow_enclave.py [--default-scope] --diff [<files...>]')
+        print('  workflow_enclave.py --all (--check|--write|--diff)')
+        print('  workflow_enclave.py --changed-since <git-ref> (--check|--write|--diff)')
+        print('  workflow_enclave.py --watch (--check|--write|--diff) [<files...>]')
+        print('  workflow_enclave.py --stdio [--splice] [--no-fast-check]')
+        print('  workflow_enclave.py --merge-results [--results FILE] <shard-results...>')
+        print('  workflow_enclave.py (--cache-export|--cache-import) <file>')
+        print('  workflow_enclave.py (--daemon|--daemon-stop)')
+        print('Options:')
+        print('  --jobs N     process files across N worker processes (0 = one per CPU)')
+        print('  --no-cache   bypass the result cache under the enclave home')
+        print('  --splice     re-emit only changed job blocks; untouched regions stay byte-for-byte')
+        print('  --transaction  with --write, rename every file into place only if all files succeed')
+        print('  --fail-fast  with --check, stop each file at its first real mutation')
+        print('  --journal FILE  write per-transform mutation records as JSON lines')
+        print('  --all        every .github/workflows file and .github/actions/*/action.yml;')
+        print('               files unchanged since their last clean check are skipped')
+        print('  --changed-since REF  only managed workflows changed since the merge base with REF')
+        print('               (commits, worktree and untracked); all of them when the updater changed')
+        print('  --shard I/N  check only slice I of N (1-based) of the resolved scope, balanced by file size')
+        print('               or by a --profile report given as --shard-durations FILE; combine the')
+        print('               slices\' --results files with --merge-results')
+        print('  --max-file-bytes N, --max-depth N, --max-alias-nodes N  fail files over these')
+        print('               structural limits before parsing (0 = off)')
+        print('  --file-timeout S, --max-memory MB  run files in supervised workers that are killed')
+        print('               when a file overruns; the file is reported as failed (exit 4). Without')
+        print('               --file-timeout every file still gets 120 s (--file-timeout 0 = off)')
+        print('  --watch      keep one warm updater running and re-check files as they change')
+        print('               (default scope when no files are given)')
+        print('  --stdio      answer JSON-lines requests {"path","text","mode"} from stdin with')
+        print('               {"path","changed","text","error","durationMs"} lines on stdout')
         return 2
-    if use_default_scope:
-        argv = [argv[0], *load_default_scope()]
+    if scope == '--all':
+        return run_all_scope(argv)
+    if scope == '--changed-since':
+        return run_changed_since(since, argv)
+    if scope == '--watch':
+        if not [arg for arg in argv[1:] if arg.endswith(('.yml', '.yaml'))]:
+            argv = [*argv, *load_default_scope()]
+        return stream_updater([argv[0], '--watch', *argv[1:]])
+    if scope == '--default-scope':
+        argv = [*argv, *load_default_scope()]
     return run_updater(argv)
 
 